@@ -4,6 +4,10 @@ from app.api.routes.events import router as events_router
 from app.api.routes.checklists import router as checklists_router
 from app.api.routes.stream import router as stream_router
 from app.api.routes.regulations import router as regulations_router
+from app.api.routes.monitoring import router as monitoring_router
+from app.api.routes.models import router as models_router
+from app.api.routes.analysis import router as analysis_router
+from app.api.routes.detect import router as detect_router
 
 __all__ = [
     "cameras_router",
@@ -12,4 +16,8 @@ __all__ = [
     "checklists_router",
     "stream_router",
     "regulations_router",
+    "monitoring_router",
+    "models_router",
+    "analysis_router",
+    "detect_router",
 ]
@@ -0,0 +1,98 @@
+"""
+Offline video analysis REST API routes.
+"""
+import os
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import get_db
+from app.db.models import Camera
+from app.schemas.analysis import AnalysisJobCreate
+from app.services.offline_analysis import get_analysis_manager
+
+router = APIRouter(prefix="/analysis", tags=["analysis"])
+
+
+async def _get_camera(camera_id: int, db: AsyncSession) -> Camera:
+    result = await db.execute(select(Camera).where(Camera.id == camera_id))
+    camera = result.scalar_one_or_none()
+
+    if not camera:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Camera {camera_id} not found"
+        )
+    return camera
+
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def create_analysis_job(job: AnalysisJobCreate, db: AsyncSession = Depends(get_db)):
+    """
+    Analyse recorded video files in parallel, one file per worker process.
+
+    Events are stored under the camera and tagged with their source file;
+    follow progress on /ws/analysis or by polling the job.
+    """
+    camera = await _get_camera(job.camera_id, db)
+
+    missing = [path for path in job.files if not os.path.isfile(path)]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Files not found: {', '.join(missing[:10])}"
+        )
+
+    return await get_analysis_manager().create_job(camera, job.files)
+
+
+@router.post("/cameras/{camera_id}", status_code=status.HTTP_202_ACCEPTED)
+async def start_analysis(camera_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Analyse the whole recorded video of a file camera as fast as possible.
+
+    Events are stored with the camera's other events (tagged with the job ID
+    and video position); poll the job for progress.
+    """
+    camera = await _get_camera(camera_id, db)
+
+    try:
+        return await get_analysis_manager().start(camera)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/jobs")
+async def get_analysis_jobs(limit: int = 50) -> List[Dict[str, Any]]:
+    """Get recent analysis jobs, newest first."""
+    return await get_analysis_manager().list_jobs(limit)
+
+
+@router.get("/jobs/{job_id}")
+async def get_analysis_job(job_id: int) -> Dict[str, Any]:
+    """Get the progress of an analysis job and its files."""
+    job = await get_analysis_manager().get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Analysis job {job_id} not found"
+        )
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_analysis_job(job_id: int) -> Dict[str, Any]:
+    """Cancel an analysis job; running files stop after their current batch."""
+    manager = get_analysis_manager()
+    if await manager.get_job(job_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Analysis job {job_id} not found"
+        )
+    if not await manager.cancel(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Analysis job {job_id} already finished"
+        )
+    return await manager.get_job(job_id)
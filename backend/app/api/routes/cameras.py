@@ -23,7 +23,11 @@ async def create_camera(
     db_camera = Camera(
         name=camera.name,
         source=camera.source,
-        source_type=camera.source_type
+        source_type=camera.source_type,
+        processing_fps=camera.processing_fps,
+        detection_stride=camera.detection_stride,
+        inference_width=camera.inference_width,
+        gmc_method=camera.gmc_method
     )
     db.add(db_camera)
     await db.commit()
@@ -0,0 +1,108 @@
+"""
+Image detection REST API routes.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import cv2
+import numpy as np
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile, status
+
+from app.config import settings
+from app.core.detection import load_detector
+from app.core.detections import FrameDetections
+from app.core.model_registry import get_model_registry
+from app.core.preprocess import FramePreprocessor
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/detect", tags=["detect"])
+
+# cv2.imdecode releases the GIL, so uploads decode in parallel
+_decode_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.DETECT_DECODE_THREADS), thread_name_prefix="image-decode"
+)
+
+
+def _decode_image(data: bytes) -> Optional[np.ndarray]:
+    """Decode a JPEG/PNG upload to a BGR frame (None if it is not an image)."""
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+class DetectorUnavailable(RuntimeError):
+    """The model could not be loaded."""
+
+
+def _detect_images(frames: List[np.ndarray], inference_width: Optional[int]) -> List[FrameDetections]:
+    """
+    Run the images through batched predictions of at most INFERENCE_MAX_BATCH frames. Blocking.
+
+    Raises:
+        DetectorUnavailable: If the model cannot be loaded
+    """
+    preprocessor = FramePreprocessor(inference_width) if inference_width else None
+    chunk = max(1, settings.INFERENCE_MAX_BATCH)
+    with get_model_registry().use() as detector:
+        if not detector.is_loaded and not load_detector(detector):
+            raise DetectorUnavailable("Detector model is not loaded")
+        raw_outputs = []
+        for start in range(0, len(frames), chunk):
+            raw_outputs.extend(detector.predict_frames(frames[start:start + chunk], preprocessor))
+        # Independent images: no tracker, frame_number is the upload index
+        return [
+            detector.build_result(raw, frame, frame_number=index)
+            for index, (raw, frame) in enumerate(zip(raw_outputs, frames))
+        ]
+
+
+@router.post("/batch")
+async def detect_batch(
+    files: List[UploadFile] = File(..., description="JPEG or PNG images"),
+    inference_width: Optional[int] = Query(
+        None, ge=160, le=3840, description="Downscale images to this width before detection (default: source)"
+    )
+) -> List[Dict[str, Any]]:
+    """
+    Run detection on many uploaded images in batched inferences.
+
+    Returns one DetectionResult per image, in upload order
+    (frame_number is the image's index). 503 if the model cannot be loaded,
+    500 if inference fails.
+    """
+    if len(files) > settings.DETECT_BATCH_MAX_IMAGES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.DETECT_BATCH_MAX_IMAGES} images per request"
+        )
+
+    uploads = []
+    for upload in files:
+        data = await upload.read()
+        if len(data) > settings.DETECT_BATCH_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"{upload.filename} exceeds {settings.DETECT_BATCH_MAX_BYTES} bytes"
+            )
+        uploads.append(data)
+
+    loop = asyncio.get_running_loop()
+    frames = await asyncio.gather(*(
+        loop.run_in_executor(_decode_executor, _decode_image, data) for data in uploads
+    ))
+    invalid = [upload.filename for upload, frame in zip(files, frames) if frame is None]
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not decode image(s): {', '.join(str(name) for name in invalid[:10])}"
+        )
+
+    try:
+        results = await asyncio.to_thread(_detect_images, list(frames), inference_width)
+    except DetectorUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except Exception as e:
+        logger.error(f"Batch detection failed: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Inference failed: {e}")
+
+    return [result.to_dict() for result in results]
@@ -23,6 +23,7 @@ async def get_events(
     acknowledged: Optional[bool] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    source_file: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
     db: AsyncSession = Depends(get_db)
@@ -36,6 +37,7 @@ async def get_events(
     - **acknowledged**: Filter by acknowledgement status
     - **start_date**: Filter events after this date
     - **end_date**: Filter events before this date
+    - **source_file**: Filter by analysed video file
     """
     query = select(Event)
 
@@ -51,6 +53,8 @@ async def get_events(
         query = query.where(Event.created_at >= start_date)
     if end_date is not None:
         query = query.where(Event.created_at <= end_date)
+    if source_file is not None:
+        query = query.where(Event.source_file == source_file)
 
     query = query.order_by(desc(Event.created_at)).offset(skip).limit(limit)
 
@@ -0,0 +1,38 @@
+"""
+Detector model registry REST API routes.
+"""
+from fastapi import APIRouter, HTTPException, status
+
+from app.core.model_registry import get_model_registry
+from app.schemas.model import ModelSwapRequest
+
+router = APIRouter(prefix="/models", tags=["models"])
+
+
+@router.get("/")
+async def get_models():
+    """Get the active, loading, draining and recently retired models with their latency."""
+    return get_model_registry().get_status()
+
+
+@router.post("/swap", status_code=status.HTTP_202_ACCEPTED)
+async def swap_model(request: ModelSwapRequest):
+    """
+    Load and warm a new model in the background, then swap it in.
+
+    Cameras keep running on the current model until the swap; poll
+    GET /models for progress.
+    """
+    try:
+        entry = get_model_registry().start_swap(
+            detector_type=request.detector_type,
+            quantization=request.quantization,
+            model_path=request.model_path,
+            warmup_runs=request.warmup_runs
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    return entry.to_dict()
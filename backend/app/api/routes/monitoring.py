@@ -0,0 +1,32 @@
+"""
+Background monitoring REST API routes.
+"""
+from fastapi import APIRouter, HTTPException, status
+
+from app.api.websocket import pipelines, supervisor
+
+router = APIRouter(prefix="/monitoring", tags=["monitoring"])
+
+
+@router.get("/status")
+async def get_monitoring_status():
+    """Get supervisor state and per-camera pipeline state."""
+    return supervisor.get_status()
+
+
+@router.post("/{camera_id}/restart")
+async def restart_pipeline(camera_id: int):
+    """Restart the processing pipeline of a camera."""
+    if pipelines.get(camera_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No running pipeline for camera {camera_id}"
+        )
+
+    if not await pipelines.restart(camera_id):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to restart pipeline for camera {camera_id}"
+        )
+
+    return pipelines.get(camera_id).get_status()
@@ -1,6 +1,7 @@
 """
 Video streaming REST API routes.
 """
+import asyncio
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
@@ -43,7 +44,10 @@ async def get_snapshot(
         source_type=camera.source_type
     )
 
-    snapshot = processor.get_snapshot(with_detection=with_detection, position_ms=position_ms)
+    # Decoding (and a first-time model load) must not block the event loop
+    snapshot = await asyncio.to_thread(
+        processor.get_snapshot, with_detection=with_detection, position_ms=position_ms
+    )
 
     if not snapshot:
         raise HTTPException(
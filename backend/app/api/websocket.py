@@ -4,19 +4,18 @@ WebSocket endpoints for real-time video streaming and events.
 import asyncio
 import json
 import logging
-from typing import Dict, Set
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
+from typing import Dict, Optional, Set
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import AsyncSessionLocal
-from app.db.models import Camera, ROI
+from app.db.models import Camera
 from app.core.video_processor import VideoProcessor
-from app.core.detection import get_detector
-from app.core.roi_manager import get_roi_manager, ROIManager
-from app.core.rule_engine import RuleEngine, create_rule_engine, Severity, EventType
+from app.core.roi_manager import ROIManager
 from app.core.alarm_manager import get_alarm_manager
-from app.schemas.roi import Point
+from app.services.stream_pipeline import CameraPipeline, PipelineRegistry, load_camera_rois
+from app.services.camera_supervisor import CameraSupervisor
+from app.services.offline_analysis import get_analysis_manager
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +28,8 @@ class ConnectionManager:
     def __init__(self):
         # camera_id -> set of connected websockets
         self._connections: Dict[int, Set[WebSocket]] = {}
+        # camera_id -> set of websockets currently receiving frames
+        self._watchers: Dict[int, Set[WebSocket]] = {}
         # All event subscribers
         self._event_subscribers: Set[WebSocket] = set()
         # Locks for thread safety
@@ -58,8 +59,26 @@ class ConnectionManager:
                 self._connections[camera_id].discard(websocket)
                 if not self._connections[camera_id]:
                     del self._connections[camera_id]
+            self._discard_watcher(websocket, camera_id)
         logger.info(f"Client disconnected from camera {camera_id}")
 
+    async def watch(self, websocket: WebSocket, camera_id: int):
+        """Start sending a camera's frames to a connected client."""
+        async with self._connections_lock:
+            self._watchers.setdefault(camera_id, set()).add(websocket)
+
+    async def unwatch(self, websocket: WebSocket, camera_id: int):
+        """Stop sending a camera's frames to a client."""
+        async with self._connections_lock:
+            self._discard_watcher(websocket, camera_id)
+
+    def _discard_watcher(self, websocket: WebSocket, camera_id: int):
+        """Remove a watcher. Caller must hold the connections lock."""
+        if camera_id in self._watchers:
+            self._watchers[camera_id].discard(websocket)
+            if not self._watchers[camera_id]:
+                del self._watchers[camera_id]
+
     async def disconnect_events(self, websocket: WebSocket):
         """Disconnect from events."""
         async with self._events_lock:
@@ -67,26 +86,27 @@ class ConnectionManager:
         logger.info("Client disconnected from events")
 
     async def send_frame(self, camera_id: int, data: dict):
-        """Send frame to all connected clients for a camera."""
+        """Send frame to all clients watching a camera."""
         async with self._connections_lock:
-            if camera_id not in self._connections:
+            if camera_id not in self._watchers:
                 return
-            connections = list(self._connections[camera_id])
+            connections = list(self._watchers[camera_id])
 
+        # Serialize once, send to all viewers concurrently
         message = json.dumps(data)
-        disconnected = set()
-
-        for websocket in connections:
-            try:
-                await websocket.send_text(message)
-            except Exception:
-                disconnected.add(websocket)
+        results = await asyncio.gather(
+            *(websocket.send_text(message) for websocket in connections),
+            return_exceptions=True
+        )
+        disconnected = {
+            websocket for websocket, result in zip(connections, results)
+            if isinstance(result, Exception)
+        }
 
         if disconnected:
             async with self._connections_lock:
                 for ws in disconnected:
-                    if camera_id in self._connections:
-                        self._connections[camera_id].discard(ws)
+                    self._discard_watcher(ws, camera_id)
 
     async def broadcast_event(self, event_data: dict):
         """Broadcast event to all event subscribers."""
@@ -109,33 +129,21 @@ class ConnectionManager:
 
     def get_viewer_count(self, camera_id: int) -> int:
         """Get number of viewers for a camera."""
-        return len(self._connections.get(camera_id, set()))
+        return len(self._watchers.get(camera_id, set()))
 
 
 # Global connection manager
 manager = ConnectionManager()
 
+# One shared pipeline per camera, fanned out to viewers via manager.send_frame()
+pipelines = PipelineRegistry(
+    frame_sink=manager.send_frame,
+    event_sink=manager.broadcast_event,
+    viewer_count=manager.get_viewer_count
+)
 
-async def load_camera_rois(camera_id: int, roi_manager: ROIManager):
-    """Load ROIs for a camera from database."""
-    async with AsyncSessionLocal() as db:
-        result = await db.execute(
-            select(ROI).where(ROI.camera_id == camera_id, ROI.is_active == True)
-        )
-        rois = result.scalars().all()
-
-        for roi in rois:
-            points_data = json.loads(roi.points)
-            points = [Point(x=p["x"], y=p["y"]) for p in points_data]
-            roi_manager.add_roi(
-                roi.id, 
-                points, 
-                roi.name, 
-                roi.color, 
-                zone_type=getattr(roi, "zone_type", "warning")
-            )
-
-        return [roi.id for roi in rois]
+# Keeps a pipeline running for every active camera (started from the app lifespan)
+supervisor = CameraSupervisor(pipelines)
 
 
 @router.websocket("/ws/stream/{camera_id}")
@@ -143,6 +151,9 @@ async def websocket_stream(websocket: WebSocket, camera_id: int):
     """
     WebSocket endpoint for video streaming with detection.
 
+    All viewers of a camera share a single pipeline, so decoding, inference
+    and rule evaluation run once per camera regardless of viewer count.
+
     Sends JSON messages with:
     - frame_base64: Base64 encoded JPEG frame
     - detection: Detection results (if enabled)
@@ -159,183 +170,99 @@ async def websocket_stream(websocket: WebSocket, camera_id: int):
 
     await manager.connect_stream(websocket, camera_id)
 
-    # Initialize components - use unique ROI manager per camera stream
-    roi_manager = ROIManager()  # Each camera needs its own ROI manager
-    rule_engine = create_rule_engine(roi_manager)
-    alarm_manager = get_alarm_manager()
-
-    # Store current frame for snapshot
-    current_frame = None
-
-    # Load ROIs
-    active_roi_ids = await load_camera_rois(camera_id, roi_manager)
-    logger.info(f"Loaded {len(active_roi_ids)} ROIs for camera {camera_id}")
-
-    # Create video processor
-    processor = VideoProcessor(
+    # ROIs and a private processor for paused seek previews
+    roi_manager = ROIManager()
+    await load_camera_rois(camera_id, roi_manager)
+    preview_processor = VideoProcessor(
         camera_id=camera.id,
         source=camera.source,
         source_type=camera.source_type
     )
 
-    streaming = False
+    pipeline: Optional[CameraPipeline] = None
+
+    async def detach():
+        nonlocal pipeline
+        if pipeline is not None:
+            await manager.unwatch(websocket, camera_id)
+            await pipelines.release(camera_id)
+            pipeline = None
 
     try:
         while True:
-            try:
-                # Receive command from client
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=0.1)
-                command = json.loads(data)
-
-                if command.get("action") == "start":
-                    if not processor.open():
-                        logger.error(f"Failed to open processor for camera {camera_id}")
-                        await websocket.send_text(json.dumps({
-                            "type": "error",
-                            "message": f"Failed to open video source for camera {camera_id}"
-                        }))
-                        continue
-
-                    streaming = True
-                    logger.info(f"Starting stream for camera {camera_id}")
-                    
-                    # Send metadata
-                    metadata = {
-                        "type": "metadata",
-                        "camera_id": camera_id,
-                        "width": processor.width,
-                        "height": processor.height,
-                        "fps": processor.original_fps,
-                        "total_frames": processor.total_frames,
-                        "total_duration_ms": processor.total_duration_ms
-                    }
-                    await websocket.send_text(json.dumps(metadata))
-
-                elif command.get("action") == "stop":
-                    streaming = False
-                    processor.is_running = False
-                    logger.info(f"Stopping stream for camera {camera_id}")
-
-                elif command.get("action") == "seek":
-                    position_ms = command.get("position_ms", 0)
-                    processor.seek(position_ms)
-
-                    # Send preview frame when paused
-                    if not streaming and processor.cap is not None:
-                        frame = processor.read_frame()
-                        if frame is not None:
-                            rois_data = roi_manager.get_all_rois()
-                            if rois_data:
-                                frame = VideoProcessor.draw_rois(frame, rois_data)
-                            frame_base64 = processor.encode_frame(frame)
-                            preview = {
-                                "type": "frame",
-                                "camera_id": camera_id,
-                                "frame": frame_base64,
-                                "current_ms": processor.get_timestamp() * 1000.0,
-                                "total_ms": processor.total_duration_ms,
-                                "detection": None,
-                                "events": [],
-                                "rois": rois_data,
-                                "roi_metrics": {}
-                            }
-                            await websocket.send_text(json.dumps(preview))
-
-                elif command.get("action") == "reload_rois":
-                    roi_manager.clear_rois()
-                    active_roi_ids = await load_camera_rois(camera_id, roi_manager)
-
-            except asyncio.TimeoutError:
-                pass
-
-            if streaming:
-                # Stream frames
-                async for stream_frame in processor.stream_frames(with_detection=True, rois_provider=roi_manager.get_all_rois):
-                    if not streaming:
-                        break
-
-                    # Evaluate safety rules
-                    if stream_frame.detection:
-                        events = rule_engine.evaluate(
-                            stream_frame.detection,
-                            camera_id,
-                            active_roi_ids,
-                            canvas_width=processor.width,
-                            canvas_height=processor.height
-                        )
-
-                        # Process events with frame for snapshots
-                        if events:
-                            async with AsyncSessionLocal() as db_session:
-                                for event in events:
-                                    event.camera_id = camera_id
-                                    # Always save to DB to ensure timeline visibility
-                                    # Pass the event object directly as required by alarm_manager.process_event
-                                    event_data = await alarm_manager.process_event(
-                                        event,
-                                        frame=stream_frame.raw_frame if event.severity != Severity.INFO else None,
-                                        db_session=db_session
-                                    )
-                                    stream_frame.events.append(event_data)
-
-                                    # Broadcast to event subscribers
-                                    await manager.broadcast_event(event_data)
-
-                    # Add ROI overlay data
+            # Frames are pushed by the pipeline; this loop only handles commands
+            data = await websocket.receive_text()
+            command = json.loads(data)
+            action = command.get("action")
+
+            if action == "start":
+                if pipeline is not None:
+                    continue
+
+                pipeline = await pipelines.acquire(camera)
+                if pipeline is None:
+                    logger.error(f"Failed to open processor for camera {camera_id}")
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "message": f"Failed to open video source for camera {camera_id}"
+                    }))
+                    continue
+
+                logger.info(f"Viewer attached to camera {camera_id} pipeline")
+
+                # Send metadata before the first frame arrives
+                await websocket.send_text(json.dumps(pipeline.metadata))
+                await manager.watch(websocket, camera_id)
+
+            elif action == "stop":
+                await detach()
+                logger.info(f"Viewer detached from camera {camera_id} pipeline")
+
+            elif action == "seek":
+                position_ms = command.get("position_ms", 0)
+
+                if pipeline is not None:
+                    # Shared stream: seeking moves playback for every viewer
+                    pipeline.seek(position_ms)
+                    logger.info(f"Seeking to {position_ms}ms during stream")
+                    continue
+
+                # Send preview frame when paused
+                if not preview_processor.open():
+                    continue
+                preview_processor.seek(position_ms)
+                frame = preview_processor.read_frame()
+                if frame is not None:
                     rois_data = roi_manager.get_all_rois()
-                    
-                    # Add real-time metrics (counts and stay times)
-                    persons = [d for d in stream_frame.detection.detections if d.class_name == "person"] if stream_frame.detection else []
-                    roi_metrics = rule_engine.get_roi_metrics(
-                        active_roi_ids, 
-                        persons=persons,
-                        canvas_width=processor.width,
-                        canvas_height=processor.height
-                    )
-
-                    # Send frame
-                    frame_data = {
+                    if rois_data:
+                        frame = VideoProcessor.draw_rois(frame, rois_data)
+                    frame_base64 = preview_processor.encode_frame(frame)
+                    preview = {
                         "type": "frame",
                         "camera_id": camera_id,
-                        "frame": stream_frame.frame_base64,
-                        "current_ms": stream_frame.current_ms,
-                        "total_ms": stream_frame.total_ms,
-                        "detection": stream_frame.detection.model_dump() if stream_frame.detection else None,
-                        "events": stream_frame.events,
+                        "frame": frame_base64,
+                        "current_ms": preview_processor.get_timestamp() * 1000.0,
+                        "total_ms": preview_processor.total_duration_ms,
+                        "detection": None,
+                        "events": [],
                         "rois": rois_data,
-                        "roi_metrics": roi_metrics
+                        "roi_metrics": {}
                     }
+                    await websocket.send_text(json.dumps(preview))
 
-                    await websocket.send_text(json.dumps(frame_data))
-
-                    # Check for new commands
-                    try:
-                        data = await asyncio.wait_for(websocket.receive_text(), timeout=0.01)
-                        command = json.loads(data)
-                        if command.get("action") == "stop":
-                            streaming = False
-                            processor.is_running = False
-                        elif command.get("action") == "seek":
-                            position_ms = command.get("position_ms", 0)
-                            processor.seek(position_ms)
-                            logger.info(f"Seeking to {position_ms}ms during stream")
-                        elif command.get("action") == "reload_rois":
-                            roi_manager.clear_rois()
-                            active_roi_ids = await load_camera_rois(camera_id, roi_manager)
-                    except asyncio.TimeoutError:
-                        pass
-
-                # Stream ended
-                streaming = False
-
-            await asyncio.sleep(0.01)
+            elif action == "reload_rois":
+                roi_manager.clear_rois()
+                await load_camera_rois(camera_id, roi_manager)
+                if pipeline is not None:
+                    await pipeline.reload_rois()
 
     except WebSocketDisconnect:
         logger.info(f"Client disconnected from camera {camera_id}")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
-        processor.close()
+        await detach()
+        preview_processor.close()
         await manager.disconnect_stream(websocket, camera_id)
 
 
@@ -398,6 +325,45 @@ async def websocket_events(websocket: WebSocket):
         await manager.disconnect_events(websocket)
 
 
+@router.websocket("/ws/analysis")
+async def websocket_analysis(websocket: WebSocket):
+    """
+    WebSocket endpoint for offline analysis progress.
+
+    Sends the recent jobs on connect, then every job and file update.
+    """
+    await websocket.accept()
+    analysis_manager = get_analysis_manager()
+    subscriber_id = f"ws_{id(websocket)}"
+
+    async def on_update(update):
+        try:
+            await websocket.send_text(json.dumps(update))
+        except Exception:
+            pass
+
+    analysis_manager.subscribe(subscriber_id, on_update)
+
+    try:
+        await websocket.send_text(json.dumps({
+            "type": "initial",
+            "jobs": await analysis_manager.list_jobs()
+        }))
+
+        while True:
+            try:
+                # Only used to detect the disconnect
+                await websocket.receive_text()
+            except WebSocketDisconnect:
+                break
+            except Exception as e:
+                logger.error(f"Analysis WebSocket error: {e}")
+                break
+
+    finally:
+        analysis_manager.unsubscribe(subscriber_id)
+
+
 @router.get("/ws/status")
 async def get_websocket_status():
     """Get WebSocket connection status."""
@@ -406,5 +372,10 @@ async def get_websocket_status():
         "stream_connections": {
             camera_id: len(connections)
             for camera_id, connections in manager._connections.items()
-        }
+        },
+        "stream_viewers": {
+            camera_id: len(watchers)
+            for camera_id, watchers in manager._watchers.items()
+        },
+        "pipelines": pipelines.get_status()
     }
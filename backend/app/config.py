@@ -25,9 +25,14 @@ class Settings(BaseSettings):
     BASE_DIR: Path = Path(__file__).resolve().parent.parent
     MODELS_DIR: Path = BASE_DIR / "models"
     SNAPSHOTS_DIR: Path = BASE_DIR / "snapshots"
+    ANALYSIS_DIR: Path = BASE_DIR / "analysis"  # Per-frame detections of offline analysis jobs
 
     # Detector Settings
-    DETECTOR_TYPE: str = "rfdetr"  # "yolo" or "rfdetr"
+    DETECTOR_TYPE: str = "rfdetr"  # "yolo", "rfdetr" or "onnx"
+    DETECTOR_PRELOAD: bool = True  # Load and warm up the model at startup (/health is 503 until done)
+    DETECTOR_WARMUP_RUNS: int = 3  # Inferences on a synthetic frame after loading
+    DETECTOR_WARMUP_WIDTH: int = 1920  # Synthetic warm-up frame size
+    DETECTOR_WARMUP_HEIGHT: int = 1080
     
     # YOLO Model
     YOLO_MODEL_PATH: str = "models/best.pt"
@@ -37,9 +42,43 @@ class Settings(BaseSettings):
     # RF-DETR Model
     RFDETR_MODEL_PATH: str = "models/checkpoint_best_ema.pth"
     RFDETR_CONFIDENCE_THRESHOLD: float = 0.35
+
+    # ONNX Runtime (CPU) - RF-DETR export, exported on first load if missing
+    ONNX_MODEL_PATH: str = "models/rfdetr_medium.onnx"
+    ONNX_INPUT_SIZE: int = 576  # Used when the graph has a dynamic resolution
+    ONNX_INTRA_OP_THREADS: int = 0  # 0 = one per CPU core
+    ONNX_INTER_OP_THREADS: int = 1
+    ONNX_NUM_SELECT: int = 300  # Top-k candidates kept by the postprocessor
+
+    # INT8 quantized CPU inference (through ONNX Runtime, built on first load)
+    DETECTOR_QUANTIZATION: str = "none"  # "none", "dynamic" or "static"
+    QUANTIZATION_CALIBRATION_DIR: str = "models/calibration"  # Frames for static calibration
+    QUANTIZATION_CALIBRATION_FRAMES: int = 64
     
+    # Cross-camera batched inference
+    INFERENCE_BATCHING: bool = True  # Batch frames from all cameras into one predict call
+    INFERENCE_MAX_BATCH: int = 8  # Maximum frames per batch
+    INFERENCE_MAX_WAIT_MS: float = 10.0  # Maximum wait for a batch to fill
+
+    # Async detection (BaseDetector.detect_async)
+    INFERENCE_THREADS: int = 2  # Threads in the shared inference executor
+    INFERENCE_CONCURRENCY: int = 1  # Concurrent detect calls per model instance
+
+    # Out-of-process inference (0 = run the detector inside the API process)
+    INFERENCE_WORKERS: int = 0  # Number of detector worker processes
+    INFERENCE_WORKER_THREADS: int = 0  # Torch threads per worker (0 = cpu_count / workers)
+    INFERENCE_SHM_SLOT_BYTES: int = 1920 * 1080 * 3  # Shared memory per frame slot
+    INFERENCE_WORKER_TIMEOUT: float = 30.0  # Seconds to wait for a worker result
+    INFERENCE_WORKER_STARTUP_TIMEOUT: float = 120.0  # Seconds to wait for workers to load the model
+    INFERENCE_WORKER_MAX_RESTARTS: int = 5  # Consecutive crashes before a worker is given up
+    INFERENCE_WORKER_RESTART_BACKOFF: float = 1.0  # First restart delay in seconds, doubled per crash
+    INFERENCE_WORKER_RESTART_BACKOFF_MAX: float = 60.0  # Upper bound of the restart delay
+
     # BoT-SORT Tracker Settings
     TRACKER_CONFIG: str = "bot_sort.yaml" # Placeholder or path
+    TRACKER_METHOD: str = "bot_sort"  # "bot_sort" or "iou" (numpy IoU tracker, also BoT-SORT's fallback)
+    TRACKER_GMC_METHOD: str = "none"  # Camera motion compensation: "none" (fixed mounts), "sparseOptFlow" or "orb"
+    TRACKER_GMC_DOWNSCALE: int = 4  # GMC runs on frames downscaled by this factor
 
     # Detection classes (standardized across models)
     CLASS_NAMES: List[str] = [
@@ -51,6 +90,42 @@ class Settings(BaseSettings):
     # Video processing
     VIDEO_FPS: int = 15
     VIDEO_QUALITY: int = 80  # JPEG quality for streaming
+    CAPTURE_THREADED: bool = True  # Decode on a background thread per camera
+    CAPTURE_BUFFER_SIZE: int = 2  # Decoded frames kept in the capture ring buffer
+
+    # Motion gate - skip inference while the scene is static
+    MOTION_GATE_ENABLED: bool = False
+    MOTION_GATE_WIDTH: int = 160  # Width of the downscaled comparison image
+    MOTION_GATE_PIXEL_THRESHOLD: int = 25  # Gray level change per pixel
+    MOTION_GATE_AREA_THRESHOLD: float = 0.004  # Changed fraction of the frame
+    MOTION_GATE_ROI_AREA_THRESHOLD: float = 0.001  # Changed fraction inside ROIs
+    MOTION_GATE_ROI_MARGIN: float = 0.05  # ROI masks grown by this fraction of width
+    MOTION_GATE_REFRESH_SECONDS: float = 2.0  # Run inference at least this often
+
+    # ROI-cropped inference - only run the detector around the camera's zones
+    ROI_CROP_MODE: str = "off"  # "off", "union" (one box around all zones) or "tiles"
+    ROI_CROP_PADDING: float = 0.05  # Padding around zones, fraction of frame width
+    ROI_CROP_MAX_TILES: int = 4  # Maximum crops per frame in "tiles" mode
+    ROI_CROP_MAX_COVERAGE: float = 0.8  # Fall back to the full frame above this coverage
+    ROI_RASTER_GRID: int = 256  # Cells per side of the ROI label raster (0 = exact polygon tests only)
+
+    # Background monitoring supervisor
+    MONITORING_ENABLED: bool = True  # Keep a pipeline running for every active camera
+    MONITORING_CHECK_INTERVAL: float = 5.0  # Seconds between supervisor health checks
+    MONITORING_STALL_SECONDS: float = 15.0  # Restart a pipeline with no frame for this long
+
+    # Offline analysis of recorded files (unpaced, batched inference)
+    ANALYSIS_FPS: float = 15.0  # Frames analysed per second of video (rule frame windows assume VIDEO_FPS)
+    ANALYSIS_BATCH_SIZE: int = 16  # Frames per detector call
+    ANALYSIS_WORKERS: int = 0  # Worker processes, one file each (0 = one per two CPU cores)
+    ANALYSIS_WORKER_THREADS: int = 0  # Inference threads per worker (0 = cpu_count / workers)
+    ANALYSIS_PROGRESS_INTERVAL: float = 1.0  # Seconds between progress updates per file
+    ANALYSIS_SAVE_DETECTIONS: bool = True  # Write per-frame detections to ANALYSIS_DIR
+
+    # Batched image detection endpoint (POST /api/detect/batch)
+    DETECT_BATCH_MAX_IMAGES: int = 256  # Images per request
+    DETECT_BATCH_MAX_BYTES: int = 20 * 1024 * 1024  # Maximum size of one image upload
+    DETECT_DECODE_THREADS: int = 4  # Threads decoding uploaded images
 
     # Rule engine - False positive prevention
     DETECTION_PERSISTENCE_SECONDS: float = 2.0  # Must persist for N seconds
@@ -72,3 +147,4 @@ settings = Settings()
 # Ensure directories exist
 settings.MODELS_DIR.mkdir(parents=True, exist_ok=True)
 settings.SNAPSHOTS_DIR.mkdir(parents=True, exist_ok=True)
+settings.ANALYSIS_DIR.mkdir(parents=True, exist_ok=True)
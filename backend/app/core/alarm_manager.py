@@ -41,7 +41,8 @@ class AlarmManager:
         self,
         event: SafetyEvent,
         frame: Optional[np.ndarray] = None,
-        db_session=None
+        db_session=None,
+        notify: bool = True
     ) -> Dict[str, Any]:
         """
         Process a safety event.
@@ -50,6 +51,8 @@ class AlarmManager:
             event: Safety event to process
             frame: Optional video frame for snapshot
             db_session: Optional database session for saving event
+            notify: Raise a live alarm (unacknowledged list, subscribers, queue).
+                False for events found in recorded video, which are only stored.
 
         Returns:
             Processed event data
@@ -72,19 +75,23 @@ class AlarmManager:
             "roi_id": event.roi_id,
             "snapshot_path": snapshot_path,
             "detection_data": event.detection_data,
+            "source_file": event.source_file,
             "is_acknowledged": False,
             "created_at": datetime.now(timezone.utc).isoformat(),
             "timestamp": event.timestamp
         }
 
-        # Track unacknowledged warning/critical events
-        if event.severity in [Severity.WARNING, Severity.CRITICAL]:
-            self._unacknowledged[event_id] = event
-
         # Save to database if session provided
         if db_session:
             await self._save_to_db(event_data, db_session)
 
+        if not notify:
+            return event_data
+
+        # Track unacknowledged warning/critical events
+        if event.severity in [Severity.WARNING, Severity.CRITICAL]:
+            self._unacknowledged[event_id] = event
+
         # Notify subscribers
         await self._notify_subscribers(event_data)
 
@@ -199,6 +206,7 @@ class AlarmManager:
                 snapshot_path=event_data.get("snapshot_path"),
                 roi_id=event_data.get("roi_id"),
                 detection_data=json.dumps(event_data.get("detection_data")) if event_data.get("detection_data") else None,
+                source_file=event_data.get("source_file"),
                 is_acknowledged=False
             )
             db_session.add(db_event)
@@ -1,44 +1,273 @@
 """
 Multi-backend detection module for object detection and tracking.
-Supports YOLO and RF-DETR with BoT-SORT tracking.
+Supports YOLO and RF-DETR. Detectors hold no tracking state; each camera
+passes its own tracker (see detector_session).
 """
+import asyncio
+import functools
 import logging
 import time
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Optional, Dict, Any, Union
 import numpy as np
-import torch
 from abc import ABC, abstractmethod
 
 from app.config import settings
-from app.schemas.detection import DetectionBox, DetectionResult
-from app.core.tracker import get_tracker
+from app.core.detections import COUNT_FIELDS, FrameDetections
+from app.core.preprocess import FramePreprocessor
+from app.core.roi_crop import Region
 
 logger = logging.getLogger(__name__)
 
-# Try to import RF-DETR
-try:
-    from rfdetr import RFDETRSmall, RFDETRMedium, RFDETRLarge, RFDETRXLarge
-    RF_DETR_AVAILABLE = True
-except ImportError:
-    RF_DETR_AVAILABLE = False
+# Shared executor for detect_async(); bounded so inference cannot starve other threads
+_inference_executor: Optional[ThreadPoolExecutor] = None
+
+def get_inference_executor() -> ThreadPoolExecutor:
+    """Get or create the executor used by BaseDetector.detect_async()."""
+    global _inference_executor
+    if _inference_executor is None:
+        _inference_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.INFERENCE_THREADS), thread_name_prefix="detect"
+        )
+    return _inference_executor
 
 # Base Detector Interface
 class BaseDetector(ABC):
+    # Concurrent detect_async() calls allowed on one model instance
+    max_concurrency: int = settings.INFERENCE_CONCURRENCY
+    # Set by backends that gave up for good (e.g. inference workers that keep crashing)
+    failure: Optional[str] = None
+
     @abstractmethod
     def load_model(self) -> bool:
         pass
 
     @abstractmethod
-    def detect(self, frame: np.ndarray, frame_number: int = 0, timestamp: float = 0.0) -> DetectionResult:
+    def detect(self, frame: np.ndarray, frame_number: int = 0, timestamp: float = 0.0, tracker=None) -> FrameDetections:
+        pass
+
+    @abstractmethod
+    def predict(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Run the model on a single frame without tracking.
+
+        Returns:
+            numpy array of [x1, y1, x2, y2, conf, cls]
+        """
         pass
 
+    def predict_batch(self, frames: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Run the model on several frames at once.
+
+        Backends that support batched inference override this; the default
+        simply predicts frame by frame.
+
+        Returns:
+            One [x1, y1, x2, y2, conf, cls] array per frame
+        """
+        return [self.predict(frame) for frame in frames]
+
+    def predict_prepared(
+        self,
+        frame: np.ndarray,
+        regions: Optional[List[Region]] = None,
+        preprocessor: Optional[FramePreprocessor] = None
+    ) -> np.ndarray:
+        """
+        Run the model through a preprocessing stage (ROI crops, downscaling).
+
+        Args:
+            frame: BGR frame
+            regions: Optional pixel regions (x1, y1, x2, y2) to run on
+            preprocessor: Camera preprocessing stage (default: source resolution)
+
+        Returns:
+            numpy array of [x1, y1, x2, y2, conf, cls] in source-frame pixels
+        """
+        preprocessor = preprocessor or FramePreprocessor()
+        images, regions, scales = preprocessor.prepare(frame, regions)
+        return preprocessor.restore(self.predict_batch(images), regions, scales)
+
+    def predict_frames(
+        self,
+        frames: List[np.ndarray],
+        preprocessor: Optional[FramePreprocessor] = None
+    ) -> List[np.ndarray]:
+        """
+        Run the model on several full frames in one predict_batch() call.
+
+        Args:
+            frames: BGR frames (sizes may differ)
+            preprocessor: Optional preprocessing stage (inference resolution)
+
+        Returns:
+            One [x1, y1, x2, y2, conf, cls] array per frame, in source-frame pixels
+        """
+        if preprocessor is None:
+            return self.predict_batch(frames)
+
+        images, plans = [], []
+        for frame in frames:
+            # Distinct buffer slots: every input must survive until the batch runs
+            frame_images, regions, scales = preprocessor.prepare(frame, slot=len(images))
+            plans.append((len(frame_images), regions, scales))
+            images.extend(frame_images)
+        outputs = self.predict_batch(images)
+
+        raw_outputs, offset = [], 0
+        for count, regions, scales in plans:
+            raw_outputs.append(preprocessor.restore(outputs[offset:offset + count], regions, scales))
+            offset += count
+        return raw_outputs
+
+    def detect_prepared(
+        self,
+        frame: np.ndarray,
+        frame_number: int = 0,
+        timestamp: float = 0.0,
+        tracker=None,
+        regions: Optional[List[Region]] = None,
+        preprocessor: Optional[FramePreprocessor] = None
+    ) -> FrameDetections:
+        """detect() through a preprocessing stage; tracking still sees the source frame."""
+        raw = self.predict_prepared(frame, regions, preprocessor)
+        return self.build_result(raw, frame, frame_number, timestamp, tracker)
+
     @property
     @abstractmethod
     def is_loaded(self) -> bool:
         pass
 
+    async def detect_async(
+        self,
+        frame: np.ndarray,
+        frame_number: int = 0,
+        timestamp: float = 0.0,
+        tracker=None,
+        regions: Optional[List[Region]] = None,
+        preprocessor: Optional[FramePreprocessor] = None
+    ) -> FrameDetections:
+        """
+        Run detect() on the shared inference executor without blocking the event loop.
+
+        At most ``max_concurrency`` calls run on this model at once; further
+        calls wait on the event loop rather than occupying executor threads.
+
+        Args:
+            frame: BGR frame
+            frame_number: Frame number
+            timestamp: Frame timestamp in seconds
+            tracker: Tracker for the camera the frame came from
+            regions: Only run the model on these pixel regions (see detect_prepared)
+            preprocessor: Camera preprocessing stage (see detect_prepared)
+
+        Returns:
+            FrameDetections
+        """
+        loop = asyncio.get_running_loop()
+        if regions or preprocessor:
+            call = functools.partial(
+                self.detect_prepared, frame, frame_number, timestamp, tracker, regions, preprocessor
+            )
+        else:
+            call = functools.partial(self.detect, frame, frame_number, timestamp, tracker)
+        async with self._concurrency_limit(loop):
+            return await loop.run_in_executor(get_inference_executor(), call)
+
+    def _concurrency_limit(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        """Per-model semaphore, recreated if the event loop changes."""
+        limit = getattr(self, "_async_limit", None)
+        if limit is None or limit[0] is not loop:
+            limit = (loop, asyncio.Semaphore(max(1, self.max_concurrency)))
+            self._async_limit = limit
+        return limit[1]
+
+    def _class_name(self, cls_id: int) -> str:
+        """Raw model class name for a class index."""
+        return settings.CLASS_NAMES[cls_id] if cls_id < len(settings.CLASS_NAMES) else f"obj_{cls_id}"
+
+    def _map_category(self, class_name: str, counts: Dict) -> tuple:
+        count_key = {
+            "person": "persons_count",
+            "helmet": "helmets_count",
+            "mask": "masks_count",
+            "fire_extinguisher": "fire_extinguishers_count",
+        }.get(class_name)
+        if count_key:
+            counts[count_key] += 1
+        return class_name, counts
+
+    def build_result(
+        self,
+        raw_detections: np.ndarray,
+        frame: np.ndarray,
+        frame_number: int = 0,
+        timestamp: float = 0.0,
+        tracker=None
+    ) -> FrameDetections:
+        """
+        Apply tracking to raw detections and build FrameDetections.
+
+        Args:
+            raw_detections: numpy array of [x1, y1, x2, y2, conf, cls]
+            frame: Frame the detections belong to (used for motion compensation)
+            frame_number: Frame number
+            timestamp: Frame timestamp in seconds
+            tracker: Tracker for the camera the frame came from
+
+        Returns:
+            FrameDetections
+        """
+        if raw_detections is None or len(raw_detections) == 0:
+            return self.result_from_tracks([], frame_number, timestamp)
+
+        # Apply BoT-SORT tracking
+        tracked_objects = []
+        if tracker:
+            tracked_objects = tracker.update(raw_detections, frame)
+
+        # If tracking failed or returned empty, use raw detections with no track_id
+        if len(tracked_objects) == 0:
+            raw = np.asarray(raw_detections, dtype=np.float64)
+            rows = np.column_stack([raw[:, :4], np.full(len(raw), np.nan), raw[:, 4:6]])
+        else:
+            rows = tracked_objects
+
+        return self.result_from_tracks(rows, frame_number, timestamp)
+
+    def result_from_tracks(self, tracks, frame_number: int = 0, timestamp: float = 0.0) -> FrameDetections:
+        """
+        Build FrameDetections from tracker output.
+
+        Args:
+            tracks: Rows of [x1, y1, x2, y2, track_id, conf, cls] (track_id may be None or NaN)
+            frame_number: Frame number
+            timestamp: Frame timestamp in seconds
+
+        Returns:
+            FrameDetections
+        """
+        if len(tracks) == 0:
+            return FrameDetections.empty(frame_number, timestamp)
+
+        rows = tracks
+        if not isinstance(rows, np.ndarray) or rows.dtype == object:
+            rows = [[np.nan if v is None else v for v in row[:7]] for row in tracks]
+        rows = np.asarray(rows, dtype=np.float64)[:, :7]
+
+        # Map each distinct class id once rather than once per box
+        class_ids = rows[:, 6].astype(np.int64)
+        categories = {
+            cls_id: self._map_category(self._class_name(cls_id), dict.fromkeys(COUNT_FIELDS.values(), 0))[0]
+            for cls_id in np.unique(class_ids).tolist()
+        }
+        names = [categories[cls_id] for cls_id in class_ids.tolist()]
+        return FrameDetections.from_rows(rows, names, frame_number, timestamp)
+
 # YOLO Detector Implementation
 class YOLODetector(BaseDetector):
     def __init__(self, model_path: Optional[str] = None):
@@ -63,36 +292,39 @@ class YOLODetector(BaseDetector):
             logger.error(f"Failed to load YOLO model: {e}")
             return False
 
-    def detect(self, frame: np.ndarray, frame_number: int = 0, timestamp: float = 0.0) -> DetectionResult:
+    def predict(self, frame: np.ndarray) -> np.ndarray:
+        return self.predict_batch([frame])[0]
+
+    def predict_batch(self, frames: List[np.ndarray]) -> List[np.ndarray]:
         if not self._is_loaded:
             self.load_model()
-        
-        detections: List[DetectionBox] = []
-        counts = {"persons_count": 0, "helmets_count": 0, "masks_count": 0, "fire_extinguishers_count": 0}
-        
+
+        outputs = [np.empty((0, 6)) for _ in frames]
         try:
-            results = self.model.track(frame, conf=0.5, iou=self.iou_threshold, verbose=False, persist=True)
-            for result in results:
-                if result.boxes is None: continue
-                for box in result.boxes:
-                    cls_id = int(box.cls[0])
-                    conf = float(box.conf[0])
-                    xyxy = box.xyxy[0].cpu().numpy()
-                    track_id = int(box.id[0]) if box.id is not None else None
-                    
-                    class_name = result.names[cls_id] if hasattr(result, 'names') else str(cls_id)
-                    category, counts = self._map_category(class_name, counts)
-                    
-                    detections.append(DetectionBox(
-                        class_id=cls_id, class_name=category, confidence=conf,
-                        x1=float(xyxy[0]), y1=float(xyxy[1]), x2=float(xyxy[2]), y2=float(xyxy[3]),
-                        center_x=float((xyxy[0]+xyxy[2])/2), center_y=float((xyxy[1]+xyxy[3])/2),
-                        track_id=track_id
-                    ))
+            results = self.model.predict(frames, conf=self.confidence_threshold, iou=self.iou_threshold, verbose=False)
+            for i, result in enumerate(results):
+                if result.boxes is None or len(result.boxes) == 0:
+                    continue
+                boxes = result.boxes
+                outputs[i] = np.column_stack([
+                    boxes.xyxy.cpu().numpy(),
+                    boxes.conf.cpu().numpy(),
+                    boxes.cls.cpu().numpy()
+                ])
         except Exception as e:
             logger.error(f"YOLO Detection error: {e}")
+        return outputs
+
+    def _class_name(self, cls_id: int) -> str:
+        names = getattr(self.model, "names", None) or {}
+        return names.get(cls_id, str(cls_id)) if isinstance(names, dict) else str(cls_id)
+
+    def detect(self, frame: np.ndarray, frame_number: int = 0, timestamp: float = 0.0, tracker=None) -> FrameDetections:
+        if not self._is_loaded:
+            self.load_model()
 
-        return DetectionResult(frame_number=frame_number, timestamp=timestamp, detections=detections, **counts)
+        # Tracking state lives in the caller's DetectorSession, never in the shared model
+        return self.build_result(self.predict(frame), frame, frame_number, timestamp, tracker)
 
     def _map_category(self, class_name: str, counts: Dict) -> tuple:
         class_name_lower = class_name.lower().strip()
@@ -114,25 +346,19 @@ class YOLODetector(BaseDetector):
     def is_loaded(self) -> bool:
         return self._is_loaded
 
-# RF-DETR Detector Implementation with BoT-SORT
+# RF-DETR Detector Implementation
 class RFDETRDetector(BaseDetector):
     def __init__(self, model_path: Optional[str] = None):
         self.model_path = model_path or settings.RFDETR_MODEL_PATH
         self.model = None
         self._is_loaded = False
-        self.tracker = None
-        self._setup_tracker()
-
-    def _setup_tracker(self):
-        """Initialize BoT-SORT tracker."""
-        try:
-            self.tracker = get_tracker("bot_sort", frame_rate=settings.VIDEO_FPS)
-            logger.info("BoT-SORT tracker integrated with RF-DETR")
-        except Exception as e:
-            logger.warning(f"Failed to load BoT-SORT: {e}")
 
     def load_model(self) -> bool:
-        if not RF_DETR_AVAILABLE:
+        try:
+            # torch and rfdetr are only imported once an RF-DETR model is needed
+            import torch
+            from rfdetr import RFDETRMedium
+        except ImportError:
             logger.error("RF-DETR not installed")
             return False
         try:
@@ -187,69 +413,44 @@ class RFDETRDetector(BaseDetector):
             logger.error(f"Failed to load RF-DETR model: {e}")
             return False
 
-    def detect(self, frame: np.ndarray, frame_number: int = 0, timestamp: float = 0.0) -> DetectionResult:
+    def predict(self, frame: np.ndarray) -> np.ndarray:
+        return self.predict_batch([frame])[0]
+
+    def predict_batch(self, frames: List[np.ndarray]) -> List[np.ndarray]:
+        outputs = [np.empty((0, 6)) for _ in frames]
         if not self._is_loaded:
             if not self.load_model():
-                return DetectionResult(frame_number=frame_number, timestamp=timestamp, detections=[])
-
-        detections: List[DetectionBox] = []
-        counts = {"persons_count": 0, "helmets_count": 0, "masks_count": 0, "fire_extinguishers_count": 0}
+                return outputs
 
         try:
-            # results typically returns sv.Detections or a list of them
-            results = self.model.predict(frame, threshold=settings.RFDETR_CONFIDENCE_THRESHOLD)
-            
-            # Ensure we have a single sv.Detections object
-            if isinstance(results, list):
-                results = results[0] if len(results) > 0 else None
-            
-            if results is None or len(results) == 0:
-                return DetectionResult(frame_number=frame_number, timestamp=timestamp, detections=[], **counts)
-
-            # Convert sv.Detections to [x1, y1, x2, y2, score, cls] format for tracker
-            raw_detections = np.column_stack([
-                results.xyxy,
-                results.confidence,
-                results.class_id
-            ])
-
-            # Apply BoT-SORT tracking
-            tracked_objects = []
-            if self.tracker:
-                tracked_objects = self.tracker.update(raw_detections, frame)
-            
-            # Map tracked objects back to DetectionBox
-            # If tracking failed or returned empty, use raw detections with no track_id
-            if len(tracked_objects) == 0:
-                for i in range(len(raw_detections)):
-                    x1, y1, x2, y2, conf, cls_id = raw_detections[i]
-                    cls_id = int(cls_id)
-                    class_name = settings.CLASS_NAMES[cls_id] if cls_id < len(settings.CLASS_NAMES) else f"obj_{cls_id}"
-                    category, counts = self._map_category(class_name, counts)
-                    detections.append(DetectionBox(
-                        class_id=cls_id, class_name=category, confidence=float(conf),
-                        x1=float(x1), y1=float(y1), x2=float(x2), y2=float(y2),
-                        center_x=float((x1+x2)/2), center_y=float((y1+y2)/2),
-                        track_id=None
-                    ))
-            else:
-                for obj in tracked_objects:
-                    # Output format: [x1, y1, x2, y2, id, conf, cls]
-                    x1, y1, x2, y2, tid, conf, cls_id = obj
-                    cls_id = int(cls_id)
-                    class_name = settings.CLASS_NAMES[cls_id] if cls_id < len(settings.CLASS_NAMES) else f"obj_{cls_id}"
-                    category, counts = self._map_category(class_name, counts)
-                    detections.append(DetectionBox(
-                        class_id=cls_id, class_name=category, confidence=float(conf),
-                        x1=float(x1), y1=float(y1), x2=float(x2), y2=float(y2),
-                        center_x=float((x1+x2)/2), center_y=float((y1+y2)/2),
-                        track_id=int(tid)
-                    ))
+            # results is a sv.Detections for a single image or a list of them
+            results = self.model.predict(frames if len(frames) > 1 else frames[0], threshold=settings.RFDETR_CONFIDENCE_THRESHOLD)
+            if not isinstance(results, list):
+                results = [results]
 
+            for i, result in enumerate(results):
+                if result is None or len(result) == 0:
+                    continue
+                # Convert sv.Detections to [x1, y1, x2, y2, score, cls] format for tracker
+                outputs[i] = np.column_stack([
+                    result.xyxy,
+                    result.confidence,
+                    result.class_id
+                ])
         except Exception as e:
             logger.error(f"RF-DETR Detection error: {e}")
+        return outputs
 
-        return DetectionResult(frame_number=frame_number, timestamp=timestamp, detections=detections, **counts)
+    def detect(self, frame: np.ndarray, frame_number: int = 0, timestamp: float = 0.0, tracker=None) -> FrameDetections:
+        if not self._is_loaded:
+            if not self.load_model():
+                return FrameDetections.empty(frame_number, timestamp)
+
+        try:
+            return self.build_result(self.predict(frame), frame, frame_number, timestamp, tracker)
+        except Exception as e:
+            logger.error(f"RF-DETR Detection error: {e}")
+            return FrameDetections.empty(frame_number, timestamp)
 
     def _map_category(self, class_name: str, counts: Dict) -> tuple:
         # standard mapping for 11 classes
@@ -283,18 +484,191 @@ class RFDETRDetector(BaseDetector):
     def is_loaded(self) -> bool:
         return self._is_loaded
 
-# Factory function
+# Factory functions
+def resolve_model_path(model_path: str) -> str:
+    """
+    Check that a requested model file lies inside MODELS_DIR.
+
+    Model files are unpickled when loaded, so paths from API requests must
+    not reach files outside the models directory.
+
+    Args:
+        model_path: Model file relative to BASE_DIR (e.g. "models/best.pt")
+
+    Returns:
+        The normalized path, relative to BASE_DIR when MODELS_DIR is inside it
+
+    Raises:
+        ValueError: If the path is absolute or resolves outside MODELS_DIR
+    """
+    if Path(model_path).is_absolute():
+        raise ValueError(f"Model path must be relative to the backend directory: {model_path}")
+    resolved = (settings.BASE_DIR / model_path).resolve()
+    models_dir = settings.MODELS_DIR.resolve()
+    if resolved == models_dir or models_dir not in resolved.parents:
+        raise ValueError(f"Model path must be inside {settings.MODELS_DIR}: {model_path}")
+    try:
+        return str(resolved.relative_to(settings.BASE_DIR.resolve()))
+    except ValueError:
+        return str(resolved)
+
+def create_detector(
+    detector_type: Optional[str] = None,
+    quantization: Optional[str] = None,
+    model_path: Optional[str] = None
+) -> BaseDetector:
+    """
+    Create a new in-process detector of the given type.
+
+    Args:
+        detector_type: "yolo", "rfdetr" or "onnx" (default: settings.DETECTOR_TYPE)
+        quantization: "none", "dynamic" or "static" (default: settings.DETECTOR_QUANTIZATION)
+        model_path: Model file relative to BASE_DIR (default: the backend's setting;
+            quantized models are always built from the configured checkpoint)
+
+    Raises:
+        ValueError: If model_path is outside MODELS_DIR
+    """
+    if model_path is not None:
+        model_path = resolve_model_path(model_path)
+    detector_type = detector_type or settings.DETECTOR_TYPE
+    quantization = quantization or settings.DETECTOR_QUANTIZATION
+    if quantization != "none":
+        from app.core.quantization import create_quantized_detector
+        return create_quantized_detector(detector_type, quantization)
+    if detector_type == "rfdetr":
+        return RFDETRDetector(model_path)
+    if detector_type == "onnx":
+        from app.core.onnx_detector import ONNXDetector
+        return ONNXDetector(model_path)
+    return YOLODetector(model_path)
+
+def build_detector(
+    detector_type: Optional[str] = None,
+    quantization: Optional[str] = None,
+    model_path: Optional[str] = None
+) -> BaseDetector:
+    """Create a detector as get_detector() would: in worker processes when INFERENCE_WORKERS > 0."""
+    if settings.INFERENCE_WORKERS > 0:
+        # Run the configured backend in worker processes
+        from app.core.inference_server import ProcessPoolDetector
+        return ProcessPoolDetector(detector_type, quantization=quantization, model_path=model_path)
+    return create_detector(detector_type, quantization, model_path)
+
 # Global cache for detector instance
 _detector_instance: Optional[BaseDetector] = None
 
 def get_detector() -> BaseDetector:
     global _detector_instance
-    if _detector_instance is not None:
-        return _detector_instance
-
-    if settings.DETECTOR_TYPE == "rfdetr":
-        _detector_instance = RFDETRDetector()
-    else:
-        _detector_instance = YOLODetector()
-    
+    if _detector_instance is None:
+        _detector_instance = build_detector()
     return _detector_instance
+
+def set_detector(detector: BaseDetector) -> Optional[BaseDetector]:
+    """
+    Replace the global detector (see model_registry for draining the old one).
+
+    Returns:
+        The previous detector, if one was created
+    """
+    global _detector_instance
+    previous, _detector_instance = _detector_instance, detector
+    return previous
+
+# Serializes model loading so startup preload and the first camera never load twice
+_load_lock = threading.Lock()
+
+# Startup readiness reported on /health: cold -> loading -> warming -> ready (or failed)
+_readiness: Dict[str, Any] = {"state": "cold", "error": None, "load_ms": None, "warmup_ms": None}
+
+def load_detector(detector: Optional[BaseDetector] = None) -> bool:
+    """
+    Load a detector's model once, even when called from several threads.
+
+    Blocking; call it off the event loop.
+
+    Args:
+        detector: Detector to load (default: get_detector())
+
+    Returns:
+        True if the model is loaded
+    """
+    detector = detector or get_detector()
+    with _load_lock:
+        if detector.is_loaded:
+            return True
+        return detector.load_model()
+
+def preload_detector(
+    warmup_runs: int = settings.DETECTOR_WARMUP_RUNS,
+    frame_size: tuple = (settings.DETECTOR_WARMUP_WIDTH, settings.DETECTOR_WARMUP_HEIGHT)
+) -> bool:
+    """
+    Load the global detector and run warm-up inferences on a synthetic frame.
+
+    The first inferences pay for lazy allocations, kernel selection and
+    graph optimization; doing them here keeps that off the first camera.
+    Blocking; call it off the event loop.
+
+    Args:
+        warmup_runs: Number of warm-up inferences
+        frame_size: (width, height) of the synthetic frame
+
+    Returns:
+        True if the detector is ready
+    """
+    _readiness.update(state="loading", error=None)
+    try:
+        start = time.perf_counter()
+        detector = get_detector()
+        if not load_detector(detector):
+            raise RuntimeError("model failed to load")
+        _readiness["load_ms"] = (time.perf_counter() - start) * 1000.0
+
+        _readiness["state"] = "warming"
+        _readiness["warmup_ms"] = warm_up(detector, warmup_runs, frame_size)
+
+        _readiness["state"] = "ready"
+        logger.info(
+            f"Detector ready (load {_readiness['load_ms']:.0f} ms, "
+            f"{warmup_runs} warm-up runs {_readiness['warmup_ms']:.0f} ms)"
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Detector preload failed: {e}")
+        _readiness.update(state="failed", error=str(e))
+        return False
+
+def warm_up(
+    detector: BaseDetector,
+    runs: int = settings.DETECTOR_WARMUP_RUNS,
+    frame_size: tuple = (settings.DETECTOR_WARMUP_WIDTH, settings.DETECTOR_WARMUP_HEIGHT)
+) -> float:
+    """
+    Run inferences on a synthetic frame of the given (width, height).
+
+    Returns:
+        Total warm-up time in milliseconds
+    """
+    width, height = frame_size
+    frame = np.full((height, width, 3), 114, dtype=np.uint8)
+    start = time.perf_counter()
+    for i in range(runs):
+        # No tracker: warm-up frames never reach a camera's tracks
+        detector.detect(frame, frame_number=i)
+    return (time.perf_counter() - start) * 1000.0
+
+def get_detector_readiness() -> Dict[str, Any]:
+    """Get the startup preload state, or "failed" if the detector gave up since."""
+    readiness = dict(_readiness)
+    failure = _detector_instance.failure if _detector_instance is not None else None
+    if failure:
+        readiness.update(state="failed", error=failure)
+    return readiness
+
+def shutdown_detector():
+    """Release the global detector (stops inference worker processes, if any)."""
+    global _detector_instance
+    if _detector_instance is not None and hasattr(_detector_instance, "shutdown"):
+        _detector_instance.shutdown()
+    _detector_instance = None
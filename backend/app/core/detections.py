@@ -0,0 +1,204 @@
+"""
+Columnar per-frame detection container.
+
+Detectors return one FrameDetections per frame: numpy columns for boxes,
+confidences, class ids and track ids instead of one pydantic model per box.
+The rule engine filters it with array masks and the stream serializes it
+straight to the DetectionResult JSON layout; pydantic models are only built
+at the API boundary (to_schema()).
+"""
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from app.schemas.detection import DetectionResult
+
+# Category -> DetectionResult count field
+COUNT_FIELDS = {
+    "person": "persons_count",
+    "helmet": "helmets_count",
+    "mask": "masks_count",
+    "fire_extinguisher": "fire_extinguishers_count",
+}
+
+# track_id column value for untracked boxes
+NO_TRACK = -1
+
+
+class Box(NamedTuple):
+    """Read-only view of one detection with the DetectionBox field names."""
+    class_id: int
+    class_name: str
+    confidence: float
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+    center_x: float
+    center_y: float
+    track_id: Optional[int]
+
+
+class FrameDetections:
+    """Detections for a single frame, stored as columns."""
+
+    __slots__ = (
+        "frame_number", "timestamp", "xyxy", "confidence",
+        "class_id", "class_name", "track_id", "_boxes"
+    )
+
+    def __init__(
+        self,
+        frame_number: int,
+        timestamp: float,
+        xyxy: np.ndarray,
+        confidence: np.ndarray,
+        class_id: np.ndarray,
+        class_name: np.ndarray,
+        track_id: np.ndarray
+    ):
+        """
+        Initialize from columns of equal length.
+
+        Args:
+            frame_number: Frame number
+            timestamp: Frame timestamp in seconds
+            xyxy: (N, 4) float boxes in frame pixels
+            confidence: (N,) float scores
+            class_id: (N,) int model class ids
+            class_name: (N,) object array of category names
+            track_id: (N,) int track ids, NO_TRACK when untracked
+        """
+        self.frame_number = frame_number
+        self.timestamp = timestamp
+        self.xyxy = xyxy
+        self.confidence = confidence
+        self.class_id = class_id
+        self.class_name = class_name
+        self.track_id = track_id
+        self._boxes: Optional[List[Box]] = None
+
+    @classmethod
+    def empty(cls, frame_number: int = 0, timestamp: float = 0.0) -> "FrameDetections":
+        return cls(
+            frame_number, timestamp,
+            np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32),
+            np.empty(0, dtype=np.int32), np.empty(0, dtype=object), np.empty(0, dtype=np.int64)
+        )
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: np.ndarray,
+        class_names: Sequence[str],
+        frame_number: int = 0,
+        timestamp: float = 0.0
+    ) -> "FrameDetections":
+        """
+        Build from tracker-layout rows.
+
+        Args:
+            rows: (N, 7) array of [x1, y1, x2, y2, track_id, conf, cls]; track_id NaN when untracked
+            class_names: Category name per row
+            frame_number: Frame number
+            timestamp: Frame timestamp in seconds
+
+        Returns:
+            FrameDetections
+        """
+        if len(rows) == 0:
+            return cls.empty(frame_number, timestamp)
+        rows = np.asarray(rows, dtype=np.float64)
+        track_id = np.where(np.isnan(rows[:, 4]), NO_TRACK, rows[:, 4]).astype(np.int64)
+        names = np.empty(len(rows), dtype=object)
+        names[:] = list(class_names)
+        return cls(
+            frame_number, timestamp,
+            rows[:, :4].astype(np.float32), rows[:, 5].astype(np.float32),
+            rows[:, 6].astype(np.int32), names, track_id
+        )
+
+    @classmethod
+    def from_result(cls, result: DetectionResult) -> "FrameDetections":
+        """Convert a pydantic DetectionResult (e.g. from an API request)."""
+        rows = np.array([
+            [d.x1, d.y1, d.x2, d.y2, np.nan if d.track_id is None else d.track_id, d.confidence, d.class_id]
+            for d in result.detections
+        ], dtype=np.float64).reshape(-1, 7)
+        return cls.from_rows(rows, [d.class_name for d in result.detections], result.frame_number, result.timestamp)
+
+    def __len__(self) -> int:
+        return len(self.confidence)
+
+    def _select(self, mask: np.ndarray) -> "FrameDetections":
+        return FrameDetections(
+            self.frame_number, self.timestamp, self.xyxy[mask], self.confidence[mask],
+            self.class_id[mask], self.class_name[mask], self.track_id[mask]
+        )
+
+    def of_class(self, name: str) -> "FrameDetections":
+        """Detections of one category."""
+        return self._select(self.class_name == name)
+
+    def with_frame(self, frame_number: int, timestamp: float) -> "FrameDetections":
+        """Same detections (shared columns) stamped with another frame."""
+        return FrameDetections(
+            frame_number, timestamp, self.xyxy, self.confidence,
+            self.class_id, self.class_name, self.track_id
+        )
+
+    def count(self, name: str) -> int:
+        return int(np.count_nonzero(self.class_name == name))
+
+    @property
+    def persons_count(self) -> int:
+        return self.count("person")
+
+    @property
+    def helmets_count(self) -> int:
+        return self.count("helmet")
+
+    @property
+    def masks_count(self) -> int:
+        return self.count("mask")
+
+    @property
+    def fire_extinguishers_count(self) -> int:
+        return self.count("fire_extinguisher")
+
+    @property
+    def centers(self) -> np.ndarray:
+        """(N, 2) box centers."""
+        return (self.xyxy[:, :2] + self.xyxy[:, 2:]) / 2
+
+    def boxes(self) -> List[Box]:
+        """Row view, built once on first use."""
+        if self._boxes is None:
+            self._boxes = [
+                Box(cls_id, name, conf, x1, y1, x2, y2, (x1 + x2) / 2, (y1 + y2) / 2,
+                    None if tid == NO_TRACK else tid)
+                for (x1, y1, x2, y2), conf, cls_id, name, tid in zip(
+                    self.xyxy.tolist(), self.confidence.tolist(), self.class_id.tolist(),
+                    self.class_name.tolist(), self.track_id.tolist()
+                )
+            ]
+        return self._boxes
+
+    @property
+    def detections(self) -> List[Box]:
+        """DetectionResult-compatible alias for boxes()."""
+        return self.boxes()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize with the DetectionResult.model_dump() layout."""
+        counts = {field: self.count(name) for name, field in COUNT_FIELDS.items()}
+        return {
+            "frame_number": self.frame_number,
+            "timestamp": self.timestamp,
+            "detections": [box._asdict() for box in self.boxes()],
+            **counts
+        }
+
+    def to_schema(self) -> DetectionResult:
+        """Pydantic model for API responses."""
+        return DetectionResult(**self.to_dict())
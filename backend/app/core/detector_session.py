@@ -0,0 +1,224 @@
+"""
+Per-camera detector sessions.
+
+All cameras share one detector (model weights are loaded once), but each
+camera gets its own session holding a private tracker tuned to that camera's
+detection rate. Track IDs therefore never mix between cameras, and sessions
+have no shared mutable state, so inference for different cameras can run
+concurrently up to the detector's max_concurrency.
+"""
+import asyncio
+import logging
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.core.detection import BaseDetector, get_detector, load_detector
+from app.core.detections import FrameDetections
+from app.core.inference_scheduler import get_inference_scheduler
+from app.core.model_registry import get_model_registry
+from app.core.preprocess import FramePreprocessor
+from app.core.roi_crop import Region
+from app.core.tracker import get_tracker
+
+logger = logging.getLogger(__name__)
+
+
+class DetectorSession:
+    """One camera's handle on the shared detector."""
+
+    def __init__(
+        self,
+        camera_id: int,
+        detector: Optional[BaseDetector] = None,
+        frame_rate: float = settings.VIDEO_FPS,
+        tracker_method: str = settings.TRACKER_METHOD,
+        gmc_method: Optional[str] = None
+    ):
+        """
+        Initialize session.
+
+        Args:
+            camera_id: Camera ID the session belongs to
+            detector: Detector to use instead of the global one (never batched
+                across cameras, since the batch scheduler runs the global detector).
+                Without it every call runs on the registry's active model, so
+                model swaps take effect on the next frame.
+            frame_rate: Rate at which the tracker sees detector frames
+            tracker_method: Tracker type for get_tracker()
+            gmc_method: Camera motion compensation (default: settings.TRACKER_GMC_METHOD)
+        """
+        self.camera_id = camera_id
+        self._detector = detector
+        self.batching = settings.INFERENCE_BATCHING and detector is None
+        self.frame_rate = max(1, int(round(frame_rate)))
+        self.tracker_method = tracker_method
+        self.gmc_method = gmc_method or settings.TRACKER_GMC_METHOD
+        self.tracker = self._create_tracker()
+
+        # Statistics
+        self.frames = 0
+        self.total_ms = 0.0
+        self.last_ms = 0.0
+
+    @property
+    def detector(self) -> BaseDetector:
+        return self._detector or get_detector()
+
+    def _use_detector(self):
+        """Pin the detector for one inference (the registry tracks in-flight calls)."""
+        if self._detector is not None:
+            return nullcontext(self._detector)
+        return get_model_registry().use()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.detector.is_loaded
+
+    async def load(self) -> bool:
+        """Load the shared model if needed, off the event loop."""
+        if not self.detector.is_loaded:
+            # Model loading can take seconds; keep the event loop responsive.
+            # Waits for the startup preload instead of loading a second time.
+            return await asyncio.to_thread(load_detector, self.detector)
+        return True
+
+    def reset(self):
+        """Drop all tracks, e.g. after a seek or source change."""
+        self.tracker = self._create_tracker()
+
+    def _create_tracker(self):
+        return get_tracker(self.tracker_method, frame_rate=self.frame_rate, gmc_method=self.gmc_method)
+
+    def _record(self, start: float, frames: int = 1):
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        self.last_ms = elapsed_ms / frames
+        self.total_ms += elapsed_ms
+        self.frames += frames
+
+    def detect(
+        self,
+        frame: np.ndarray,
+        frame_number: int = 0,
+        timestamp: float = 0.0,
+        regions: Optional[List[Region]] = None,
+        preprocessor: Optional[FramePreprocessor] = None
+    ) -> FrameDetections:
+        """
+        Run detection and this camera's tracker on a frame (blocking).
+
+        Args:
+            frame: Raw BGR frame
+            frame_number: Frame number
+            timestamp: Frame timestamp in seconds
+            regions: Only run the model on these pixel regions (ROI crop)
+            preprocessor: Optional per-camera preprocessing stage
+
+        Returns:
+            FrameDetections
+        """
+        start = time.perf_counter()
+        with self._use_detector() as detector:
+            result = detector.detect_prepared(frame, frame_number, timestamp, self.tracker, regions, preprocessor)
+        self._record(start)
+        return result
+
+    async def detect_async(
+        self,
+        frame: np.ndarray,
+        frame_number: int = 0,
+        timestamp: float = 0.0,
+        regions: Optional[List[Region]] = None,
+        preprocessor: Optional[FramePreprocessor] = None
+    ) -> FrameDetections:
+        """
+        Run detection without blocking the event loop.
+
+        Uses the cross-camera batch scheduler when batching is on.
+        Callers must not overlap calls on one session, so tracker updates stay ordered.
+
+        Returns:
+            FrameDetections
+        """
+        start = time.perf_counter()
+        if self.batching:
+            # Batched together with frames from other cameras
+            result = await get_inference_scheduler().submit(
+                frame, frame_number=frame_number, timestamp=timestamp, tracker=self.tracker,
+                regions=regions, preprocessor=preprocessor
+            )
+        else:
+            with self._use_detector() as detector:
+                result = await detector.detect_async(
+                    frame, frame_number=frame_number, timestamp=timestamp, tracker=self.tracker,
+                    regions=regions, preprocessor=preprocessor
+                )
+        self._record(start)
+        return result
+
+    def detect_batch(
+        self,
+        frames: List[np.ndarray],
+        frame_numbers: List[int],
+        timestamps: List[float],
+        preprocessor: Optional[FramePreprocessor] = None
+    ) -> List[FrameDetections]:
+        """
+        Run consecutive frames of this camera through one batched prediction (blocking).
+
+        The frames then go through the tracker one by one, so they must be in
+        playback order. Used for offline analysis, where frames are not paced.
+
+        Args:
+            frames: Raw BGR frames
+            frame_numbers: Frame number of each frame
+            timestamps: Timestamp of each frame in seconds
+            preprocessor: Optional preprocessing stage (inference resolution)
+
+        Returns:
+            FrameDetections per frame
+        """
+        if not frames:
+            return []
+        start = time.perf_counter()
+        with self._use_detector() as detector:
+            if not detector.is_loaded:
+                load_detector(detector)
+            raw_outputs = detector.predict_frames(frames, preprocessor)
+            results = [
+                detector.build_result(raw, frame, frame_number, timestamp, self.tracker)
+                for raw, frame, frame_number, timestamp in zip(raw_outputs, frames, frame_numbers, timestamps)
+            ]
+        self._record(start, len(frames))
+        return results
+
+    def predict(self, progress: float, frame_number: int, timestamp: float) -> Optional[FrameDetections]:
+        """
+        Tracker-predicted detections for a frame between detector runs.
+
+        Args:
+            progress: Fraction of one detector interval elapsed since the last run
+            frame_number: Frame number
+            timestamp: Frame timestamp in seconds
+
+        Returns:
+            FrameDetections, or None if nothing is tracked
+        """
+        tracks = self.tracker.predict(progress) if self.tracker is not None else []
+        if len(tracks) == 0:
+            return None
+        return self.detector.result_from_tracks(tracks, frame_number, timestamp)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get session statistics."""
+        return {
+            "tracker": self.tracker_method,
+            "tracker_fps": self.frame_rate,
+            "frames": self.frames,
+            "avg_ms": self.total_ms / self.frames if self.frames else 0.0,
+            "last_ms": self.last_ms,
+            "tracking": self.tracker.get_stats() if hasattr(self.tracker, "get_stats") else None
+        }
@@ -0,0 +1,319 @@
+"""
+Unpaced analysis of one recorded video file.
+
+Used by the offline analysis service, usually inside a worker process of its
+process pool. Each worker builds its own detector once and gives every file
+a fresh DetectorSession (private tracker), so files never share track state.
+Frames are decoded as fast as possible at the analysis frame rate, run
+through the detector in batches and evaluated by a RuleEngine on video time.
+Decoding of the next batch overlaps inference of the current one.
+
+Progress and events are reported through a ``report(kind, file_id, data)``
+callback, in order: "started", "progress"..., "event"..., then "finished".
+"""
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.core.detection import BaseDetector, create_detector, load_detector
+from app.core.detections import FrameDetections
+from app.core.detector_session import DetectorSession
+from app.core.preprocess import FramePreprocessor
+from app.core.roi_manager import ROIManager
+from app.core.rule_engine import RuleEngine, SafetyEvent, Severity, create_rule_engine
+from app.core.scene_index import SceneIndex
+from app.core.video_processor import VideoProcessor
+from app.schemas.roi import Point
+
+logger = logging.getLogger(__name__)
+
+SampledFrame = Tuple[np.ndarray, int, float]  # (frame, frame_number, timestamp)
+Reporter = Callable[[str, int, Any], None]
+
+
+class FrameSampler:
+    """Reads a video file at a reduced frame rate, in order and without pacing."""
+
+    def __init__(self, source: str, target_fps: float):
+        """
+        Open a video file.
+
+        Args:
+            source: Video file path
+            target_fps: Frames per second of video to return (capped at the file's rate)
+
+        Raises:
+            ValueError: If the file cannot be opened
+        """
+        self.cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+        if not self.cap.isOpened():
+            raise ValueError(f"Failed to open video file: {source}")
+
+        self.original_fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.step = max(1, int(round(self.original_fps / target_fps)))
+        self.fps = self.original_fps / self.step
+        self.position = 0
+
+    @property
+    def duration_ms(self) -> float:
+        return self.total_frames / self.original_fps * 1000.0
+
+    @property
+    def expected_frames(self) -> int:
+        """Number of frames read_batch() will return over the whole file."""
+        return -(-self.total_frames // self.step)
+
+    def read_batch(self, size: int) -> List[SampledFrame]:
+        """
+        Read the next sampled frames.
+
+        Frames between samples are only grabbed, which skips their colour
+        conversion and copy.
+
+        Returns:
+            Up to ``size`` frames; an empty list at the end of the file
+        """
+        batch: List[SampledFrame] = []
+        while len(batch) < size:
+            if self.position % self.step:
+                ok = self.cap.grab()
+                frame = None
+            else:
+                ok, frame = self.cap.read()
+            if not ok:
+                break
+            if frame is not None:
+                batch.append((frame, self.position, self.position / self.original_fps))
+            self.position += 1
+        return batch
+
+    def close(self):
+        self.cap.release()
+
+
+@dataclass
+class FileTask:
+    """Everything a worker needs to analyse one file (picklable)."""
+    file_id: int
+    job_id: int
+    source: str
+    camera_id: int
+    rois: List[Dict[str, Any]] = field(default_factory=list)  # id, points, name, color, zone_type
+    target_fps: float = settings.ANALYSIS_FPS
+    inference_width: Optional[int] = None
+    gmc_method: Optional[str] = None
+
+
+class FileAnalyzer:
+    """Analyses one file: decode, batched detection, rules."""
+
+    def __init__(
+        self,
+        task: FileTask,
+        detector: BaseDetector,
+        report: Reporter,
+        is_cancelled: Optional[Callable[[], bool]] = None
+    ):
+        """
+        Initialize analyzer.
+
+        Args:
+            task: File to analyse
+            detector: Detector owned by this worker
+            report: Called with (kind, file_id, data) for progress and events
+            is_cancelled: Checked between batches; True stops the analysis
+        """
+        self.task = task
+        self.detector = detector
+        self.report = report
+        self.is_cancelled = is_cancelled or (lambda: False)
+        self.batch_size = max(1, settings.ANALYSIS_BATCH_SIZE)
+        self.preprocessor = FramePreprocessor(task.inference_width)
+        self.roi_manager = ROIManager()
+        self.rule_engine: RuleEngine = create_rule_engine(self.roi_manager)
+        for roi in task.rois:
+            self.roi_manager.add_roi(
+                roi["id"],
+                [Point(x=p["x"], y=p["y"]) for p in roi["points"]],
+                roi.get("name", ""),
+                roi.get("color", "#FF0000"),
+                zone_type=roi.get("zone_type", "warning")
+            )
+        self.roi_ids = [roi["id"] for roi in task.rois]
+
+        # Progress
+        self.frames_analyzed = 0
+        self.video_ms = 0.0
+        self.events_found = 0
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Analyse the whole file (blocking).
+
+        Returns:
+            Final state: frames_analyzed, video_ms, events_found, detections_path, state
+        """
+        task = self.task
+        if not self.detector.is_loaded and not load_detector(self.detector):
+            raise RuntimeError(f"Failed to load the {type(self.detector).__name__} model")
+        sampler = FrameSampler(task.source, task.target_fps)
+        # The tracker sees every sampled frame, so it runs at the sampled rate
+        session = DetectorSession(task.camera_id, self.detector, frame_rate=sampler.fps, gmc_method=task.gmc_method)
+        self.report("started", task.file_id, {
+            "analysis_fps": sampler.fps,
+            "expected_frames": sampler.expected_frames,
+            "duration_ms": sampler.duration_ms
+        })
+
+        output, detections_path = None, None
+        if settings.ANALYSIS_SAVE_DETECTIONS:
+            detections_path = str(settings.ANALYSIS_DIR / f"job_{task.job_id}_file_{task.file_id}.jsonl")
+            output = open(detections_path, "w", encoding="utf-8")
+
+        cancelled = False
+        last_report = time.monotonic()
+        decoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis-decode")
+        try:
+            next_batch = decoder.submit(sampler.read_batch, self.batch_size)
+            while True:
+                batch = next_batch.result()
+                if not batch:
+                    break
+                if self.is_cancelled():
+                    cancelled = True
+                    break
+                # Decode the next batch while this one is inferred
+                next_batch = decoder.submit(sampler.read_batch, self.batch_size)
+
+                frames, frame_numbers, timestamps = zip(*batch)
+                results = session.detect_batch(list(frames), list(frame_numbers), list(timestamps), self.preprocessor)
+                for frame, detection in zip(frames, results):
+                    self._evaluate(frame, detection, sampler.width, sampler.height)
+                if output is not None:
+                    output.writelines(json.dumps(d.to_dict()) + "\n" for d in results)
+
+                self.frames_analyzed += len(batch)
+                self.video_ms = timestamps[-1] * 1000.0
+                if time.monotonic() - last_report >= settings.ANALYSIS_PROGRESS_INTERVAL:
+                    last_report = time.monotonic()
+                    self.report("progress", task.file_id, self._progress())
+        finally:
+            # Waits for a running decode before the file is released
+            decoder.shutdown(wait=True)
+            sampler.close()
+            if output is not None:
+                output.close()
+
+        return {
+            **self._progress(),
+            "detections_path": detections_path,
+            "state": "cancelled" if cancelled else "completed"
+        }
+
+    def _progress(self) -> Dict[str, Any]:
+        return {
+            "frames_analyzed": self.frames_analyzed,
+            "video_ms": self.video_ms,
+            "events_found": self.events_found
+        }
+
+    def _evaluate(self, frame: np.ndarray, detection: FrameDetections, width: int, height: int):
+        """Evaluate the rules for one frame and report its events."""
+        scene = SceneIndex(detection, self.roi_manager, self.roi_ids, canvas_width=width, canvas_height=height)
+        events = self.rule_engine.evaluate(
+            detection, self.task.camera_id, self.roi_ids, canvas_width=width, canvas_height=height, scene=scene
+        )
+        if not events:
+            return
+
+        snapshot_frame = VideoProcessor.render_overlays(frame, detection, scene.rois)
+        for event in events:
+            self._tag_event(event, detection)
+            self.events_found += 1
+            self.report("event", self.task.file_id, (
+                event, snapshot_frame if event.severity != Severity.INFO else None
+            ))
+
+    def _tag_event(self, event: SafetyEvent, detection: FrameDetections):
+        """Record which file, and where in it, an event happened."""
+        event.camera_id = self.task.camera_id
+        event.source_file = self.task.source
+        event.detection_data = {
+            **(event.detection_data or {}),
+            "analysis_job_id": self.task.job_id,
+            "video_ms": detection.timestamp * 1000.0,
+            "frame_number": detection.frame_number
+        }
+
+
+# Per-process worker state, set by init_worker()
+_worker: Dict[str, Any] = {}
+
+
+def init_worker(
+    detector_type: Optional[str] = None,
+    quantization: Optional[str] = None,
+    model_path: Optional[str] = None,
+    num_threads: int = 0
+):
+    """
+    Process pool initializer: build this worker's detector (loaded on first use).
+
+    Args:
+        detector_type: Detector backend (default: settings.DETECTOR_TYPE)
+        quantization: ONNX quantization (default: settings.DETECTOR_QUANTIZATION)
+        model_path: Model file (default: the backend's setting)
+        num_threads: Inference threads for this worker (0 = library default)
+    """
+    if num_threads > 0:
+        os.environ["OMP_NUM_THREADS"] = str(num_threads)
+        settings.ONNX_INTRA_OP_THREADS = num_threads
+        try:
+            import torch
+            torch.set_num_threads(num_threads)
+        except ImportError:
+            pass
+    _worker["detector"] = create_detector(
+        detector_type or settings.DETECTOR_TYPE, quantization or settings.DETECTOR_QUANTIZATION, model_path
+    )
+
+
+def analyze_file(task: FileTask, progress_queue, cancelled) -> Dict[str, Any]:
+    """
+    Worker entry point: analyse one file and report through a queue.
+
+    Args:
+        task: File to analyse
+        progress_queue: Queue receiving (kind, file_id, data) messages.
+            The last message for a file is always "finished" or "failed".
+        cancelled: Mapping of job IDs that were cancelled
+
+    Returns:
+        Final state of the file (also sent as the "finished" message)
+    """
+    def report(kind: str, file_id: int, data: Any):
+        progress_queue.put((kind, file_id, data))
+
+    try:
+        if "detector" not in _worker:
+            init_worker()
+        analyzer = FileAnalyzer(task, _worker["detector"], report, lambda: task.job_id in cancelled)
+        result = analyzer.run()
+    except Exception as e:
+        logger.error(f"Analysis of {task.source} failed: {e}")
+        report("failed", task.file_id, str(e))
+        return {"state": "failed", "error": str(e)}
+
+    report("finished", task.file_id, result)
+    return result
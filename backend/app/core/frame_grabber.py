@@ -0,0 +1,234 @@
+"""
+Threaded frame capture stage.
+
+Decodes frames from a cv2.VideoCapture on a background thread into a small
+bounded ring buffer so that decoding never blocks the asyncio event loop.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CapturedFrame:
+    """A decoded frame together with its position in the source."""
+    frame: np.ndarray
+    frame_number: int
+    timestamp: float  # seconds
+
+
+class FrameGrabber:
+    """
+    Background decoder feeding a bounded ring buffer.
+
+    Live sources (RTSP) use "latest frame wins" semantics: when the buffer is
+    full the oldest frame is dropped so consumers always see the newest frame.
+    File sources apply backpressure instead, so no frames are lost and the
+    file is played back at the consumer's pace.
+    """
+
+    def __init__(
+        self,
+        cap: cv2.VideoCapture,
+        source_type: str = "file",
+        buffer_size: int = 2,
+        loop_file: bool = True
+    ):
+        """
+        Initialize frame grabber.
+
+        Args:
+            cap: Opened video capture. The grabber owns it while running.
+            source_type: "file" or "rtsp"
+            buffer_size: Maximum number of decoded frames kept in memory
+            loop_file: Rewind file sources when they reach the end
+        """
+        self.cap = cap
+        self.source_type = source_type
+        self.buffer_size = max(1, buffer_size)
+        self.loop_file = loop_file
+
+        self._buffer: Deque[CapturedFrame] = deque(maxlen=self.buffer_size)
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        # Set by stop() when the thread is still blocked in cap.read(): it releases cap on exit
+        self._release_on_exit = False
+        self._exited = True
+
+        # Requests applied by the capture thread between reads
+        self._pending_seek: Optional[int] = None
+        self._pending_skip = 0
+
+        # Statistics
+        self.frames_decoded = 0
+        self.frames_dropped = 0
+        self.eof = False
+        self.last_frame_time = 0.0
+
+    @property
+    def drop_oldest(self) -> bool:
+        """Whether stale frames are discarded when the buffer is full."""
+        return self.source_type != "file"
+
+    @property
+    def is_alive(self) -> bool:
+        """Whether the capture thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the capture thread."""
+        if self.is_alive:
+            return
+        self._running = True
+        self._exited = False
+        self.eof = False
+        self._thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0, release_capture: bool = False) -> bool:
+        """
+        Stop the capture thread and clear buffered frames.
+
+        Args:
+            timeout: Seconds to wait for the thread to exit
+            release_capture: Also release the capture. If the thread is still
+                blocked in cap.read() (e.g. a dead RTSP stream), it releases
+                the capture itself once the read returns.
+
+        Returns:
+            True if the capture thread has exited
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            if not self._thread.is_alive():
+                self._thread = None
+        with self._cond:
+            self._buffer.clear()
+            stopped = self._exited
+            if release_capture and not stopped:
+                self._release_on_exit = True
+        if release_capture and stopped:
+            self.cap.release()
+        if not stopped:
+            logger.warning(f"Capture thread did not stop within {timeout}s")
+        return stopped
+
+    def read(self, timeout: Optional[float] = 0.0) -> Optional[CapturedFrame]:
+        """
+        Pop the next frame from the buffer.
+
+        Args:
+            timeout: Seconds to wait for a frame. 0 returns immediately,
+                None waits until a frame arrives or the grabber stops.
+
+        Returns:
+            CapturedFrame or None if no frame is available
+        """
+        with self._cond:
+            if not self._buffer and timeout != 0.0:
+                self._cond.wait_for(
+                    lambda: self._buffer or not self._running or self.eof,
+                    timeout=timeout
+                )
+            if not self._buffer:
+                return None
+            captured = self._buffer.popleft()
+            self._cond.notify_all()
+            return captured
+
+    def request_seek(self, frame_index: int):
+        """Ask the capture thread to seek and flush buffered frames."""
+        with self._cond:
+            self._pending_seek = max(0, int(frame_index))
+            self._pending_skip = 0
+            self._buffer.clear()
+            self.eof = False
+            self._cond.notify_all()
+
+    def request_skip(self, frames: int):
+        """Ask the capture thread to grab (without retrieving) N frames."""
+        if frames <= 0:
+            return
+        with self._cond:
+            self._pending_skip += frames
+            self._cond.notify_all()
+
+    def _apply_pending(self):
+        """Apply seek/skip requests. Called from the capture thread."""
+        with self._cond:
+            seek = self._pending_seek
+            skip = self._pending_skip
+            self._pending_seek = None
+            self._pending_skip = 0
+
+        if seek is not None:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, float(seek))
+        for _ in range(skip):
+            if not self.cap.grab():
+                break
+
+    def _run(self):
+        """Capture loop."""
+        try:
+            while self._running:
+                self._apply_pending()
+
+                ret, frame = self.cap.read()
+                if not ret:
+                    if self.source_type == "file" and self.loop_file:
+                        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        ret, frame = self.cap.read()
+                    if not ret:
+                        with self._cond:
+                            self.eof = True
+                            self._cond.notify_all()
+                        break
+
+                captured = CapturedFrame(
+                    frame=frame,
+                    frame_number=int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)),
+                    timestamp=self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                )
+                self.frames_decoded += 1
+                self.last_frame_time = time.time()
+
+                with self._cond:
+                    if self._pending_seek is not None:
+                        # Frame decoded before the seek was applied - discard it
+                        continue
+                    if len(self._buffer) >= self.buffer_size:
+                        if self.drop_oldest:
+                            self.frames_dropped += 1
+                        else:
+                            self._cond.wait_for(
+                                lambda: len(self._buffer) < self.buffer_size
+                                or not self._running
+                                or self._pending_seek is not None
+                            )
+                            if not self._running or self._pending_seek is not None:
+                                continue
+                    self._buffer.append(captured)
+                    self._cond.notify_all()
+        except Exception as e:
+            logger.error(f"Frame grabber error: {e}")
+            with self._cond:
+                self.eof = True
+                self._cond.notify_all()
+        finally:
+            with self._cond:
+                self._exited = True
+                release = self._release_on_exit
+            if release:
+                self.cap.release()
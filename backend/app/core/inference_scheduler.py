@@ -0,0 +1,306 @@
+"""
+Cross-camera batched inference scheduler.
+
+Collects pending frames from all active cameras and runs them through the
+detector as a single batched prediction. Each frame is then passed through
+the tracker of the camera it came from.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import numpy as np
+
+from app.config import settings
+from app.core.detection import BaseDetector, load_detector
+from app.core.model_registry import get_model_registry
+from app.core.preprocess import FramePreprocessor
+from app.core.roi_crop import Region
+from app.core.detections import FrameDetections
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class InferenceRequest:
+    """A frame waiting to be batched."""
+    frame: np.ndarray
+    frame_number: int
+    timestamp: float
+    tracker: Any
+    future: asyncio.Future
+    regions: Optional[List[Region]] = None
+    preprocessor: Optional[FramePreprocessor] = None
+
+    @property
+    def image_count(self) -> int:
+        """Detector inputs this frame adds to a batch (one per ROI crop)."""
+        return len(self.regions) if self.regions else 1
+
+
+class InferenceScheduler:
+    """
+    Batches frames from many cameras into one detector call.
+
+    A batch is dispatched as soon as it holds ``max_batch`` detector inputs
+    or the oldest frame has waited ``max_wait_ms``, whichever comes first.
+    A frame cropped to several ROI tiles counts once per tile.
+    """
+
+    def __init__(
+        self,
+        detector_provider: Optional[Callable[[], BaseDetector]] = None,
+        max_batch: int = settings.INFERENCE_MAX_BATCH,
+        max_wait_ms: float = settings.INFERENCE_MAX_WAIT_MS,
+        max_concurrent_batches: int = max(1, settings.INFERENCE_WORKERS)
+    ):
+        """
+        Initialize inference scheduler.
+
+        Args:
+            detector_provider: Returns the detector to run batches on
+                (default: the model registry's active model)
+            max_batch: Maximum number of detector inputs (frames or ROI crops) per batch
+            max_wait_ms: Maximum time the first frame of a batch waits for more
+            max_concurrent_batches: Batches in flight at once. One per inference
+                worker process; 1 for in-process inference.
+        """
+        self._detector_provider = detector_provider
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Request that did not fit the previous batch; starts the next one
+        self._held: Optional[InferenceRequest] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+        # Batches run off the event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent_batches, thread_name_prefix="inference"
+        )
+
+        # Statistics
+        self.batches_run = 0
+        self.frames_run = 0
+        self.last_batch_size = 0
+        self.last_batch_images = 0
+        self.last_batch_ms = 0.0
+
+    def _ensure_started(self):
+        """Start the batching task on the running event loop."""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run(), name="inference-scheduler")
+
+    async def submit(
+        self,
+        frame: np.ndarray,
+        frame_number: int = 0,
+        timestamp: float = 0.0,
+        tracker=None,
+        regions: Optional[List[Region]] = None,
+        preprocessor: Optional[FramePreprocessor] = None
+    ) -> FrameDetections:
+        """
+        Queue a frame for batched inference and wait for its result.
+
+        Args:
+            frame: BGR frame
+            frame_number: Frame number
+            timestamp: Frame timestamp in seconds
+            tracker: Tracker of the camera the frame came from
+            regions: Only run the model on these pixel regions of the frame
+            preprocessor: Preprocessing stage of the camera (inference resolution)
+
+        Returns:
+            FrameDetections for this frame
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(InferenceRequest(
+            frame, frame_number, timestamp, tracker, future, regions, preprocessor
+        ))
+        return await future
+
+    async def stop(self):
+        """Stop the batching task and fail pending requests."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for task in list(self._batch_tasks):
+            task.cancel()
+
+        if self._held is not None:
+            if not self._held.future.done():
+                self._held.future.cancel()
+            self._held = None
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                request = self._queue.get_nowait()
+                if not request.future.done():
+                    request.future.cancel()
+
+    async def _collect_batch(self) -> List[InferenceRequest]:
+        """
+        Wait for the first request, then gather more until full or deadline.
+
+        Batches are sized in detector inputs, not frames. A request whose crops
+        would overflow the batch is held back to start the next one; a single
+        request with more crops than max_batch is dispatched on its own.
+        """
+        loop = asyncio.get_running_loop()
+        if self._held is not None:
+            first, self._held = self._held, None
+        else:
+            first = await self._queue.get()
+        batch = [first]
+        images = first.image_count
+        deadline = loop.time() + self.max_wait
+
+        try:
+            while images < self.max_batch:
+                # Take whatever is already queued without waiting
+                if not self._queue.empty():
+                    request = self._queue.get_nowait()
+                else:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        request = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if images + request.image_count > self.max_batch:
+                    self._held = request
+                    break
+                batch.append(request)
+                images += request.image_count
+        except asyncio.CancelledError:
+            # Already taken off the queue, so stop() would not see them
+            for request in batch:
+                request.future.cancel()
+            raise
+
+        return batch
+
+    async def _run(self):
+        """Batching loop."""
+        slots = asyncio.Semaphore(self.max_concurrent_batches)
+        while True:
+            # Wait for a free slot first so the next batch keeps filling meanwhile
+            await slots.acquire()
+            try:
+                batch = await self._collect_batch()
+            except asyncio.CancelledError:
+                slots.release()
+                raise
+            task = asyncio.create_task(self._dispatch(batch, slots))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _dispatch(self, batch: List[InferenceRequest], slots: asyncio.Semaphore):
+        """Run a batch on the executor and resolve its futures."""
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self._executor, self._run_batch, batch)
+            for request, result in zip(batch, results):
+                if not request.future.done():
+                    request.future.set_result(result)
+        except Exception as e:
+            # Callers get the error, not empty detections that would read as an empty scene
+            logger.error(f"Batched inference error: {e}")
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+        finally:
+            slots.release()
+            # Cancelled by stop(): callers must not wait forever
+            for request in batch:
+                if not request.future.done():
+                    request.future.cancel()
+
+    def _run_batch(self, batch: List[InferenceRequest]) -> List[FrameDetections]:
+        """Run one batch. Executes on the inference thread."""
+        start = time.perf_counter()
+        if self._detector_provider is not None:
+            return self._run_batch_on(self._detector_provider(), batch, start)
+        # Pinned for the whole batch, so a model swap never releases it mid-batch
+        with get_model_registry().use() as detector:
+            return self._run_batch_on(detector, batch, start)
+
+    def _run_batch_on(self, detector: BaseDetector, batch: List[InferenceRequest], start: float) -> List[FrameDetections]:
+        if not detector.is_loaded:
+            load_detector(detector)
+
+        # Each camera's preprocessing stage may contribute several images (ROI crops)
+        images, plans = [], []
+        for request in batch:
+            if request.regions or request.preprocessor:
+                preprocessor = request.preprocessor or FramePreprocessor()
+                request_images, regions, scales = preprocessor.prepare(request.frame, request.regions)
+                plans.append((len(request_images), regions, scales))
+                images.extend(request_images)
+            else:
+                plans.append(None)
+                images.append(request.frame)
+        outputs = detector.predict_batch(images)
+
+        raw_outputs = []
+        offset = 0
+        for plan in plans:
+            if plan is None:
+                raw_outputs.append(outputs[offset])
+                offset += 1
+            else:
+                count, regions, scales = plan
+                raw_outputs.append(FramePreprocessor.restore(outputs[offset:offset + count], regions, scales))
+                offset += count
+
+        # Route each frame's detections through its own camera's tracker
+        results = [
+            detector.build_result(raw, request.frame, request.frame_number, request.timestamp, request.tracker)
+            for request, raw in zip(batch, raw_outputs)
+        ]
+
+        self.batches_run += 1
+        self.frames_run += len(batch)
+        self.last_batch_size = len(batch)
+        self.last_batch_images = len(images)
+        self.last_batch_ms = (time.perf_counter() - start) * 1000.0
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics."""
+        return {
+            "max_batch": self.max_batch,
+            "max_concurrent_batches": self.max_concurrent_batches,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches_run": self.batches_run,
+            "frames_run": self.frames_run,
+            "avg_batch_size": self.frames_run / self.batches_run if self.batches_run else 0.0,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_images": self.last_batch_images,
+            "last_batch_ms": self.last_batch_ms
+        }
+
+
+# Global scheduler instance
+_scheduler_instance: Optional[InferenceScheduler] = None
+
+
+def get_inference_scheduler() -> InferenceScheduler:
+    """Get or create the global inference scheduler."""
+    global _scheduler_instance
+    if _scheduler_instance is None:
+        _scheduler_instance = InferenceScheduler()
+    return _scheduler_instance
@@ -0,0 +1,495 @@
+"""
+Out-of-process inference backend.
+
+Runs the configured detector in one or more worker processes so that model
+inference does not compete with the API process for the GIL. Frames travel
+to the workers through ``multiprocessing.shared_memory`` slots (the worker
+reads them as zero-copy numpy views); detections come back over a queue.
+
+A crashed worker only fails its in-flight requests and is restarted; the
+API process keeps running. Inference failures raise instead of returning
+empty detections, which the safety rules would take as an empty scene.
+"""
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.core.detection import BaseDetector, create_detector
+from app.core.detections import FrameDetections
+
+logger = logging.getLogger(__name__)
+
+# Frame reference sent to a worker: (slot index, shape) or (None, inline array)
+FrameRef = Tuple[Optional[int], Any]
+
+# Seconds between worker liveness checks, whether or not results are arriving
+LIVENESS_CHECK_INTERVAL = 0.5
+
+
+def _worker_main(
+    worker_idx: int,
+    detector_type: str,
+    slot_names: List[str],
+    num_threads: int,
+    task_queue,
+    result_queue,
+    quantization: Optional[str] = None,
+    model_path: Optional[str] = None
+):
+    """Worker process entry point."""
+    try:
+        if num_threads > 0:
+            os.environ["OMP_NUM_THREADS"] = str(num_threads)
+            settings.ONNX_INTRA_OP_THREADS = num_threads
+            try:
+                import torch
+                torch.set_num_threads(num_threads)
+            except ImportError:
+                pass
+
+        slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+        detector = create_detector(detector_type, quantization, model_path)
+        if not detector.load_model():
+            result_queue.put(("failed", worker_idx, f"Failed to load {detector_type} model"))
+            return
+
+        class_names = {i: detector._class_name(i) for i in range(len(settings.CLASS_NAMES))}
+        result_queue.put(("ready", worker_idx, class_names))
+    except Exception as e:
+        result_queue.put(("failed", worker_idx, str(e)))
+        return
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        request_id, frame_refs = task
+        try:
+            frames = []
+            for slot_idx, ref in frame_refs:
+                if slot_idx is None:
+                    frames.append(ref)
+                else:
+                    # Zero-copy view onto the shared memory slot
+                    frames.append(np.ndarray(ref, dtype=np.uint8, buffer=slots[slot_idx].buf))
+            outputs = detector.predict_batch(frames)
+            result_queue.put(("result", request_id, [np.asarray(o, dtype=np.float32) for o in outputs]))
+        except Exception as e:
+            result_queue.put(("error", request_id, str(e)))
+
+    for slot in slots:
+        slot.close()
+
+
+class _Worker:
+    """Parent-side handle of a worker process."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process: Optional[mp.Process] = None
+        self.task_queue = None
+        self.ready = threading.Event()
+        self.in_flight: Dict[int, List[int]] = {}  # request_id -> slot indexes
+        # Slots of timed-out requests the worker may still touch; freed once it answers or exits
+        self.quarantined: Dict[int, List[int]] = {}
+        self.restarts = 0
+        self.crashes = 0  # Consecutive deaths without reaching "ready"
+        self.restart_at: Optional[float] = None  # Monotonic time of the scheduled restart
+        self.failed = False  # Given up after too many consecutive crashes
+        self.last_error: Optional[str] = None
+
+    @property
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+
+class ProcessPoolDetector(BaseDetector):
+    """
+    Detector that delegates inference to worker processes.
+
+    Tracking and result building stay in the API process; workers only run
+    ``predict_batch``.
+    """
+
+    def __init__(
+        self,
+        detector_type: Optional[str] = None,
+        num_workers: Optional[int] = None,
+        slot_bytes: int = settings.INFERENCE_SHM_SLOT_BYTES,
+        quantization: Optional[str] = None,
+        model_path: Optional[str] = None
+    ):
+        """
+        Initialize process pool detector.
+
+        Args:
+            detector_type: Backend run by the workers (default: settings.DETECTOR_TYPE)
+            num_workers: Number of worker processes (default: settings.INFERENCE_WORKERS)
+            slot_bytes: Size of each shared memory frame slot
+            quantization: Quantization mode for the workers (default: settings)
+            model_path: Model file for the workers (default: the backend's setting)
+        """
+        self.detector_type = detector_type or settings.DETECTOR_TYPE
+        self.quantization = quantization
+        self.model_path = model_path
+        self.num_workers = max(1, num_workers or settings.INFERENCE_WORKERS)
+        self.slot_bytes = slot_bytes
+        self.request_timeout = settings.INFERENCE_WORKER_TIMEOUT
+
+        # Local, never-loaded instance used only for category mapping
+        self._backend = create_detector(self.detector_type, quantization, model_path)
+        self._class_names: Dict[int, str] = {}
+
+        self._ctx = mp.get_context("spawn")
+        self._workers = [_Worker(i) for i in range(self.num_workers)]
+        self._result_queue = None
+        self._slots: List[shared_memory.SharedMemory] = []
+        # Free slot indexes; a request takes all of its slots at once, so
+        # concurrent callers can never each hold part of what the other needs
+        self._free_slots: List[int] = []
+        self._slots_freed = threading.Condition()
+        self.max_batch = max(1, settings.INFERENCE_MAX_BATCH)
+        self._futures: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._next_request_id = 0
+        self._listener: Optional[threading.Thread] = None
+        self._running = False
+        self._is_loaded = False
+
+    @property
+    def max_concurrency(self) -> int:
+        # One request in flight per worker
+        return self.num_workers
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._is_loaded and any(w.is_alive and w.ready.is_set() for w in self._workers)
+
+    @property
+    def failure(self) -> Optional[str]:
+        """Why the pool gave up, once every worker has crashed too often to restart."""
+        if all(w.failed for w in self._workers):
+            errors = {w.last_error for w in self._workers if w.last_error}
+            return f"All inference workers failed: {'; '.join(sorted(errors)) or 'crashed repeatedly'}"
+        return None
+
+    def load_model(self) -> bool:
+        if self.is_loaded:
+            return True
+        try:
+            self._start()
+        except Exception as e:
+            logger.error(f"Failed to start inference workers: {e}")
+            return False
+
+        deadline = time.time() + settings.INFERENCE_WORKER_STARTUP_TIMEOUT
+        for worker in self._workers:
+            worker.ready.wait(timeout=max(0.0, deadline - time.time()))
+
+        ready = sum(1 for w in self._workers if w.ready.is_set())
+        self._is_loaded = ready > 0
+        logger.info(f"Inference workers ready: {ready}/{self.num_workers} ({self.detector_type})")
+        return self._is_loaded
+
+    def _start(self):
+        """Allocate shared memory slots and spawn the workers."""
+        if self._running:
+            return
+
+        # Enough slots for every worker to hold two full batches
+        num_slots = self.num_workers * self.max_batch * 2
+        for i in range(num_slots):
+            self._slots.append(shared_memory.SharedMemory(create=True, size=self.slot_bytes))
+        self._release_slots(range(num_slots))
+
+        self._result_queue = self._ctx.Queue()
+        self._running = True
+        for worker in self._workers:
+            self._spawn(worker)
+
+        self._listener = threading.Thread(target=self._listen, name="inference-results", daemon=True)
+        self._listener.start()
+
+    def _spawn(self, worker: _Worker):
+        """Start (or restart) a worker process."""
+        threads = settings.INFERENCE_WORKER_THREADS or max(1, (os.cpu_count() or 1) // self.num_workers)
+        worker.ready.clear()
+        worker.task_queue = self._ctx.Queue()
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                worker.index,
+                self.detector_type,
+                [slot.name for slot in self._slots],
+                threads,
+                worker.task_queue,
+                self._result_queue,
+                self.quantization,
+                self.model_path
+            ),
+            name=f"inference-worker-{worker.index}",
+            daemon=True
+        )
+        worker.process.start()
+
+    def _listen(self):
+        """Resolve futures from worker results and restart dead workers."""
+        next_check = time.monotonic() + LIVENESS_CHECK_INTERVAL
+        while self._running:
+            # Checked on a timer: results from busy workers must not hide a dead one
+            if time.monotonic() >= next_check:
+                self._check_workers()
+                next_check = time.monotonic() + LIVENESS_CHECK_INTERVAL
+            try:
+                message = self._result_queue.get(timeout=LIVENESS_CHECK_INTERVAL)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+
+            kind = message[0]
+            if kind == "ready":
+                _, worker_idx, class_names = message
+                self._class_names = class_names
+                self._workers[worker_idx].crashes = 0
+                self._workers[worker_idx].ready.set()
+            elif kind == "failed":
+                _, worker_idx, error = message
+                self._workers[worker_idx].last_error = error
+                logger.error(f"Inference worker {worker_idx} failed to start: {error}")
+            elif kind in ("result", "error"):
+                _, request_id, payload = message
+                self._complete(request_id, payload if kind == "result" else RuntimeError(payload))
+
+    def _check_workers(self):
+        """
+        Fail the in-flight requests of dead workers and restart them.
+
+        Restarts back off exponentially; a worker that keeps dying before it
+        is ready (e.g. a missing checkpoint) is given up after
+        INFERENCE_WORKER_MAX_RESTARTS attempts.
+        """
+        now = time.monotonic()
+        for worker in self._workers:
+            if worker.process is None or worker.is_alive or worker.failed or not self._running:
+                continue
+
+            if worker.restart_at is None:
+                for request_id in list(worker.in_flight):
+                    self._complete(request_id, RuntimeError("Inference worker died"))
+                # The process is gone, so nothing reads its abandoned slots any more
+                with self._lock:
+                    quarantined = [slot for slots in worker.quarantined.values() for slot in slots]
+                    worker.quarantined.clear()
+                self._release_slots(quarantined)
+                worker.ready.clear()
+                worker.crashes += 1
+                if worker.crashes > settings.INFERENCE_WORKER_MAX_RESTARTS:
+                    worker.failed = True
+                    logger.error(
+                        f"Inference worker {worker.index} died {worker.crashes} times in a row, giving up"
+                    )
+                    continue
+                delay = min(
+                    settings.INFERENCE_WORKER_RESTART_BACKOFF * 2 ** (worker.crashes - 1),
+                    settings.INFERENCE_WORKER_RESTART_BACKOFF_MAX
+                )
+                worker.restart_at = now + delay
+                logger.error(
+                    f"Inference worker {worker.index} died (exit code {worker.process.exitcode}), "
+                    f"restarting in {delay:.1f}s"
+                )
+
+            if now >= worker.restart_at:
+                worker.restart_at = None
+                worker.restarts += 1
+                self._spawn(worker)
+
+    def _acquire_slots(self, count: int) -> List[int]:
+        """
+        Take ``count`` shared memory slots in one step.
+
+        Raises:
+            RuntimeError: If they do not become free within the request timeout
+        """
+        if count == 0:
+            return []
+        with self._slots_freed:
+            if not self._slots_freed.wait_for(lambda: len(self._free_slots) >= count, timeout=self.request_timeout):
+                raise RuntimeError(f"Timed out waiting for {count} shared memory slots")
+            taken = self._free_slots[-count:]
+            del self._free_slots[-count:]
+            return taken
+
+    def _release_slots(self, slots):
+        with self._slots_freed:
+            self._free_slots.extend(slots)
+            self._slots_freed.notify_all()
+
+    def _complete(self, request_id: int, payload):
+        """Resolve a request future and free its slots."""
+        with self._lock:
+            future = self._futures.pop(request_id, None)
+            for worker in self._workers:
+                # A late answer to a timed-out request also frees its quarantined slots
+                slots = worker.in_flight.pop(request_id, None) or worker.quarantined.pop(request_id, None)
+                if slots is not None:
+                    self._release_slots(slots)
+                    break
+        if future is not None and not future.done():
+            if isinstance(payload, Exception):
+                future.set_exception(payload)
+            else:
+                future.set_result(payload)
+
+    def _pick_worker(self) -> Optional[_Worker]:
+        """Least-loaded ready worker."""
+        ready = [w for w in self._workers if w.is_alive and w.ready.is_set()]
+        if not ready:
+            return None
+        return min(ready, key=lambda w: len(w.in_flight))
+
+    def predict_batch(self, frames: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Run frames on the workers, at most ``max_batch`` per request.
+
+        Raises:
+            RuntimeError: If no worker is available or a request fails or times out
+        """
+        if not frames:
+            return []
+        if not self.is_loaded and not self.load_model():
+            raise RuntimeError(f"No {self.detector_type} inference worker is running")
+
+        outputs: List[np.ndarray] = []
+        for start in range(0, len(frames), self.max_batch):
+            outputs.extend(self._predict_chunk(frames[start:start + self.max_batch]))
+        return outputs
+
+    def _predict_chunk(self, frames: List[np.ndarray]) -> List[np.ndarray]:
+        """Send one request (never more frames than the slot pool holds) and wait for it."""
+        worker = self._pick_worker()
+        if worker is None:
+            raise RuntimeError("No inference worker available")
+
+        # Copy frames into shared memory slots; oversized frames go inline
+        frames = [np.ascontiguousarray(frame, dtype=np.uint8) for frame in frames]
+        used_slots = self._acquire_slots(sum(1 for frame in frames if frame.nbytes <= self.slot_bytes))
+        frame_refs: List[FrameRef] = []
+        free = iter(used_slots)
+        for frame in frames:
+            if frame.nbytes <= self.slot_bytes:
+                slot_idx = next(free)
+                view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._slots[slot_idx].buf)
+                view[...] = frame
+                frame_refs.append((slot_idx, frame.shape))
+            else:
+                frame_refs.append((None, frame))
+
+        future: Future = Future()
+        with self._lock:
+            request_id = self._next_request_id
+            self._next_request_id += 1
+            self._futures[request_id] = future
+            worker.in_flight[request_id] = used_slots
+        worker.task_queue.put((request_id, frame_refs))
+
+        try:
+            return future.result(timeout=self.request_timeout)
+        except FutureTimeoutError as e:
+            if not self._abandon(worker, request_id):
+                return future.result()  # Answered just after the timeout
+            raise RuntimeError(
+                f"Out-of-process inference timed out after {self.request_timeout}s"
+            ) from e
+        except Exception as e:
+            self._complete(request_id, e)
+            raise RuntimeError(f"Out-of-process inference failed: {e}") from e
+
+    def _abandon(self, worker: _Worker, request_id: int) -> bool:
+        """
+        Give up on a timed-out request and restart its hung worker.
+
+        The worker may still be reading the request's frames or be about to,
+        so its slots are quarantined instead of freed for the next request.
+
+        Returns:
+            False if the request was answered in the meantime
+        """
+        with self._lock:
+            slots = worker.in_flight.pop(request_id, None)
+            if slots is None:
+                return False
+            self._futures.pop(request_id, None)
+            worker.quarantined[request_id] = slots
+        logger.error(f"Inference worker {worker.index} did not answer in {self.request_timeout}s, restarting it")
+        if worker.process is not None:
+            worker.process.terminate()
+        return True
+
+    def predict(self, frame: np.ndarray) -> np.ndarray:
+        return self.predict_batch([frame])[0]
+
+    def detect(self, frame: np.ndarray, frame_number: int = 0, timestamp: float = 0.0, tracker=None) -> FrameDetections:
+        return self.build_result(self.predict(frame), frame, frame_number, timestamp, tracker)
+
+    def _class_name(self, cls_id: int) -> str:
+        if cls_id in self._class_names:
+            return self._class_names[cls_id]
+        return super()._class_name(cls_id)
+
+    def _map_category(self, class_name: str, counts: Dict) -> tuple:
+        return self._backend._map_category(class_name, counts)
+
+    def shutdown(self):
+        """Stop workers and release shared memory."""
+        self._running = False
+        for worker in self._workers:
+            if worker.is_alive:
+                worker.task_queue.put(None)
+        for worker in self._workers:
+            if worker.process is not None:
+                worker.process.join(timeout=5.0)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+                worker.process = None
+        if self._listener is not None:
+            self._listener.join(timeout=2.0)
+            self._listener = None
+        for slot in self._slots:
+            slot.close()
+            slot.unlink()
+        self._slots.clear()
+        with self._slots_freed:
+            self._free_slots.clear()
+        self._is_loaded = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get worker state."""
+        return {
+            "detector_type": self.detector_type,
+            "workers": [
+                {
+                    "index": w.index,
+                    "alive": w.is_alive,
+                    "ready": w.ready.is_set(),
+                    "in_flight": len(w.in_flight),
+                    "quarantined_slots": sum(len(slots) for slots in w.quarantined.values()),
+                    "restarts": w.restarts,
+                    "failed": w.failed,
+                    "last_error": w.last_error
+                }
+                for w in self._workers
+            ],
+            "failure": self.failure,
+            "free_slots": len(self._free_slots)
+        }
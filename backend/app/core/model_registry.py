@@ -0,0 +1,297 @@
+"""
+Model registry for zero-downtime detector swaps.
+
+The active model is whatever get_detector() returns. A swap builds, loads
+and warms the new model on a worker thread while the old one keeps serving,
+then replaces the global detector in one step. Every inference runs inside
+use(), which pins the model it started on, so a swapped-out model is only
+released after its in-flight inferences finish. Tracker state lives in the
+camera sessions and carries over unchanged.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from app.config import settings
+from app.core.detection import BaseDetector, build_detector, get_detector, resolve_model_path, set_detector, warm_up
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelEntry:
+    """One loaded (or loading) model and its latency statistics."""
+    version: int
+    detector_type: str
+    quantization: str
+    model_path: Optional[str]
+    detector: Optional[BaseDetector] = None
+    state: str = "loading"  # loading -> warming -> active -> draining -> retired (or failed)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    activated_at: Optional[float] = None
+    load_ms: Optional[float] = None
+    warmup_ms: Optional[float] = None
+    in_flight: int = 0
+    inferences: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: float = 0.0
+
+    def record(self, elapsed_ms: float):
+        self.inferences += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.last_ms = elapsed_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "detector_type": self.detector_type,
+            "quantization": self.quantization,
+            "model_path": self.model_path,
+            "state": self.state,
+            "error": self.error,
+            "created_at": self.created_at,
+            "activated_at": self.activated_at,
+            "load_ms": self.load_ms,
+            "warmup_ms": self.warmup_ms,
+            "in_flight": self.in_flight,
+            "inferences": self.inferences,
+            "avg_ms": self.total_ms / self.inferences if self.inferences else 0.0,
+            "max_ms": self.max_ms,
+            "last_ms": self.last_ms
+        }
+
+
+class ModelRegistry:
+    """Tracks the active model, a pending swap and models still draining."""
+
+    def __init__(self, history: int = 5):
+        """
+        Initialize model registry.
+
+        Args:
+            history: Number of retired models kept for latency comparison
+        """
+        self._lock = threading.Lock()
+        self._entries: Dict[int, ModelEntry] = {}  # id(detector) -> active or draining entry
+        self._next_version = 1
+        self._pending: Optional[ModelEntry] = None
+        self._swap_task: Optional[asyncio.Task] = None
+        self._retired: Deque[ModelEntry] = deque(maxlen=history)
+
+    def _new_entry(self, detector_type: str, quantization: str, model_path: Optional[str]) -> ModelEntry:
+        entry = ModelEntry(self._next_version, detector_type, quantization, model_path)
+        self._next_version += 1
+        return entry
+
+    def _entry_for(self, detector: BaseDetector) -> ModelEntry:
+        """Entry of a detector; the initial detector is registered on first use. Caller holds the lock."""
+        entry = self._entries.get(id(detector))
+        if entry is None:
+            entry = self._new_entry(settings.DETECTOR_TYPE, settings.DETECTOR_QUANTIZATION, None)
+            entry.detector = detector
+            entry.state = "active"
+            entry.activated_at = time.time()
+            self._entries[id(detector)] = entry
+        return entry
+
+    @contextmanager
+    def use(self) -> Iterator[BaseDetector]:
+        """
+        Pin the active detector for one inference and record its latency.
+
+        Yields:
+            The detector to run on; it stays alive until the block exits
+        """
+        with self._lock:
+            detector = get_detector()
+            entry = self._entry_for(detector)
+            entry.in_flight += 1
+        start = time.perf_counter()
+        try:
+            yield detector
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            with self._lock:
+                entry.in_flight -= 1
+                entry.record(elapsed_ms)
+                drained = entry.state == "draining" and entry.in_flight == 0
+            if drained:
+                self._retire(entry)
+
+    def _retire(self, entry: ModelEntry):
+        """Release a drained model."""
+        with self._lock:
+            if self._entries.get(id(entry.detector)) is not entry:
+                return
+            del self._entries[id(entry.detector)]
+            entry.state = "retired"
+            self._retired.append(entry)
+        detector, entry.detector = entry.detector, None
+        if hasattr(detector, "shutdown"):
+            detector.shutdown()
+        logger.info(f"Retired model v{entry.version} ({entry.detector_type}) after {entry.inferences} inferences")
+
+    @property
+    def swapping(self) -> bool:
+        return self._pending is not None
+
+    def _begin(
+        self,
+        detector_type: Optional[str],
+        quantization: Optional[str],
+        model_path: Optional[str]
+    ) -> ModelEntry:
+        """Register the pending entry (only one swap at a time)."""
+        if model_path is not None:
+            model_path = resolve_model_path(model_path)
+        if self._pending is not None:
+            raise RuntimeError(f"Swap to model v{self._pending.version} already in progress")
+        with self._lock:
+            # Number the current model before its successor
+            self._entry_for(get_detector())
+        self._pending = self._new_entry(
+            detector_type or settings.DETECTOR_TYPE, quantization or settings.DETECTOR_QUANTIZATION, model_path
+        )
+        return self._pending
+
+    async def swap(
+        self,
+        detector_type: Optional[str] = None,
+        quantization: Optional[str] = None,
+        model_path: Optional[str] = None,
+        warmup_runs: int = settings.DETECTOR_WARMUP_RUNS
+    ) -> ModelEntry:
+        """
+        Load and warm a new model, then make it the active one.
+
+        Cameras keep using the current model until the swap; inferences
+        already running on it finish before it is released.
+
+        Args:
+            detector_type: "yolo", "rfdetr" or "onnx" (default: settings.DETECTOR_TYPE)
+            quantization: "none", "dynamic" or "static" (default: settings.DETECTOR_QUANTIZATION)
+            model_path: Model file relative to BASE_DIR (default: the backend's setting)
+            warmup_runs: Warm-up inferences before the swap
+
+        Returns:
+            The new active entry
+
+        Raises:
+            ValueError: If model_path is outside MODELS_DIR
+            RuntimeError: If another swap is in progress or the model fails to load
+        """
+        entry = self._begin(detector_type, quantization, model_path)
+        return await self._complete(entry, warmup_runs)
+
+    def start_swap(
+        self,
+        detector_type: Optional[str] = None,
+        quantization: Optional[str] = None,
+        model_path: Optional[str] = None,
+        warmup_runs: int = settings.DETECTOR_WARMUP_RUNS
+    ) -> ModelEntry:
+        """
+        Run swap() in the background.
+
+        Returns:
+            The pending entry (poll get_status() for progress)
+
+        Raises:
+            ValueError: If model_path is outside MODELS_DIR
+            RuntimeError: If another swap is in progress
+        """
+        entry = self._begin(detector_type, quantization, model_path)
+        self._swap_task = asyncio.create_task(self._complete_logged(entry, warmup_runs), name="model-swap")
+        return entry
+
+    async def _complete_logged(self, entry: ModelEntry, warmup_runs: int):
+        try:
+            await self._complete(entry, warmup_runs)
+        except RuntimeError:
+            pass  # Logged and kept in the retired list by _complete()
+
+    async def _complete(self, entry: ModelEntry, warmup_runs: int) -> ModelEntry:
+        """Prepare a pending entry off the event loop and swap it in."""
+        try:
+            await asyncio.to_thread(self._prepare, entry, warmup_runs)
+        except Exception as e:
+            entry.state = "failed"
+            entry.error = str(e)
+            self._retired.append(entry)
+            logger.error(f"Model v{entry.version} failed to load: {e}")
+            raise RuntimeError(f"Model v{entry.version} failed to load: {e}") from e
+        finally:
+            self._pending = None
+
+        old, drained = None, False
+        with self._lock:
+            entry.state = "active"
+            entry.activated_at = time.time()
+            self._entries[id(entry.detector)] = entry
+            previous = set_detector(entry.detector)
+            if previous is not None:
+                old = self._entry_for(previous)
+                old.state = "draining"
+                drained = old.in_flight == 0
+        logger.info(f"Swapped in model v{entry.version} ({entry.detector_type}, {entry.model_path or 'default path'})")
+
+        if drained:
+            self._retire(old)
+        return entry
+
+    def _prepare(self, entry: ModelEntry, warmup_runs: int):
+        """Build, load and warm a model. Runs on a worker thread."""
+        start = time.perf_counter()
+        detector = build_detector(entry.detector_type, entry.quantization, entry.model_path)
+        if not detector.load_model():
+            if hasattr(detector, "shutdown"):
+                detector.shutdown()
+            raise RuntimeError("load_model() failed")
+        entry.detector = detector
+        entry.load_ms = (time.perf_counter() - start) * 1000.0
+
+        entry.state = "warming"
+        entry.warmup_ms = warm_up(detector, warmup_runs)
+
+    def shutdown(self):
+        """Release models that are still draining (the active one is released by shutdown_detector())."""
+        with self._lock:
+            draining = [e for e in self._entries.values() if e.state == "draining"]
+            for entry in draining:
+                entry.in_flight = 0
+        for entry in draining:
+            self._retire(entry)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get the active, pending, draining and recently retired models."""
+        with self._lock:
+            active = self._entry_for(get_detector()).to_dict()
+            draining: List[Dict[str, Any]] = [
+                e.to_dict() for e in self._entries.values() if e.state == "draining"
+            ]
+        return {
+            "active": active,
+            "pending": self._pending.to_dict() if self._pending else None,
+            "draining": draining,
+            "retired": [e.to_dict() for e in reversed(self._retired)]
+        }
+
+
+# Global registry instance
+_registry_instance: Optional[ModelRegistry] = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get or create the global model registry."""
+    global _registry_instance
+    if _registry_instance is None:
+        _registry_instance = ModelRegistry()
+    return _registry_instance
@@ -0,0 +1,149 @@
+"""
+Motion gate for skipping inference on static scenes.
+
+Compares a small grayscale copy of each frame with the one from the last
+inferred frame. Inference only runs when enough pixels changed, with a
+lower threshold inside (and just around) ROIs so entrances are still caught,
+and at least once every refresh period.
+"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MotionGate:
+    """Decides per frame whether the detector needs to run."""
+
+    def __init__(
+        self,
+        width: int = settings.MOTION_GATE_WIDTH,
+        pixel_threshold: int = settings.MOTION_GATE_PIXEL_THRESHOLD,
+        area_threshold: float = settings.MOTION_GATE_AREA_THRESHOLD,
+        roi_area_threshold: float = settings.MOTION_GATE_ROI_AREA_THRESHOLD,
+        roi_margin: float = settings.MOTION_GATE_ROI_MARGIN,
+        refresh_seconds: float = settings.MOTION_GATE_REFRESH_SECONDS
+    ):
+        """
+        Initialize motion gate.
+
+        Args:
+            width: Width of the downscaled comparison image
+            pixel_threshold: Gray level change for a pixel to count as changed
+            area_threshold: Changed fraction of the whole frame that triggers inference
+            roi_area_threshold: Changed fraction of the ROI area that triggers inference
+            roi_margin: ROI masks are grown by this fraction of the frame width
+            refresh_seconds: Run inference at least this often (video time)
+        """
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.area_threshold = area_threshold
+        self.roi_area_threshold = roi_area_threshold
+        self.roi_margin = roi_margin
+        self.refresh_seconds = refresh_seconds
+
+        self._reference: Optional[np.ndarray] = None
+        self._reference_time = 0.0
+        self._roi_mask: Optional[np.ndarray] = None
+        self._roi_key: Optional[Tuple] = None
+
+        # Statistics
+        self.frames_checked = 0
+        self.frames_skipped = 0
+        self.last_motion = 0.0
+        self.last_roi_motion = 0.0
+
+    def reset(self):
+        """Forget the reference frame (e.g. after a seek)."""
+        self._reference = None
+
+    def _downscale(self, frame: np.ndarray) -> np.ndarray:
+        h, w = frame.shape[:2]
+        height = max(1, int(round(h * self.width / w)))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        # Blur suppresses sensor noise and compression artifacts
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def _update_roi_mask(self, rois: Optional[List[Dict[str, Any]]], shape: Tuple[int, int]):
+        """Rebuild the ROI mask when the ROIs change."""
+        polygons = [
+            tuple((p["x"], p["y"]) for p in roi.get("points", []))
+            for roi in rois or []
+            if len(roi.get("points", [])) >= 3
+        ]
+        key = (shape, tuple(polygons))
+        if key == self._roi_key:
+            return
+        self._roi_key = key
+
+        if not polygons:
+            self._roi_mask = None
+            return
+
+        h, w = shape
+        mask = np.zeros((h, w), dtype=np.uint8)
+        for polygon in polygons:
+            pts = np.array([[int(x * w), int(y * h)] for x, y in polygon], np.int32)
+            cv2.fillPoly(mask, [pts], 1)
+
+        margin = int(round(self.roi_margin * w))
+        if margin > 0:
+            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * margin + 1, 2 * margin + 1))
+            mask = cv2.dilate(mask, kernel)
+        self._roi_mask = mask.astype(bool)
+
+    def should_infer(self, frame: np.ndarray, timestamp: float, rois: Optional[List[Dict[str, Any]]] = None) -> bool:
+        """
+        Check whether a frame needs inference.
+
+        When it does, the frame becomes the new reference.
+
+        Args:
+            frame: BGR frame
+            timestamp: Frame timestamp in seconds
+            rois: ROI data with normalized points
+
+        Returns:
+            True if the detector should run on this frame
+        """
+        self.frames_checked += 1
+        small = self._downscale(frame)
+        self._update_roi_mask(rois, small.shape)
+
+        run = (
+            self._reference is None
+            or self._reference.shape != small.shape
+            or timestamp < self._reference_time
+            or timestamp - self._reference_time >= self.refresh_seconds
+        )
+
+        if not run:
+            changed = cv2.absdiff(small, self._reference) > self.pixel_threshold
+            self.last_motion = float(changed.mean())
+            self.last_roi_motion = float(changed[self._roi_mask].mean()) if self._roi_mask is not None else 0.0
+            run = self.last_motion >= self.area_threshold or (
+                self._roi_mask is not None and self.last_roi_motion >= self.roi_area_threshold
+            )
+
+        if run:
+            self._reference = small
+            self._reference_time = timestamp
+        else:
+            self.frames_skipped += 1
+        return run
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get gating statistics."""
+        return {
+            "frames_checked": self.frames_checked,
+            "frames_skipped": self.frames_skipped,
+            "skip_ratio": self.frames_skipped / self.frames_checked if self.frames_checked else 0.0,
+            "last_motion": self.last_motion,
+            "last_roi_motion": self.last_roi_motion
+        }
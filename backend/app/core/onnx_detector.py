@@ -0,0 +1,269 @@
+"""
+ONNX Runtime detector backend for CPU-only deployments.
+
+Runs an ONNX export of the RF-DETR checkpoint through onnxruntime. Outputs
+use the same [x1, y1, x2, y2, conf, cls] layout as the torch backends, so
+tracking and the rule engine are unchanged.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.core.detection import BaseDetector, RFDETRDetector
+from app.core.detections import FrameDetections
+
+logger = logging.getLogger(__name__)
+
+# ImageNet normalization used by RF-DETR, folded into one multiply-subtract
+_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+_SCALE = (1.0 / (255.0 * _STD)).astype(np.float32)
+_SHIFT = (_MEAN / _STD).astype(np.float32)
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def preprocess_frame(
+    frame: np.ndarray,
+    input_size: Tuple[int, int],
+    out: Optional[np.ndarray] = None,
+    resize_buffer: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Convert a BGR frame into a normalized NCHW float tensor.
+
+    Args:
+        frame: BGR frame
+        input_size: Model input (width, height)
+        out: Optional preallocated (1, 3, height, width) float32 tensor to fill
+        resize_buffer: Optional preallocated (height, width, 3) uint8 buffer
+
+    Returns:
+        Array of shape (1, 3, height, width)
+    """
+    width, height = input_size
+    if out is None:
+        out = np.empty((1, 3, height, width), dtype=np.float32)
+    resized = cv2.resize(frame, input_size, dst=resize_buffer, interpolation=cv2.INTER_LINEAR)
+
+    # Write through an HWC view of the NCHW tensor; [..., ::-1] swaps BGR to RGB
+    hwc = out[0].transpose(1, 2, 0)
+    np.multiply(resized[..., ::-1], _SCALE, out=hwc)
+    np.subtract(hwc, _SHIFT, out=hwc)
+    return out
+
+
+def postprocess_outputs(
+    boxes: np.ndarray,
+    logits: np.ndarray,
+    image_width: int,
+    image_height: int,
+    threshold: float,
+    num_select: int = 300
+) -> np.ndarray:
+    """
+    Decode raw RF-DETR outputs for one image, mirroring the torch postprocessor.
+
+    Args:
+        boxes: (Q, 4) normalized [cx, cy, w, h] boxes
+        logits: (Q, C) class logits
+        image_width: Original frame width
+        image_height: Original frame height
+        threshold: Minimum score
+        num_select: Top-k (query, class) pairs considered
+
+    Returns:
+        numpy array of [x1, y1, x2, y2, conf, cls]
+    """
+    num_queries, num_classes = logits.shape
+    scores = _sigmoid(logits).reshape(-1)
+
+    k = min(num_select, scores.size)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    top_scores = scores[top]
+
+    keep = top_scores > threshold
+    top, top_scores = top[keep], top_scores[keep]
+    if top.size == 0:
+        return np.empty((0, 6), dtype=np.float32)
+
+    query_idx = top // num_classes
+    class_ids = top % num_classes
+
+    cx, cy, w, h = boxes[query_idx].T
+    xyxy = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    xyxy *= np.array([image_width, image_height, image_width, image_height], dtype=np.float32)
+
+    return np.column_stack([xyxy, top_scores, class_ids]).astype(np.float32)
+
+
+def export_onnx(output_path: Path) -> bool:
+    """
+    Export the RF-DETR checkpoint to ONNX.
+
+    Requires the torch/rfdetr stack; only needed once per checkpoint.
+
+    Args:
+        output_path: Where to write the .onnx file
+
+    Returns:
+        True if the file was written
+    """
+    source = RFDETRDetector()
+    if not source.load_model():
+        return False
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source.model.export(output_dir=tmp_dir)
+            exported = next(Path(tmp_dir).glob("*.onnx"))
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(exported), output_path)
+        logger.info(f"Exported RF-DETR to ONNX: {output_path}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to export RF-DETR to ONNX: {e}")
+        return False
+
+
+class ONNXDetector(BaseDetector):
+    """
+    RF-DETR inference through onnxruntime on CPU.
+
+    Input tensors are preallocated per calling thread: the batch scheduler,
+    detect_async executor threads, /api/detect/batch and snapshots can all
+    call the one global model at the same time.
+    """
+
+    # Same 11-class category mapping as the torch RF-DETR backend
+    _map_category = RFDETRDetector._map_category
+    # onnxruntime already spreads one run over all intra-op threads
+    max_concurrency = 1
+
+    def __init__(self, model_path: Optional[str] = None):
+        self.model_path = model_path or settings.ONNX_MODEL_PATH
+        self.session = None
+        self.input_name: Optional[str] = None
+        self.input_size: Tuple[int, int] = (settings.ONNX_INPUT_SIZE, settings.ONNX_INPUT_SIZE)
+        self.batch_inputs = False
+        # Preallocated input tensors per thread, grown to the largest batch seen
+        self._buffers = threading.local()
+        self.confidence_threshold = settings.RFDETR_CONFIDENCE_THRESHOLD
+        self._is_loaded = False
+
+    def load_model(self) -> bool:
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            logger.error("onnxruntime not installed")
+            return False
+
+        model_file = settings.BASE_DIR / self.model_path
+        if not model_file.exists():
+            logger.info(f"ONNX model not found at {model_file}, exporting from checkpoint")
+            if not export_onnx(model_file):
+                return False
+
+        try:
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+            options.intra_op_num_threads = settings.ONNX_INTRA_OP_THREADS or (os.cpu_count() or 1)
+            options.inter_op_num_threads = max(1, settings.ONNX_INTER_OP_THREADS)
+
+            self.session = ort.InferenceSession(
+                str(model_file), sess_options=options, providers=["CPUExecutionProvider"]
+            )
+
+            model_input = self.session.get_inputs()[0]
+            self.input_name = model_input.name
+            batch, _, height, width = model_input.shape
+            # Exported graphs usually fix the resolution; prefer it over settings
+            if isinstance(height, int) and isinstance(width, int):
+                self.input_size = (width, height)
+            self.batch_inputs = not isinstance(batch, int) or batch > 1
+
+            self._is_loaded = True
+            logger.info(
+                f"Loaded ONNX model {model_file.name} "
+                f"(input {self.input_size[0]}x{self.input_size[1]}, {options.intra_op_num_threads} threads)"
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to load ONNX model: {e}")
+            return False
+
+    def _run(self, tensor: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Run the session and return (boxes, logits) with a batch dimension."""
+        outputs = self.session.run(None, {self.input_name: tensor})
+        # Boxes are the output whose last dimension is 4
+        if outputs[0].shape[-1] == 4:
+            return outputs[0], outputs[1]
+        return outputs[1], outputs[0]
+
+    def _prepare_inputs(self, frames: List[np.ndarray]) -> np.ndarray:
+        """Preprocess frames into this thread's reusable input tensor."""
+        width, height = self.input_size
+        buffers = self._buffers
+        input_buffer = getattr(buffers, "input", None)
+        if input_buffer is None or input_buffer.shape[0] < len(frames) or input_buffer.shape[2:] != (height, width):
+            buffers.input = input_buffer = np.empty((len(frames), 3, height, width), dtype=np.float32)
+            buffers.resize = np.empty((height, width, 3), dtype=np.uint8)
+
+        batch = input_buffer[:len(frames)]
+        for i, frame in enumerate(frames):
+            preprocess_frame(frame, self.input_size, out=batch[i:i + 1], resize_buffer=buffers.resize)
+        return batch
+
+    def predict(self, frame: np.ndarray) -> np.ndarray:
+        return self.predict_batch([frame])[0]
+
+    def predict_batch(self, frames: List[np.ndarray]) -> List[np.ndarray]:
+        outputs = [np.empty((0, 6)) for _ in frames]
+        if not self._is_loaded:
+            if not self.load_model():
+                return outputs
+
+        try:
+            batch = self._prepare_inputs(frames)
+            if self.batch_inputs and len(frames) > 1:
+                boxes, logits = self._run(batch)
+            else:
+                results = [self._run(batch[i:i + 1]) for i in range(len(frames))]
+                boxes = np.concatenate([r[0] for r in results])
+                logits = np.concatenate([r[1] for r in results])
+
+            for i, frame in enumerate(frames):
+                height, width = frame.shape[:2]
+                outputs[i] = postprocess_outputs(
+                    boxes[i], logits[i], width, height,
+                    self.confidence_threshold, settings.ONNX_NUM_SELECT
+                )
+        except Exception as e:
+            logger.error(f"ONNX Detection error: {e}")
+        return outputs
+
+    def detect(self, frame: np.ndarray, frame_number: int = 0, timestamp: float = 0.0, tracker=None) -> FrameDetections:
+        if not self._is_loaded:
+            if not self.load_model():
+                return FrameDetections.empty(frame_number, timestamp)
+
+        try:
+            return self.build_result(self.predict(frame), frame, frame_number, timestamp, tracker)
+        except Exception as e:
+            logger.error(f"ONNX Detection error: {e}")
+            return FrameDetections.empty(frame_number, timestamp)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._is_loaded
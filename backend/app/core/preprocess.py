@@ -0,0 +1,122 @@
+"""
+Per-camera preprocessing stage ahead of the detector.
+
+Downscales each frame (or each ROI crop) to the camera's inference width
+into preallocated buffers, and maps detector boxes back to source pixels.
+The stage is timed so the resolution/speed trade-off is visible per camera.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.core.roi_crop import Region, merge_region_outputs
+
+logger = logging.getLogger(__name__)
+
+
+class FramePreprocessor:
+    """
+    Prepares detector inputs for one camera.
+
+    Resize buffers are reused between frames. They are kept per thread
+    (inputs are prepared and inferred on the same thread), so a stage used
+    from several inference threads never hands one buffer to two frames.
+    """
+
+    def __init__(self, inference_width: Optional[int] = None):
+        """
+        Initialize preprocessor.
+
+        Args:
+            inference_width: Maximum width of detector inputs; wider frames or
+                crops are downscaled (aspect ratio kept). None = source resolution.
+        """
+        self.inference_width = inference_width
+        self._local = threading.local()
+
+        # Statistics
+        self.frames = 0
+        self.total_ms = 0.0
+        self.last_ms = 0.0
+        self.last_input_size: Optional[Tuple[int, int]] = None
+
+    def _buffer(self, width: int, height: int, index: int) -> np.ndarray:
+        """Preallocated (height, width, 3) buffer, one per image slot of that size."""
+        by_size = getattr(self._local, "buffers", None)
+        if by_size is None:
+            by_size = self._local.buffers = {}
+        buffers: List[np.ndarray] = by_size.setdefault((width, height), [])
+        while len(buffers) <= index:
+            buffers.append(np.empty((height, width, 3), dtype=np.uint8))
+        return buffers[index]
+
+    def prepare(
+        self,
+        frame: np.ndarray,
+        regions: Optional[List[Region]] = None,
+        slot: int = 0
+    ) -> Tuple[List[np.ndarray], List[Region], List[Tuple[float, float]]]:
+        """
+        Build detector inputs for a frame.
+
+        Args:
+            frame: BGR source frame
+            regions: Optional pixel regions to crop (see roi_crop)
+            slot: First buffer slot. Frames prepared for the same inference
+                need distinct slots so their inputs do not overwrite each other.
+
+        Returns:
+            (images, regions, scales): one image per region, the source
+            region it covers and its (x, y) source-pixels-per-input-pixel scale
+        """
+        start = time.perf_counter()
+        h, w = frame.shape[:2]
+        regions = regions or [(0, 0, w, h)]
+
+        images, scales = [], []
+        for index, (x1, y1, x2, y2) in enumerate(regions):
+            image = frame[y1:y2, x1:x2]
+            region_w, region_h = x2 - x1, y2 - y1
+            if self.inference_width and region_w > self.inference_width:
+                target = (self.inference_width, max(1, int(round(region_h * self.inference_width / region_w))))
+                image = cv2.resize(
+                    image, target, dst=self._buffer(*target, slot + index), interpolation=cv2.INTER_AREA
+                )
+                scales.append((region_w / target[0], region_h / target[1]))
+            else:
+                scales.append((1.0, 1.0))
+            images.append(image)
+
+        self.last_ms = (time.perf_counter() - start) * 1000.0
+        self.total_ms += self.last_ms
+        self.frames += 1
+        self.last_input_size = images[0].shape[1::-1] if len(images) == 1 else None
+        return images, regions, scales
+
+    @staticmethod
+    def restore(
+        outputs: List[np.ndarray],
+        regions: List[Region],
+        scales: List[Tuple[float, float]]
+    ) -> np.ndarray:
+        """
+        Map detector outputs back to source-frame pixels.
+
+        Returns:
+            numpy array of [x1, y1, x2, y2, conf, cls]
+        """
+        return merge_region_outputs(outputs, regions, scales)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get preprocessing timing."""
+        return {
+            "inference_width": self.inference_width,
+            "last_input_size": self.last_input_size,
+            "frames": self.frames,
+            "avg_ms": self.total_ms / self.frames if self.frames else 0.0,
+            "last_ms": self.last_ms
+        }
@@ -0,0 +1,408 @@
+"""
+INT8 quantized CPU inference for RF-DETR and YOLO.
+
+Both backends are quantized through ONNX Runtime: the FP32 model is exported
+to ONNX, then quantized either dynamically (weights only, no data needed) or
+statically (weights and activations, calibrated on a small set of frames).
+Quantized models are cached next to the FP32 export.
+
+Run as a script to build a quantized model and measure its drift against FP32:
+
+    python -m app.core.quantization --detector rfdetr --mode static --clip path/to/clip
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.core.detection import BaseDetector, YOLODetector, create_detector
+from app.core.onnx_detector import ONNXDetector, export_onnx, preprocess_frame
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("dynamic", "static")
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def load_frames(source: Path, max_frames: int) -> List[np.ndarray]:
+    """
+    Load frames from an image directory or a video file.
+
+    Args:
+        source: Directory of images or a video file
+        max_frames: Maximum number of frames (video frames are sampled evenly)
+
+    Returns:
+        List of BGR frames
+    """
+    if source.is_dir():
+        paths = sorted(p for p in source.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        frames = [cv2.imread(str(p)) for p in paths[:max_frames]]
+        return [f for f in frames if f is not None]
+
+    cap = cv2.VideoCapture(str(source))
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or max_frames
+    step = max(1, total // max_frames)
+    frames = []
+    for index in range(0, total, step):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        ret, frame = cap.read()
+        if not ret or len(frames) >= max_frames:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def load_labelled_clip(source: Path, max_frames: int) -> Tuple[List[np.ndarray], Optional[List[np.ndarray]]]:
+    """
+    Load a labelled clip: images with YOLO-format ``.txt`` labels of the same name.
+
+    Label lines are ``class cx cy w h`` in normalized coordinates. A video
+    file or a directory without labels yields frames only.
+
+    Returns:
+        (frames, labels) where labels are [x1, y1, x2, y2, 1.0, cls] arrays or None
+    """
+    if not source.is_dir():
+        return load_frames(source, max_frames), None
+
+    paths = sorted(p for p in source.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)[:max_frames]
+    if not paths or not all(p.with_suffix(".txt").exists() for p in paths):
+        return load_frames(source, max_frames), None
+
+    frames, labels = [], []
+    for path in paths:
+        frame = cv2.imread(str(path))
+        if frame is None:
+            continue
+        height, width = frame.shape[:2]
+        rows = np.loadtxt(path.with_suffix(".txt"), ndmin=2, dtype=np.float32).reshape(-1, 5)
+        cls, cx, cy, w, h = rows.T
+        labels.append(np.column_stack([
+            (cx - w / 2) * width, (cy - h / 2) * height,
+            (cx + w / 2) * width, (cy + h / 2) * height,
+            np.ones_like(cls), cls
+        ]))
+        frames.append(frame)
+    return frames, labels
+
+
+def _fp32_onnx_path(detector_type: str) -> Optional[Path]:
+    """Export (if needed) and return the FP32 ONNX model for a backend."""
+    if detector_type == "yolo":
+        model_file = settings.BASE_DIR / settings.YOLO_MODEL_PATH
+        onnx_file = model_file.with_suffix(".onnx")
+        if not onnx_file.exists():
+            try:
+                from ultralytics import YOLO
+                exported = YOLO(str(model_file)).export(format="onnx")
+                onnx_file = Path(exported)
+            except Exception as e:
+                logger.error(f"Failed to export YOLO to ONNX: {e}")
+                return None
+        return onnx_file
+
+    onnx_file = settings.BASE_DIR / settings.ONNX_MODEL_PATH
+    if not onnx_file.exists() and not export_onnx(onnx_file):
+        return None
+    return onnx_file
+
+
+def quantized_model_path(fp32_path: Path, mode: str) -> Path:
+    """Cache location of the quantized model, e.g. ``best.int8-static.onnx``."""
+    return fp32_path.with_name(f"{fp32_path.stem}.int8-{mode}.onnx")
+
+
+class _CalibrationReader:
+    """onnxruntime CalibrationDataReader over preprocessed frames."""
+
+    def __init__(self, input_name: str, tensors: List[np.ndarray]):
+        self.input_name = input_name
+        self._tensors = iter(tensors)
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        tensor = next(self._tensors, None)
+        return None if tensor is None else {self.input_name: tensor}
+
+
+def _calibration_preprocess(detector_type: str, input_size: Tuple[int, int]) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    Preprocessing that matches the backend's own inference input.
+
+    Static INT8 scales are only valid for the input distribution they were
+    calibrated on, so YOLO frames go through the same letterbox (aspect kept,
+    gray padding) and scaling as ultralytics' predictor.
+    """
+    if detector_type == "yolo":
+        from ultralytics.data.augment import LetterBox
+
+        width, height = input_size
+        # Fixed-size ONNX input: no minimum-rectangle padding (auto=False), as in the predictor
+        letterbox = LetterBox(new_shape=(height, width), auto=False)
+
+        def preprocess(frame: np.ndarray) -> np.ndarray:
+            boxed = letterbox(image=frame)
+            rgb = boxed[..., ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+            return np.ascontiguousarray(rgb)[np.newaxis]
+        return preprocess
+    return lambda frame: preprocess_frame(frame, input_size)
+
+
+def quantize_model(
+    detector_type: str,
+    mode: str,
+    calibration_frames: Optional[List[np.ndarray]] = None
+) -> Optional[Path]:
+    """
+    Build (or reuse) an INT8 ONNX model for a backend.
+
+    Args:
+        detector_type: "yolo", "rfdetr" or "onnx"
+        mode: "dynamic" or "static"
+        calibration_frames: Frames for static calibration
+            (default: settings.QUANTIZATION_CALIBRATION_DIR)
+
+    Returns:
+        Path to the quantized model or None on failure
+    """
+    if mode not in QUANTIZATION_MODES:
+        logger.error(f"Unknown quantization mode: {mode}")
+        return None
+
+    try:
+        import onnxruntime as ort
+        from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+    except ImportError:
+        logger.error("onnxruntime not installed")
+        return None
+
+    fp32_path = _fp32_onnx_path(detector_type)
+    if fp32_path is None:
+        return None
+
+    if mode == "static" and calibration_frames is None:
+        calibration_dir = settings.BASE_DIR / settings.QUANTIZATION_CALIBRATION_DIR
+        if calibration_dir.exists():
+            calibration_frames = load_frames(calibration_dir, settings.QUANTIZATION_CALIBRATION_FRAMES)
+    if mode == "static" and not calibration_frames:
+        logger.warning("No calibration frames available, falling back to dynamic quantization")
+        mode = "dynamic"
+
+    output_path = quantized_model_path(fp32_path, mode)
+    if output_path.exists():
+        return output_path
+
+    # Write to a temp file first so concurrent workers never load a partial model
+    tmp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    start = time.time()
+    try:
+        if mode == "dynamic":
+            quantize_dynamic(str(fp32_path), str(tmp_path), weight_type=QuantType.QInt8)
+        else:
+            session = ort.InferenceSession(str(fp32_path), providers=["CPUExecutionProvider"])
+            model_input = session.get_inputs()[0]
+            _, _, height, width = model_input.shape
+            if not isinstance(height, int) or not isinstance(width, int):
+                height = width = settings.ONNX_INPUT_SIZE
+            preprocess = _calibration_preprocess(detector_type, (width, height))
+            reader = _CalibrationReader(model_input.name, [preprocess(f) for f in calibration_frames])
+            quantize_static(
+                str(fp32_path), str(tmp_path), reader,
+                quant_format=QuantFormat.QDQ,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                per_channel=True
+            )
+        os.replace(tmp_path, output_path)
+    except Exception as e:
+        logger.error(f"Failed to quantize {detector_type} model ({mode}): {e}")
+        if tmp_path.exists():
+            tmp_path.unlink()
+        return None
+
+    logger.info(f"Quantized {fp32_path.name} -> {output_path.name} ({mode}) in {time.time() - start:.1f}s")
+    return output_path
+
+
+class QuantizedONNXDetector(ONNXDetector):
+    """RF-DETR running an INT8 ONNX model; quantizes on first load."""
+
+    def __init__(self, mode: str):
+        super().__init__()
+        self.quantization = mode
+
+    def load_model(self) -> bool:
+        model_file = quantize_model("rfdetr", self.quantization)
+        if model_file is None:
+            return False
+        self.model_path = str(model_file)
+        return super().load_model()
+
+
+class QuantizedYOLODetector(YOLODetector):
+    """YOLO running an INT8 ONNX model through ultralytics; quantizes on first load."""
+
+    def __init__(self, mode: str):
+        super().__init__()
+        self.quantization = mode
+
+    def load_model(self) -> bool:
+        model_file = quantize_model("yolo", self.quantization)
+        if model_file is None:
+            return False
+        self.model_path = str(model_file)
+        return super().load_model()
+
+
+def create_quantized_detector(detector_type: str, mode: str) -> BaseDetector:
+    """Create an INT8 detector for a backend. The model is built lazily in load_model()."""
+    if detector_type == "yolo":
+        return QuantizedYOLODetector(mode)
+    return QuantizedONNXDetector(mode)
+
+
+def _match(reference: np.ndarray, candidate: np.ndarray, iou_threshold: float) -> List[Tuple[int, int, float]]:
+    """
+    Greedily match same-class boxes by IoU, highest candidate score first.
+
+    Returns:
+        List of (reference index, candidate index, iou)
+    """
+    if len(reference) == 0 or len(candidate) == 0:
+        return []
+
+    ref, cand = np.asarray(reference, dtype=np.float32), np.asarray(candidate, dtype=np.float32)
+    x1 = np.maximum(ref[:, None, 0], cand[None, :, 0])
+    y1 = np.maximum(ref[:, None, 1], cand[None, :, 1])
+    x2 = np.minimum(ref[:, None, 2], cand[None, :, 2])
+    y2 = np.minimum(ref[:, None, 3], cand[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_ref = (ref[:, 2] - ref[:, 0]) * (ref[:, 3] - ref[:, 1])
+    area_cand = (cand[:, 2] - cand[:, 0]) * (cand[:, 3] - cand[:, 1])
+    iou = inter / np.maximum(area_ref[:, None] + area_cand[None, :] - inter, 1e-9)
+    iou[ref[:, None, 5].astype(int) != cand[None, :, 5].astype(int)] = 0.0
+
+    matches = []
+    used = set()
+    for j in np.argsort(-cand[:, 4]):
+        i = int(np.argmax(iou[:, j]))
+        if iou[i, j] >= iou_threshold and i not in used:
+            used.add(i)
+            matches.append((i, int(j), float(iou[i, j])))
+            iou[i, :] = 0.0
+    return matches
+
+
+def _prf(matched: int, predicted: int, expected: int) -> Dict[str, float]:
+    precision = matched / predicted if predicted else 1.0
+    recall = matched / expected if expected else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+
+def evaluate_drift(
+    reference: BaseDetector,
+    candidate: BaseDetector,
+    frames: List[np.ndarray],
+    labels: Optional[List[np.ndarray]] = None,
+    iou_threshold: float = 0.5
+) -> Dict[str, Any]:
+    """
+    Compare a quantized detector with its FP32 reference on the same frames.
+
+    Args:
+        reference: FP32 detector
+        candidate: Quantized detector
+        frames: BGR frames
+        labels: Optional ground truth per frame ([x1, y1, x2, y2, _, cls])
+        iou_threshold: IoU for two boxes to count as the same detection
+
+    Returns:
+        Latency, agreement with FP32 and (with labels) accuracy of both
+    """
+    timings = {"reference": 0.0, "candidate": 0.0}
+    totals = {"reference": 0, "candidate": 0, "agreed": 0}
+    iou_sum = 0.0
+    score_diff_sum = 0.0
+    gt = {"labels": 0, "reference": 0, "candidate": 0}
+
+    for index, frame in enumerate(frames):
+        start = time.perf_counter()
+        ref_out = reference.predict(frame)
+        timings["reference"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        cand_out = candidate.predict(frame)
+        timings["candidate"] += time.perf_counter() - start
+
+        matches = _match(ref_out, cand_out, iou_threshold)
+        totals["reference"] += len(ref_out)
+        totals["candidate"] += len(cand_out)
+        totals["agreed"] += len(matches)
+        iou_sum += sum(m[2] for m in matches)
+        score_diff_sum += sum(abs(float(ref_out[i][4]) - float(cand_out[j][4])) for i, j, _ in matches)
+
+        if labels is not None:
+            gt["labels"] += len(labels[index])
+            gt["reference"] += len(_match(labels[index], ref_out, iou_threshold))
+            gt["candidate"] += len(_match(labels[index], cand_out, iou_threshold))
+
+    num_frames = max(1, len(frames))
+    reference_ms = timings["reference"] * 1000.0 / num_frames
+    candidate_ms = timings["candidate"] * 1000.0 / num_frames
+    report: Dict[str, Any] = {
+        "frames": len(frames),
+        "reference_ms": reference_ms,
+        "candidate_ms": candidate_ms,
+        "speedup": reference_ms / candidate_ms if candidate_ms else 0.0,
+        "agreement": {
+            **_prf(totals["agreed"], totals["candidate"], totals["reference"]),
+            "mean_iou": iou_sum / totals["agreed"] if totals["agreed"] else 0.0,
+            "mean_score_diff": score_diff_sum / totals["agreed"] if totals["agreed"] else 0.0
+        }
+    }
+
+    if labels is not None:
+        fp32 = _prf(gt["reference"], totals["reference"], gt["labels"])
+        int8 = _prf(gt["candidate"], totals["candidate"], gt["labels"])
+        report["accuracy"] = {"fp32": fp32, "int8": int8, "f1_drift": int8["f1"] - fp32["f1"]}
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an INT8 model and report drift against FP32")
+    parser.add_argument("--detector", default=settings.DETECTOR_TYPE, choices=["yolo", "rfdetr", "onnx"])
+    parser.add_argument("--mode", default="dynamic", choices=QUANTIZATION_MODES)
+    parser.add_argument("--calibration", type=Path, help="Image directory or video for static calibration")
+    parser.add_argument("--clip", type=Path, required=True, help="Labelled image directory or video to evaluate on")
+    parser.add_argument("--max-frames", type=int, default=200)
+    parser.add_argument("--iou", type=float, default=0.5)
+    args = parser.parse_args()
+
+    calibration = None
+    if args.calibration:
+        calibration = load_frames(args.calibration, settings.QUANTIZATION_CALIBRATION_FRAMES)
+    if quantize_model(args.detector, args.mode, calibration) is None:
+        raise SystemExit(1)
+
+    reference = create_detector(args.detector, quantization="none")
+    candidate = create_quantized_detector(args.detector, args.mode)
+    if not reference.load_model() or not candidate.load_model():
+        raise SystemExit(1)
+
+    frames, labels = load_labelled_clip(args.clip, args.max_frames)
+    print(json.dumps(evaluate_drift(reference, candidate, frames, labels, args.iou), indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
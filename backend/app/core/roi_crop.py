@@ -0,0 +1,174 @@
+"""
+ROI-cropped inference.
+
+Restricts detection to the parts of the frame covered by ROIs: either the
+padded bounding box of all zones ("union") or a few padded boxes around
+groups of zones ("tiles"). Detections are mapped back to full-frame pixels,
+so ROI checks and tracking work exactly as with full-frame inference.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+# Pixel rectangle (x1, y1, x2, y2)
+Region = Tuple[int, int, int, int]
+
+
+def _area(region: Region) -> int:
+    return (region[2] - region[0]) * (region[3] - region[1])
+
+
+def _merge(a: Region, b: Region) -> Region:
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _overlaps(a: Region, b: Region) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def compute_crop_regions(
+    rois: Optional[List[Dict[str, Any]]],
+    frame_width: int,
+    frame_height: int,
+    mode: str = settings.ROI_CROP_MODE,
+    padding: float = settings.ROI_CROP_PADDING,
+    max_tiles: int = settings.ROI_CROP_MAX_TILES,
+    max_coverage: float = settings.ROI_CROP_MAX_COVERAGE
+) -> Optional[List[Region]]:
+    """
+    Compute the frame regions to run the detector on.
+
+    Args:
+        rois: ROI data with normalized points (0-1)
+        frame_width: Frame width in pixels
+        frame_height: Frame height in pixels
+        mode: "off", "union" or "tiles"
+        padding: Padding around zones as a fraction of the frame width
+        max_tiles: Maximum number of tiles in "tiles" mode
+        max_coverage: Use the full frame when regions cover more than this fraction
+
+    Returns:
+        List of pixel regions, or None for full-frame inference
+    """
+    if mode == "off" or not rois or frame_width <= 0 or frame_height <= 0:
+        return None
+
+    pad = int(round(padding * frame_width))
+    boxes: List[Region] = []
+    for roi in rois:
+        points = roi.get("points", [])
+        if len(points) < 3:
+            continue
+        xs = [p["x"] * frame_width for p in points]
+        ys = [p["y"] * frame_height for p in points]
+        boxes.append((
+            max(0, int(min(xs)) - pad),
+            max(0, int(min(ys)) - pad),
+            min(frame_width, int(np.ceil(max(xs))) + pad),
+            min(frame_height, int(np.ceil(max(ys))) + pad)
+        ))
+    if not boxes:
+        return None
+
+    if mode == "union":
+        regions = [boxes[0]]
+        for box in boxes[1:]:
+            regions[0] = _merge(regions[0], box)
+    else:
+        regions = _group_tiles(boxes, max(1, max_tiles))
+
+    if sum(_area(r) for r in regions) > max_coverage * frame_width * frame_height:
+        return None
+    return regions
+
+
+def _group_tiles(boxes: List[Region], max_tiles: int) -> List[Region]:
+    """Merge overlapping boxes, then the cheapest pairs until at most max_tiles remain."""
+    regions = list(boxes)
+
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(regions)):
+            for j in range(i + 1, len(regions)):
+                if _overlaps(regions[i], regions[j]):
+                    regions[i] = _merge(regions[i], regions.pop(j))
+                    merged = True
+                    break
+            if merged:
+                break
+
+    while len(regions) > max_tiles:
+        # Merge the pair that adds the least extra area
+        best = None
+        for i in range(len(regions)):
+            for j in range(i + 1, len(regions)):
+                union = _merge(regions[i], regions[j])
+                cost = _area(union) - _area(regions[i]) - _area(regions[j])
+                if best is None or cost < best[0]:
+                    best = (cost, i, j, union)
+        _, i, j, union = best
+        regions.pop(j)
+        regions[i] = union
+        regions = _group_tiles(regions, len(regions))
+
+    return regions
+
+
+def _nms(detections: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Class-wise greedy NMS for boxes found twice where tiles overlap."""
+    order = np.argsort(-detections[:, 4])
+    detections = detections[order]
+    x1, y1, x2, y2 = detections[:, 0], detections[:, 1], detections[:, 2], detections[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+
+    keep = np.ones(len(detections), dtype=bool)
+    for i in range(len(detections)):
+        if not keep[i]:
+            continue
+        rest = np.arange(i + 1, len(detections))
+        rest = rest[keep[rest] & (detections[rest, 5] == detections[i, 5])]
+        if rest.size == 0:
+            continue
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        keep[rest[iou > iou_threshold]] = False
+    return detections[keep]
+
+
+def merge_region_outputs(
+    outputs: List[np.ndarray],
+    regions: List[Region],
+    scales: Optional[List[Tuple[float, float]]] = None,
+    iou_threshold: float = 0.5
+) -> np.ndarray:
+    """
+    Map per-region detections back to full-frame pixels and merge them.
+
+    Args:
+        outputs: One [x1, y1, x2, y2, conf, cls] array per region
+        regions: Regions the outputs were predicted on
+        scales: Optional (x, y) scale per region when the crops were resized
+        iou_threshold: IoU above which overlapping same-class boxes are merged
+
+    Returns:
+        numpy array of [x1, y1, x2, y2, conf, cls] in full-frame pixels
+    """
+    scales = scales or [(1.0, 1.0)] * len(regions)
+    shifted = []
+    for output, (rx, ry, _, _), (sx, sy) in zip(outputs, regions, scales):
+        if output is None or len(output) == 0:
+            continue
+        output = np.array(output, dtype=np.float64)
+        output[:, [0, 2]] = output[:, [0, 2]] * sx + rx
+        output[:, [1, 3]] = output[:, [1, 3]] * sy + ry
+        shifted.append(output)
+
+    if not shifted:
+        return np.empty((0, 6))
+    merged = np.concatenate(shifted)
+    return _nms(merged, iou_threshold) if len(shifted) > 1 else merged
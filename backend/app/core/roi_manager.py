@@ -3,21 +3,184 @@ ROI (Region of Interest) management module.
 """
 import json
 import logging
-from typing import List, Dict, Any, Optional, Tuple
-from shapely.geometry import Point, Polygon
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 
+import cv2
+import numpy as np
+
+from app.config import settings
 from app.schemas.roi import Point as ROIPoint
 from app.schemas.detection import DetectionBox
 
 logger = logging.getLogger(__name__)
 
+# Detector frame size assumed when the caller gives no canvas size
+DET_WIDTH = 640.0
+DET_HEIGHT = 360.0
+
+
+def polygon_edges(polygon) -> np.ndarray:
+    """
+    Edges of every ring of a shapely (Multi)Polygon.
+
+    Returns:
+        (E, 4) array of [x1, y1, x2, y2]; holes and extra parts are included,
+        so an even-odd crossing test handles them
+    """
+    rings = []
+    for part in getattr(polygon, "geoms", [polygon]):
+        rings.append(part.exterior)
+        rings.extend(part.interiors)
+    edges = []
+    for ring in rings:
+        coords = np.asarray(ring.coords, dtype=np.float64)
+        edges.append(np.hstack([coords[:-1], coords[1:]]))
+    return np.vstack(edges) if edges else np.empty((0, 4))
+
+
+def points_in_polygons(points: np.ndarray, edges: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Even-odd point-in-polygon test of many points against many polygons at once.
+
+    Args:
+        points: (N, 2) points
+        edges: (E, 4) polygon edges [x1, y1, x2, y2], one polygon after another
+        offsets: (R,) index of each polygon's first edge
+
+    Returns:
+        (N, R) bool matrix, True where a point lies inside a polygon
+    """
+    if len(points) == 0 or len(offsets) == 0:
+        return np.zeros((len(points), len(offsets)), dtype=bool)
+    px, py = points[:, 0:1], points[:, 1:2]
+    x1, y1, x2, y2 = edges.T
+    # Edges crossing the horizontal line through each point (horizontal edges never do)
+    straddles = (y1 > py) != (y2 > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_cross = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+    crossings = (straddles & (px < x_cross)).astype(np.int32)
+    return (np.add.reduceat(crossings, offsets, axis=1) & 1).astype(bool)
+
+
+# Fractional bits of the sub-pixel coordinates passed to cv2 drawing calls
+_DRAW_SHIFT = 8
+
+
+def _to_pixels(coords, scale: np.ndarray) -> np.ndarray:
+    """Normalized coordinates -> fixed-point pixel coordinates (pixel centers at integers)."""
+    return np.round((np.asarray(coords, dtype=np.float64) * scale - 0.5) * (1 << _DRAW_SHIFT)).astype(np.int32)
+
+
+def fill_polygon(canvas: np.ndarray, polygon, scale: np.ndarray):
+    """
+    Draw a normalized shapely (Multi)Polygon into a uint8 canvas as 1s.
+
+    Args:
+        canvas: (H, W) uint8 canvas, drawn in place
+        polygon: Polygon in normalized coordinates
+        scale: [width, height] of the canvas
+    """
+    for part in getattr(polygon, "geoms", [polygon]):
+        # Holes are cleared on their own layer, so earlier drawings stay
+        layer = np.zeros_like(canvas) if part.interiors else canvas
+        cv2.fillPoly(layer, [_to_pixels(part.exterior.coords, scale)], 1, cv2.LINE_8, _DRAW_SHIFT)
+        if part.interiors:
+            holes = [_to_pixels(hole.coords, scale) for hole in part.interiors]
+            cv2.fillPoly(layer, holes, 0, cv2.LINE_8, _DRAW_SHIFT)
+            canvas |= layer
+
+
+class LabelRaster:
+    """
+    Grid over normalized frame space holding, per cell, bitmasks of ROIs.
+
+    ``inside`` has bit b set where ROI b covers the whole cell, ``edge`` where
+    the ROI's boundary may cross the cell; only those points need an exact test.
+    Holds up to 64 ROIs (one uint64 bit each).
+    """
+
+    MAX_ROIS = 64
+
+    def __init__(self, grid: int, rois: Dict[int, Dict[str, Any]]):
+        """
+        Rasterize ROIs.
+
+        Args:
+            grid: Cells per side
+            rois: roi_id -> ROI data with "polygon" and "edges", at most MAX_ROIS
+        """
+        self.grid = grid
+        self.bits: Dict[int, int] = {}
+        self.inside = np.zeros((grid, grid), dtype=np.uint64)
+        self.edge = np.zeros((grid, grid), dtype=np.uint64)
+
+        scale = np.array([grid, grid], dtype=np.float64)
+        kernel = np.ones((3, 3), dtype=np.uint8)
+        for bit, (roi_id, roi) in enumerate(rois.items()):
+            self.bits[roi_id] = bit
+            flag = np.uint64(1 << bit)
+            inside = np.zeros((grid, grid), dtype=np.uint8)
+            fill_polygon(inside, roi["polygon"], scale)
+
+            # Cells the boundary passes through, grown by one cell so the set is
+            # conservative; fill rounding only affects cells in this set
+            boundary = np.zeros((grid, grid), dtype=np.uint8)
+            for x1, y1, x2, y2 in _to_pixels(roi["edges"], np.tile(scale, 2)):
+                cv2.line(boundary, (int(x1), int(y1)), (int(x2), int(y2)), 1, 1, cv2.LINE_8, _DRAW_SHIFT)
+            boundary = cv2.dilate(boundary, kernel).astype(bool)
+
+            self.edge[boundary] |= flag
+            self.inside[inside.astype(bool) & ~boundary] |= flag
+
+    def lookup(self, points: np.ndarray, roi_ids: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Classify normalized points with one index per point.
+
+        Returns:
+            (inside, uncertain) (N, R) bool matrices; uncertain entries (boundary
+            cells, points off the grid, ROIs not in the raster) need an exact test
+        """
+        cells = np.floor(points * self.grid).astype(np.intp)
+        on_grid = ((cells >= 0) & (cells < self.grid)).all(axis=1)
+        cells = cells.clip(0, self.grid - 1)
+        rows, cols = cells[:, 1], cells[:, 0]
+
+        shifts = np.array([self.bits.get(roi_id, 0) for roi_id in roi_ids], dtype=np.uint64)
+        inside = ((self.inside[rows, cols][:, None] >> shifts) & np.uint64(1)).astype(bool)
+        uncertain = ((self.edge[rows, cols][:, None] >> shifts) & np.uint64(1)).astype(bool)
+        uncertain[~on_grid] = True
+        uncertain[:, [roi_id not in self.bits for roi_id in roi_ids]] = True
+        return inside & ~uncertain, uncertain
+
+
+def foot_points(detections: Sequence) -> np.ndarray:
+    """Bottom-center (feet) of detection boxes as an (N, 2) array."""
+    return np.array([(d.center_x, d.y2) for d in detections], dtype=np.float64).reshape(-1, 2)
+
 
 class ROIManager:
     """Manages ROI operations and collision detection."""
 
-    def __init__(self):
-        """Initialize ROI manager."""
+    def __init__(self, raster_grid: Optional[int] = None):
+        """
+        Initialize ROI manager.
+
+        Args:
+            raster_grid: Cells per side of the label raster used for point lookups
+                (default: settings.ROI_RASTER_GRID; 0 = exact polygon tests only)
+        """
         self._rois: Dict[int, Dict[str, Any]] = {}  # roi_id -> roi_data
+        self.raster_grid = settings.ROI_RASTER_GRID if raster_grid is None else raster_grid
+        # Derived data, dropped whenever the ROIs change (see _invalidate)
+        # Stacked polygon edges per tuple of ROI IDs, for membership matrices
+        self._edge_cache: Dict[Tuple[int, ...], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._raster: Optional[LabelRaster] = None
+        self._mask_cache: Dict[Tuple[Optional[int], int, int], np.ndarray] = {}
+
+    def _invalidate(self):
+        self._edge_cache.clear()
+        self._raster = None
+        self._mask_cache.clear()
 
     def add_roi(self, roi_id: int, points: List[ROIPoint], name: str = "", color: str = "#FF0000", zone_type: str = "warning"):
         """
@@ -30,6 +193,9 @@ class ROIManager:
             color: Display color
             zone_type: "warning" or "danger"
         """
+        # shapely is imported on first use so processes without ROIs never load it
+        from shapely.geometry import Polygon
+
         try:
             # Detect if points are in pixel space (e.g., 1280x720) or normalized (0-1)
             # Find max values to determine scaling
@@ -69,8 +235,10 @@ class ROIManager:
                 "color": color,
                 "zone_type": zone_type,
                 "points": normalized_points,
-                "polygon": polygon
+                "polygon": polygon,
+                "edges": polygon_edges(polygon)
             }
+            self._invalidate()
             logger.info(f"Added/Updated ROI {roi_id}: {name} ({zone_type}) - Normalized to {scale_x}x{scale_y}")
 
         except Exception as e:
@@ -80,51 +248,147 @@ class ROIManager:
         """Remove a ROI from the manager."""
         if roi_id in self._rois:
             del self._rois[roi_id]
+            self._invalidate()
             logger.debug(f"Removed ROI {roi_id}")
 
     def clear_rois(self):
         """Clear all ROIs."""
         self._rois.clear()
+        self._invalidate()
 
     def get_roi(self, roi_id: int) -> Optional[Dict[str, Any]]:
         """Get ROI data by ID."""
         roi = self._rois.get(roi_id)
         if roi:
-            return {k: v for k, v in roi.items() if k != "polygon"}
+            return {k: v for k, v in roi.items() if k not in ("polygon", "edges")}
         return None
 
     def get_all_rois(self) -> List[Dict[str, Any]]:
         """Get all ROIs without polygon objects."""
         return [
-            {k: v for k, v in roi.items() if k != "polygon"}
+            {k: v for k, v in roi.items() if k not in ("polygon", "edges")}
             for roi in self._rois.values()
         ]
 
+    def _stacked_edges(self, roi_ids: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Edges of the known ROIs among roi_ids, their offsets and their column in roi_ids."""
+        cached = self._edge_cache.get(roi_ids)
+        if cached is None:
+            columns = [i for i, roi_id in enumerate(roi_ids) if roi_id in self._rois]
+            edges = [self._rois[roi_ids[i]]["edges"] for i in columns]
+            offsets = np.cumsum([0] + [len(e) for e in edges[:-1]]).astype(np.intp) if edges else np.empty(0, np.intp)
+            cached = (np.vstack(edges) if edges else np.empty((0, 4)), offsets, np.array(columns, dtype=np.intp))
+            self._edge_cache[roi_ids] = cached
+        return cached
+
+    def _exact_contains(self, points: np.ndarray, roi_ids: Tuple[int, ...]) -> np.ndarray:
+        """(N, R) membership from the polygon edges."""
+        edges, offsets, columns = self._stacked_edges(roi_ids)
+        result = np.zeros((len(points), len(roi_ids)), dtype=bool)
+        if len(columns):
+            result[:, columns] = points_in_polygons(points, edges, offsets)
+        return result
+
+    def _get_raster(self) -> Optional[LabelRaster]:
+        """Label raster of the current ROIs, built on first use after a change."""
+        if self.raster_grid <= 0 or not self._rois:
+            return None
+        if self._raster is None:
+            # ROIs past the raster's capacity are always tested exactly
+            rois = dict(list(self._rois.items())[:LabelRaster.MAX_ROIS])
+            self._raster = LabelRaster(self.raster_grid, rois)
+        return self._raster
+
+    def _contains(self, points: np.ndarray, roi_ids: Optional[Sequence[int]]) -> np.ndarray:
+        """(N, R) membership of points, in the ROIs' own coordinate space."""
+        roi_ids = tuple(self._rois) if roi_ids is None else tuple(roi_ids)
+        raster = self._get_raster()
+        if raster is None or len(points) == 0:
+            return self._exact_contains(points, roi_ids)
+
+        result, uncertain = raster.lookup(points, roi_ids)
+        rows = np.flatnonzero(uncertain.any(axis=1))
+        if len(rows):
+            exact = self._exact_contains(points[rows], roi_ids)
+            result[rows] = np.where(uncertain[rows], exact, result[rows])
+        return result
+
+    def zone_mask(self, width: int, height: int, roi_id: Optional[int] = None) -> np.ndarray:
+        """
+        Pixel mask of a zone, e.g. for heatmaps or motion masks.
+
+        Cached per size until the ROIs change; do not modify the returned array.
+
+        Args:
+            width: Mask width in pixels
+            height: Mask height in pixels
+            roi_id: ROI to draw (default: union of all ROIs)
+
+        Returns:
+            (height, width) bool mask
+        """
+        key = (roi_id, width, height)
+        mask = self._mask_cache.get(key)
+        if mask is None:
+            canvas = np.zeros((height, width), dtype=np.uint8)
+            roi_ids = list(self._rois) if roi_id is None else [roi_id]
+            for rid in roi_ids:
+                if rid in self._rois:
+                    fill_polygon(canvas, self._rois[rid]["polygon"], np.array([width, height], dtype=np.float64))
+            mask = canvas.astype(bool)
+            self._mask_cache[key] = mask
+        return mask
+
+    def points_in_rois(
+        self,
+        points: np.ndarray,
+        roi_ids: Optional[Sequence[int]] = None,
+        canvas_width: float = 0.0,
+        canvas_height: float = 0.0
+    ) -> np.ndarray:
+        """
+        Check many detector-pixel points against many ROIs at once.
+
+        Args:
+            points: (N, 2) pixel coordinates
+            roi_ids: ROIs to check, one column each (default: all, in insertion order).
+                Unknown IDs give an all-False column.
+            canvas_width: Frame width the points refer to (default: DET_WIDTH)
+            canvas_height: Frame height the points refer to (default: DET_HEIGHT)
+
+        Returns:
+            (N, len(roi_ids)) bool matrix
+        """
+        # ROIs are stored normalized; the points are normalized the same way
+        scale = np.array([
+            canvas_width if canvas_width > 0 else DET_WIDTH,
+            canvas_height if canvas_height > 0 else DET_HEIGHT
+        ])
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return self._contains(points / scale, roi_ids)
+
+    def detections_in_rois(
+        self,
+        detections: Sequence,
+        roi_ids: Optional[Sequence[int]] = None,
+        canvas_width: float = 0.0,
+        canvas_height: float = 0.0
+    ) -> np.ndarray:
+        """
+        Check the feet (bottom-center) of many detections against many ROIs.
+
+        Returns:
+            (len(detections), len(roi_ids)) bool matrix
+        """
+        return self.points_in_rois(foot_points(detections), roi_ids, canvas_width, canvas_height)
+
     def is_point_in_roi(self, roi_id: int, x: float, y: float, canvas_width: float = 0.0, canvas_height: float = 0.0) -> bool:
         """
         Check if a point is inside a ROI.
         Expects x, y as pixel coordinates from the detector.
         Standardizes to normalized space for the comparison.
         """
-        roi = self._rois.get(roi_id)
-        if roi is None:
-            return False
-
-        # Detection frame resolution (standardized in our system)
-        # However, we've seen detector output can be aligned with 'canvas_width'
-        DET_WIDTH = 640.0
-        DET_HEIGHT = 360.0
-        
-        # Use provided dimensions if available, otherwise fallback to DET_WIDTH/DET_HEIGHT
-        eff_width = canvas_width if canvas_width > 0 else DET_WIDTH
-        eff_height = canvas_height if canvas_height > 0 else DET_HEIGHT
-        
-        # Normalize the detection point
-        norm_x = x / eff_width
-        norm_y = y / eff_height
-        
-        point = Point(norm_x, norm_y)
-        return roi["polygon"].contains(point)
+        return bool(self.points_in_rois(np.array([[x, y]]), [roi_id], canvas_width, canvas_height)[0, 0])
 
     def is_detection_in_roi(self, roi_id: int, detection: DetectionBox, canvas_width: float = 0.0, canvas_height: float = 0.0) -> bool:
         """
@@ -155,6 +419,8 @@ class ROIManager:
         if roi is None:
             return False
 
+        from shapely.geometry import Polygon
+
         try:
             # Create box polygon from detection
             box = Polygon([
@@ -186,12 +452,9 @@ class ROIManager:
         Returns:
             List of ROI IDs
         """
-        point = Point(x, y)
-        return [
-            roi_id
-            for roi_id, roi in self._rois.items()
-            if roi["polygon"].contains(point)
-        ]
+        roi_ids = list(self._rois)
+        inside = self._contains(np.array([[x, y]], dtype=np.float64), roi_ids)[0]
+        return [roi_id for roi_id, hit in zip(roi_ids, inside) if hit]
 
     def get_rois_containing_detection(self, detection: DetectionBox) -> List[int]:
         """
@@ -220,17 +483,15 @@ class ROIManager:
         Returns:
             Dict mapping roi_id to list of detections inside it
         """
-        result: Dict[int, List[DetectionBox]] = {roi_id: [] for roi_id in self._rois}
-
-        for detection in detections:
-            if class_filter and detection.class_name not in class_filter:
-                continue
-
-            for roi_id in self._rois:
-                if self.is_detection_in_roi(roi_id, detection):
-                    result[roi_id].append(detection)
-
-        return result
+        if class_filter:
+            detections = [d for d in detections if d.class_name in class_filter]
+        roi_ids = list(self._rois)
+        inside = self.detections_in_rois(detections, roi_ids)
+
+        return {
+            roi_id: [d for d, hit in zip(detections, inside[:, column]) if hit]
+            for column, roi_id in enumerate(roi_ids)
+        }
 
     def load_rois_from_json(self, json_data: str) -> int:
         """
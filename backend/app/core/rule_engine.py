@@ -4,13 +4,15 @@ Safety rule engine for evaluating detection results.
 import logging
 import time
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional, Set
+from typing import List, Dict, Any, Optional, Set, Union
 from collections import defaultdict
 from enum import Enum
 
 from app.config import settings
-from app.schemas.detection import DetectionResult, DetectionBox
+from app.schemas.detection import DetectionResult
+from app.core.detections import Box, FrameDetections
 from app.core.roi_manager import ROIManager
+from app.core.scene_index import SceneIndex
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +46,7 @@ class SafetyEvent:
     detection_data: Optional[Dict[str, Any]] = None
     camera_id: Optional[int] = None
     timestamp: float = field(default_factory=time.time)
+    source_file: Optional[str] = None  # Set for events found in recorded video
 
 
 @dataclass
@@ -181,21 +184,24 @@ class RuleEngine:
 
     def evaluate(
         self,
-        detection: DetectionResult,
+        detection: Union[FrameDetections, DetectionResult],
         camera_id: int,
         active_roi_ids: Optional[List[int]] = None,
         canvas_width: float = 0.0,
-        canvas_height: float = 0.0
+        canvas_height: float = 0.0,
+        scene: Optional[SceneIndex] = None
     ) -> List[SafetyEvent]:
         """
         Evaluate detection result against safety rules.
 
         Args:
-            detection: Detection result from YOLO
+            detection: Detections for the frame (a pydantic DetectionResult is converted)
             camera_id: Camera ID
             active_roi_ids: List of active ROI IDs to check
             canvas_width: Actual video width
             canvas_height: Actual video height
+            scene: Index of this frame built by the caller, to share it with
+                metrics and overlays (built here when omitted)
 
         Returns:
             List of safety events (only new events after persistence/cooldown)
@@ -203,25 +209,23 @@ class RuleEngine:
         events: List[SafetyEvent] = []
         current_time = detection.timestamp if detection.timestamp is not None else time.time()
 
-        # Get detections by class
-        persons = [d for d in detection.detections if d.class_name == "person"]
-        helmets = [d for d in detection.detections if d.class_name == "helmet"]
-        masks = [d for d in detection.detections if d.class_name == "mask"]
-        extinguishers = [d for d in detection.detections if d.class_name == "fire_extinguisher"]
+        if isinstance(detection, DetectionResult):
+            detection = FrameDetections.from_result(detection)
 
         # Check each active ROI
         if active_roi_ids:
+            # Class buckets and ROI membership, computed once for all ROIs
+            if scene is None:
+                scene = SceneIndex(detection, self.roi_manager, active_roi_ids, canvas_width, canvas_height)
             for roi_id in active_roi_ids:
                 roi_events = self._evaluate_roi(
                     roi_id=roi_id,
                     camera_id=camera_id,
-                    persons=persons,
-                    helmets=helmets,
-                    masks=masks,
-                    extinguishers=extinguishers,
-                    current_time=current_time,
-                    canvas_width=canvas_width,
-                    canvas_height=canvas_height
+                    persons_in_roi=scene.persons_in(roi_id),
+                    helmets=scene.helmets,
+                    masks=scene.masks,
+                    extinguisher_in_roi=scene.has_extinguisher(roi_id),
+                    current_time=current_time
                 )
                 events.extend(roi_events)
 
@@ -231,15 +235,13 @@ class RuleEngine:
         self,
         roi_id: int,
         camera_id: int,
-        persons: List[DetectionBox],
-        helmets: List[DetectionBox],
-        masks: List[DetectionBox],
-        extinguishers: List[DetectionBox],
-        current_time: float,
-        canvas_width: float = 0.0,
-        canvas_height: float = 0.0
+        persons_in_roi: List[Box],
+        helmets: List[Box],
+        masks: List[Box],
+        extinguisher_in_roi: bool,
+        current_time: float
     ) -> List[SafetyEvent]:
-        """Evaluate rules for a single ROI."""
+        """Evaluate rules for a single ROI, given the persons inside it."""
         events: List[SafetyEvent] = []
         
         # Get ROI info
@@ -247,12 +249,6 @@ class RuleEngine:
         roi_name = roi_data.get("name", f"#{roi_id}") if roi_data else f"#{roi_id}"
         zone_type = roi_data.get("zone_type", "warning") if roi_data else "warning"
 
-        # Find persons in this ROI
-        persons_in_roi = [
-            p for p in persons
-            if self.roi_manager.is_detection_in_roi(roi_id, p, canvas_width, canvas_height)
-        ]
-        
         # Update individual person stay times
         for person in persons_in_roi:
             if person.track_id is not None:
@@ -393,12 +389,7 @@ class RuleEngine:
             ext_key = self._get_state_key(EventType.FIRE_EXTINGUISHER_MISSING.value, roi_id)
             ext_state = self._states[ext_key]
 
-            # Check if any extinguisher in ROI
-            ext_in_roi = any(
-                self.roi_manager.is_detection_in_roi(roi_id, e)
-                for e in extinguishers
-            )
-            ext_missing = not ext_in_roi
+            ext_missing = not extinguisher_in_roi
 
             if self._check_persistence(ext_state, current_time, ext_missing):
                 if not ext_state.event_fired and self._check_cooldown(ext_state, current_time):
@@ -419,8 +410,8 @@ class RuleEngine:
 
     def _has_ppe_near_persons(
         self,
-        persons: List[DetectionBox],
-        ppe_items: List[DetectionBox],
+        persons: List[Box],
+        ppe_items: List[Box],
         threshold: float = 100.0
     ) -> bool:
         """
@@ -467,9 +458,10 @@ class RuleEngine:
     def get_roi_metrics(
         self,
         active_roi_ids: List[int],
-        persons: List[DetectionBox] = None,
+        persons: List[Box] = None,
         canvas_width: float = 0.0,
-        canvas_height: float = 0.0
+        canvas_height: float = 0.0,
+        scene: Optional[SceneIndex] = None
     ) -> Dict[int, Dict[str, Any]]:
         """
         Get real-time metrics for each active ROI.
@@ -479,12 +471,16 @@ class RuleEngine:
             persons: Current person detections (optional, for real-time count)
             canvas_width: video width
             canvas_height: video height
+            scene: Index of the current frame; its membership gives the
+                real-time counts (takes precedence over persons)
 
         Returns:
             Dict mapping roi_id to its metrics (count, stay_times).
         """
         metrics = {}
-        for roi_id in active_roi_ids:
+        if scene is None and persons is not None:
+            person_in_rois = self.roi_manager.detections_in_rois(persons, active_roi_ids, canvas_width, canvas_height)
+        for column, roi_id in enumerate(active_roi_ids):
             roi_data = self.roi_manager.get_roi(roi_id)
             zone_type = roi_data.get("zone_type", "warning") if roi_data else "warning"
             
@@ -493,12 +489,10 @@ class RuleEngine:
                                if key[0] == roi_id]
             
             # For count, prioritize current frame detections if provided
-            if persons is not None:
-                current_in_roi = [
-                    p for p in persons
-                    if self.roi_manager.is_detection_in_roi(roi_id, p, canvas_width, canvas_height)
-                ]
-                count = len(current_in_roi)
+            if scene is not None:
+                count = scene.person_count(roi_id)
+            elif persons is not None:
+                count = int(person_in_rois[:, column].sum())
             else:
                 count = len(tracked_persons)
 
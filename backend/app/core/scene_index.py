@@ -0,0 +1,98 @@
+"""
+Per-frame scene index.
+
+Built once per frame and shared by the rule engine, the ROI metrics and the
+overlay: detections bucketed by class in one pass, and the persons x ROIs
+membership matrix computed once, so no consumer repeats class filtering or
+ROI geometry for the same frame.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.detections import Box, FrameDetections
+from app.core.roi_manager import ROIManager
+
+
+class SceneIndex:
+    """Class buckets and ROI membership of one frame's detections."""
+
+    def __init__(
+        self,
+        detection: Optional[FrameDetections],
+        roi_manager: ROIManager,
+        roi_ids: Optional[Sequence[int]] = None,
+        canvas_width: float = 0.0,
+        canvas_height: float = 0.0
+    ):
+        """
+        Index a frame.
+
+        Args:
+            detection: Detections for the frame (None = nothing detected)
+            roi_manager: ROIs of the frame's camera
+            roi_ids: Active ROI IDs (default: none)
+            canvas_width: Frame width the boxes refer to
+            canvas_height: Frame height the boxes refer to
+        """
+        self.detection = detection if detection is not None else FrameDetections.empty()
+        self.roi_manager = roi_manager
+        self.roi_ids: List[int] = list(roi_ids or [])
+        self._columns = {roi_id: column for column, roi_id in enumerate(self.roi_ids)}
+        self._rois: Optional[List[Dict[str, Any]]] = None
+
+        # Class buckets: one sort of the class column, rows shared with detection.boxes()
+        boxes = self.detection.boxes()
+        names, inverse = np.unique(self.detection.class_name.astype(str), return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(names) + 1))
+        self._buckets: Dict[str, List[Box]] = {
+            name: [boxes[i] for i in order[bounds[k]:bounds[k + 1]]]
+            for k, name in enumerate(names.tolist())
+        }
+
+        # Persons are checked at the canvas size; extinguishers, as always, at detector size
+        self.person_in_rois = roi_manager.detections_in_rois(self.persons, self.roi_ids, canvas_width, canvas_height)
+        self.extinguisher_in_rois = roi_manager.detections_in_rois(self.extinguishers, self.roi_ids)
+
+    def of_class(self, name: str) -> List[Box]:
+        """Detections of one category, in detection order."""
+        return self._buckets.get(name, [])
+
+    @property
+    def persons(self) -> List[Box]:
+        return self.of_class("person")
+
+    @property
+    def helmets(self) -> List[Box]:
+        return self.of_class("helmet")
+
+    @property
+    def masks(self) -> List[Box]:
+        return self.of_class("mask")
+
+    @property
+    def extinguishers(self) -> List[Box]:
+        return self.of_class("fire_extinguisher")
+
+    def persons_in(self, roi_id: int) -> List[Box]:
+        """Persons whose feet are inside a ROI (none for ROIs outside roi_ids)."""
+        column = self._columns.get(roi_id)
+        if column is None:
+            return []
+        return [p for p, inside in zip(self.persons, self.person_in_rois[:, column]) if inside]
+
+    def person_count(self, roi_id: int) -> int:
+        column = self._columns.get(roi_id)
+        return int(self.person_in_rois[:, column].sum()) if column is not None else 0
+
+    def has_extinguisher(self, roi_id: int) -> bool:
+        column = self._columns.get(roi_id)
+        return bool(self.extinguisher_in_rois[:, column].any()) if column is not None else False
+
+    @property
+    def rois(self) -> List[Dict[str, Any]]:
+        """ROI data for drawing overlays, read once per frame."""
+        if self._rois is None:
+            self._rois = self.roi_manager.get_all_rois()
+        return self._rois
@@ -1,11 +1,16 @@
 """
 BoT-SORT (Bottleneck-SORT) tracking implementation.
-Provides SOTA tracking for RF-DETR detections.
+Provides SOTA tracking for RF-DETR detections, with a numpy IoU tracker
+used on its own or as the fallback when ultralytics' BOTSORT is unavailable.
 """
+import copy
+import time
 import numpy as np
 import logging
 from typing import List, Dict, Any, Optional
 
+from app.config import settings
+
 logger = logging.getLogger(__name__)
 
 class BoTSORTTracker:
@@ -16,8 +21,24 @@ class BoTSORTTracker:
     """
     
     def __init__(self, track_high_thresh=0.5, track_low_thresh=0.1, new_track_thresh=0.6, 
-                 track_buffer=30, match_thresh=0.8, frame_rate=30):
+                 track_buffer=30, match_thresh=0.8, frame_rate=30, gmc_method=None, gmc_downscale=None):
         self.tracker = None
+        self._last_tracks = np.empty((0, 7))
+        # Camera motion compensation; "none" skips it entirely (fixed cameras)
+        self.gmc_method = gmc_method or settings.TRACKER_GMC_METHOD
+        self.gmc_downscale = max(1, gmc_downscale or settings.TRACKER_GMC_DOWNSCALE)
+
+        # Timing: GMC is measured inside BOTSORT.update, association is the rest
+        self.updates = 0
+        self.total_update_ms = 0.0
+        self.total_gmc_ms = 0.0
+        self.last_update_ms = 0.0
+        self.last_gmc_ms = 0.0
+
+        # Used when BOTSORT is missing, and for good once it fails, so IDs stay stable
+        self._max_track_id = 0
+        self._fallback = IoUTracker(track_high_thresh, track_low_thresh, new_track_thresh,
+                                    track_buffer, match_thresh, frame_rate)
         self._init_tracker(track_high_thresh, track_low_thresh, new_track_thresh, 
                            track_buffer, match_thresh, frame_rate)
 
@@ -35,19 +56,37 @@ class BoTSORTTracker:
                 new_track_thresh=new_track_thresh,
                 track_buffer=track_buffer,
                 match_thresh=match_thresh,
-                gmc_method='sparseOptFlow', # Camera Motion Compensation
+                gmc_method=self.gmc_method, # Camera Motion Compensation
                 proximity_thresh=0.5,
                 appearance_thresh=0.25,
                 with_reid=False # Set to False for real-time performance without ReID model
             )
             
             self.tracker = BOTSORT(args=args, frame_rate=frame_rate)
-            logger.info("Successfully initialized ultralytics BoT-SORT")
+            self._instrument_gmc()
+            logger.info(f"Successfully initialized ultralytics BoT-SORT (GMC: {self.gmc_method})")
         except Exception as e:
             logger.warning(f"Failed to load ultralytics BOTSORT: {e}. Using fallback tracker.")
             # Fallback to a simpler tracker if ultralytics version is unavailable
             self.tracker = None
 
+    def _instrument_gmc(self):
+        """Run GMC on downscaled frames and time each call."""
+        gmc = getattr(self.tracker, "gmc", None)
+        if gmc is None:
+            return
+        gmc.downscale = self.gmc_downscale
+        apply = gmc.apply
+
+        def timed_apply(raw_frame, detections=None):
+            start = time.perf_counter()
+            try:
+                return apply(raw_frame, detections)
+            finally:
+                self.last_gmc_ms += (time.perf_counter() - start) * 1000.0
+
+        gmc.apply = timed_apply
+
     def update(self, detections: np.ndarray, frame: np.ndarray) -> np.ndarray:
         """
         Update tracker with new detections.
@@ -56,20 +95,70 @@ class BoTSORTTracker:
             detections: numpy array of [x1, y1, x2, y2, conf, cls]
             frame: raw BGR frame for Camera Motion Compensation
             
+        Returns:
+            numpy array of [x1, y1, x2, y2, track_id, conf, cls]
+        """
+        self.last_gmc_ms = 0.0
+        start = time.perf_counter()
+        tracks = self._update(detections, frame)
+        self.last_update_ms = (time.perf_counter() - start) * 1000.0
+
+        self.updates += 1
+        self.total_update_ms += self.last_update_ms
+        self.total_gmc_ms += self.last_gmc_ms
+        self._last_tracks = tracks
+        return tracks
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-update timing, with GMC separated from association."""
+        updates = max(1, self.updates)
+        return {
+            "backend": "botsort" if self.tracker is not None else "iou",
+            "gmc_method": self.gmc_method,
+            "gmc_downscale": self.gmc_downscale,
+            "updates": self.updates,
+            "avg_gmc_ms": self.total_gmc_ms / updates,
+            "avg_association_ms": (self.total_update_ms - self.total_gmc_ms) / updates,
+            "last_gmc_ms": self.last_gmc_ms,
+            "last_association_ms": self.last_update_ms - self.last_gmc_ms
+        }
+
+    def predict(self, progress: float = 1.0) -> np.ndarray:
+        """
+        Advance the active tracks with the Kalman motion model, without detections.
+
+        Used for frames between detector runs. The tracker state is left
+        untouched, so the next update() behaves as if no prediction happened.
+
+        Args:
+            progress: Fraction of one update interval elapsed since the last update
+
         Returns:
             numpy array of [x1, y1, x2, y2, track_id, conf, cls]
         """
         if self.tracker is None:
-            # Minimal fallback: return detections with index as simple ID
-            # This is NOT real tracking but avoids crashing
-            if len(detections) == 0:
-                return np.empty((0, 7))
-            
-            tracked = []
-            for i, det in enumerate(detections):
-                # [x1, y1, x2, y2, id, conf, cls]
-                tracked.append([det[0], det[1], det[2], det[3], i + 1, det[4], det[5]])
-            return np.array(tracked)
+            return self._fallback.predict(progress)
+
+        try:
+            rows = []
+            for track in self.tracker.tracked_stracks:
+                if not track.is_activated or track.mean is None:
+                    continue
+                kalman_filter = track.kalman_filter or track.shared_kalman
+                predicted, _ = kalman_filter.predict(track.mean.copy(), track.covariance.copy())
+                # Interpolate within the interval; a shallow copy converts the state to a box
+                ghost = copy.copy(track)
+                ghost.mean = track.mean + (predicted - track.mean) * progress
+                rows.append([*ghost.xyxy, track.track_id, track.score, track.cls])
+            return np.array(rows, dtype=np.float64) if rows else np.empty((0, 7))
+        except Exception as e:
+            logger.debug(f"Track prediction failed, holding last boxes: {e}")
+            return self._last_tracks
+
+    def _update(self, detections: np.ndarray, frame: np.ndarray) -> np.ndarray:
+        """Run the underlying tracker (or the fallback ID assignment)."""
+        if self.tracker is None:
+            return self._fallback.update(detections, frame)
 
         try:
             # Convert to ultralytics expected format and update
@@ -82,21 +171,227 @@ class BoTSORTTracker:
             
             # BoTSORT typically returns tracked objects with IDs
             # Output format: [x1, y1, x2, y2, id, conf, cls]
+            self._max_track_id = max(self._max_track_id, int(np.max(tracks[:, 4])))
             return tracks
         except Exception as e:
             # Catching the 'numpy.ndarray' object has no attribute 'conf' error
             # This often happens due to version mismatches in ultralytics.
-            # Fallback: simple ID assignment
-            if len(detections) == 0:
-                return np.empty((0, 7))
-            
-            tracked = []
-            for i, det in enumerate(detections):
-                # [x1, y1, x2, y2, id, conf, cls]
-                # Use a large number offset for fallback IDs to avoid collision with real ones
-                tracked.append([det[0], det[1], det[2], det[3], 1000 + i, det[4], det[5]])
-            return np.array(tracked)
-
-def get_tracker(method: str = "bot_sort", **kwargs) -> BoTSORTTracker:
-    """Factory function for trackers."""
-    return BoTSORTTracker(**kwargs)
+            # Switch for good: alternating backends would hand the same ID to
+            # different people. New IDs continue after BOTSORT's, so rule state
+            # kept for a BOTSORT track never carries over to someone else.
+            logger.warning(f"BOTSORT update failed, switching to the IoU tracker: {e}")
+            self.tracker = None
+            self._fallback._next_id = max(self._fallback._next_id, self._max_track_id + 1)
+            return self._fallback.update(detections, frame)
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise IoU between two sets of boxes.
+
+    Args:
+        a: (N, 4) boxes [x1, y1, x2, y2]
+        b: (M, 4) boxes [x1, y1, x2, y2]
+
+    Returns:
+        (N, M) IoU matrix
+    """
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    inter = wh[..., 0] * wh[..., 1]
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+# scipy.optimize.linear_sum_assignment, imported on first use (False if scipy is missing)
+_linear_sum_assignment = None
+
+
+def _solver():
+    global _linear_sum_assignment
+    if _linear_sum_assignment is None:
+        try:
+            from scipy.optimize import linear_sum_assignment
+            _linear_sum_assignment = linear_sum_assignment
+        except ImportError:
+            _linear_sum_assignment = False
+    return _linear_sum_assignment
+
+
+def _assign(iou: np.ndarray, min_iou: float):
+    """Maximum-IoU one-to-one assignment; returns (rows, cols) of accepted pairs."""
+    if iou.size == 0:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    linear_sum_assignment = _solver()
+    if linear_sum_assignment:
+        rows, cols = linear_sum_assignment(-iou)
+    else:
+        # Greedy on descending IoU
+        order = np.argsort(-iou, axis=None)
+        rows, cols = np.unravel_index(order, iou.shape)
+        used_r, used_c, keep = set(), set(), []
+        for k, (r, c) in enumerate(zip(rows.tolist(), cols.tolist())):
+            if r not in used_r and c not in used_c:
+                used_r.add(r)
+                used_c.add(c)
+                keep.append(k)
+        rows, cols = rows[keep], cols[keep]
+    accepted = iou[rows, cols] >= min_iou
+    return rows[accepted], cols[accepted]
+
+
+class IoUTracker:
+    """
+    ByteTrack-style tracker on IoU alone (no appearance, no camera motion).
+
+    Tracks carry a constant-velocity box estimate. Each update matches
+    high-confidence detections to all tracks, then low-confidence detections
+    to the tracks still unmatched, with one IoU matrix and one linear
+    assignment per stage. Lost tracks are kept for track_buffer frames
+    (scaled to the frame rate) so short occlusions keep their ID.
+    """
+
+    def __init__(self, track_high_thresh=0.5, track_low_thresh=0.1, new_track_thresh=0.6,
+                 track_buffer=30, match_thresh=0.8, frame_rate=30):
+        self.track_high_thresh = track_high_thresh
+        self.track_low_thresh = track_low_thresh
+        self.new_track_thresh = new_track_thresh
+        # match_thresh is a cost (1 - IoU) limit, as in BoT-SORT
+        self.min_iou = 1.0 - match_thresh
+        self.max_lost = max(1, int(round(track_buffer * frame_rate / 30.0)))
+
+        self._next_id = 1
+        self._boxes = np.empty((0, 4))
+        self._velocity = np.empty((0, 4))
+        self._ids = np.empty(0, dtype=np.int64)
+        self._scores = np.empty(0)
+        self._classes = np.empty(0)
+        self._lost = np.empty(0, dtype=np.int64)
+
+        # Statistics
+        self.updates = 0
+        self.total_ms = 0.0
+        self.last_ms = 0.0
+
+    def update(self, detections: np.ndarray, frame: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Update tracks with new detections.
+
+        Args:
+            detections: numpy array of [x1, y1, x2, y2, conf, cls]
+            frame: Unused (kept for the BoTSORTTracker interface)
+
+        Returns:
+            numpy array of [x1, y1, x2, y2, track_id, conf, cls] for tracks matched or started this frame
+        """
+        start = time.perf_counter()
+        tracks = self._associate(detections)
+        self.last_ms = (time.perf_counter() - start) * 1000.0
+        self.total_ms += self.last_ms
+        self.updates += 1
+        return tracks
+
+    def _associate(self, detections: np.ndarray) -> np.ndarray:
+        """Match detections to tracks and update the track state."""
+        detections = np.asarray(detections, dtype=np.float64).reshape(-1, 6)
+        detections = detections[detections[:, 4] >= self.track_low_thresh]
+        predicted = self._boxes + self._velocity
+
+        # Class-gated IoU between predicted tracks and detections
+        iou = iou_matrix(predicted, detections[:, :4])
+        iou[self._classes[:, None] != detections[None, :, 5]] = 0.0
+
+        high = detections[:, 4] >= self.track_high_thresh
+        track_idx = np.arange(len(predicted))
+        high_idx, low_idx = np.flatnonzero(high), np.flatnonzero(~high)
+
+        # Stage 1: high-confidence detections against all tracks
+        rows, cols = _assign(iou[:, high_idx], self.min_iou)
+        matched_tracks, matched_dets = track_idx[rows], high_idx[cols]
+
+        # Stage 2: low-confidence detections against tracks that were visible last frame
+        remaining = np.setdiff1d(track_idx, matched_tracks)
+        remaining = remaining[self._lost[remaining] == 0]
+        rows, cols = _assign(iou[np.ix_(remaining, low_idx)], 0.5)
+        matched_tracks = np.concatenate([matched_tracks, remaining[rows]])
+        matched_dets = np.concatenate([matched_dets, low_idx[cols]])
+
+        # Matched tracks: smooth the velocity over the frames since the last match
+        new_boxes = detections[matched_dets, :4]
+        gap = (self._lost[matched_tracks] + 1)[:, None]
+        self._velocity[matched_tracks] = 0.5 * self._velocity[matched_tracks] + \
+            0.5 * (new_boxes - self._boxes[matched_tracks]) / gap
+        self._boxes[matched_tracks] = new_boxes
+        self._scores[matched_tracks] = detections[matched_dets, 4]
+        self._lost[matched_tracks] = 0
+
+        # Unmatched tracks coast on their velocity; drop the ones lost too long
+        unmatched = np.setdiff1d(track_idx, matched_tracks)
+        self._boxes[unmatched] = predicted[unmatched]
+        self._lost[unmatched] += 1
+        alive = self._lost <= self.max_lost
+
+        # New tracks from confident detections nobody claimed
+        new_dets = np.setdiff1d(high_idx, matched_dets)
+        new_dets = new_dets[detections[new_dets, 4] >= self.new_track_thresh]
+        new_ids = np.arange(self._next_id, self._next_id + len(new_dets))
+        self._next_id += len(new_dets)
+
+        self._boxes = np.concatenate([self._boxes[alive], detections[new_dets, :4]])
+        self._velocity = np.concatenate([self._velocity[alive], np.zeros((len(new_dets), 4))])
+        self._ids = np.concatenate([self._ids[alive], new_ids])
+        self._scores = np.concatenate([self._scores[alive], detections[new_dets, 4]])
+        self._classes = np.concatenate([self._classes[alive], detections[new_dets, 5]])
+        self._lost = np.concatenate([self._lost[alive], np.zeros(len(new_dets), dtype=np.int64)])
+
+        return self._rows(self._lost == 0, self._boxes)
+
+    def predict(self, progress: float = 1.0) -> np.ndarray:
+        """
+        Visible tracks advanced by a fraction of one update interval (state unchanged).
+
+        Returns:
+            numpy array of [x1, y1, x2, y2, track_id, conf, cls]
+        """
+        return self._rows(self._lost == 0, self._boxes + self._velocity * progress)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-update timing (no GMC)."""
+        return {
+            "backend": "iou",
+            "gmc_method": "none",
+            "updates": self.updates,
+            "tracks": len(self._ids),
+            "avg_gmc_ms": 0.0,
+            "avg_association_ms": self.total_ms / self.updates if self.updates else 0.0,
+            "last_gmc_ms": 0.0,
+            "last_association_ms": self.last_ms
+        }
+
+    def _rows(self, mask: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+        return np.column_stack([
+            boxes[mask], self._ids[mask], self._scores[mask], self._classes[mask]
+        ]).reshape(-1, 7)
+
+
+def get_tracker(method: str = "bot_sort", **kwargs):
+    """
+    Factory function for trackers.
+
+    Args:
+        method: "bot_sort" (ultralytics BOTSORT with IoU fallback) or "iou"
+        **kwargs: Tracker thresholds, frame_rate and (bot_sort) gmc_method / gmc_downscale
+
+    Returns:
+        Tracker with update(detections, frame) and predict(progress)
+    """
+    if method == "iou":
+        # No camera motion compensation in the IoU tracker
+        kwargs.pop("gmc_method", None)
+        kwargs.pop("gmc_downscale", None)
+        return IoUTracker(**kwargs)
+    if method == "bot_sort":
+        return BoTSORTTracker(**kwargs)
+    raise ValueError(f"Unknown tracker method: {method}")
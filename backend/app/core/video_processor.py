@@ -6,14 +6,21 @@ import base64
 import logging
 import time
 from pathlib import Path
-from typing import Optional, Callable, Dict, Any, AsyncGenerator
+from typing import Optional, Callable, Dict, Any, AsyncGenerator, List, Tuple
 import cv2
 import numpy as np
 from PIL import ImageFont, ImageDraw, Image
 
 from app.config import settings
-from app.core.detection import BaseDetector, get_detector
-from app.schemas.detection import DetectionResult, StreamFrame
+from app.core.detection import load_detector
+from app.core.model_registry import get_model_registry
+from app.core.detector_session import DetectorSession
+from app.core.frame_grabber import FrameGrabber
+from app.core.motion_gate import MotionGate
+from app.core.preprocess import FramePreprocessor
+from app.core.roi_crop import Region, compute_crop_regions
+from app.core.detections import FrameDetections
+from app.schemas.detection import StreamFrame
 
 logger = logging.getLogger(__name__)
 
@@ -74,7 +81,16 @@ def put_korean_text(
 class VideoProcessor:
     """Handles video capture and processing for a single camera."""
 
-    def __init__(self, camera_id: int, source: str, source_type: str = "file"):
+    def __init__(
+        self,
+        camera_id: int,
+        source: str,
+        source_type: str = "file",
+        max_fps: Optional[float] = None,
+        detection_stride: Optional[int] = None,
+        inference_width: Optional[int] = None,
+        gmc_method: Optional[str] = None
+    ):
         """
         Initialize video processor.
 
@@ -82,12 +98,26 @@ class VideoProcessor:
             camera_id: Camera ID from database
             source: Video file path or RTSP URL
             source_type: "file" or "rtsp"
+            max_fps: Processing FPS cap (default: settings.VIDEO_FPS)
+            detection_stride: Run the detector every Nth frame; frames in
+                between use tracker predictions (default: 1, every frame)
+            inference_width: Downscale detector inputs to this width
+                (default: source resolution)
+            gmc_method: Tracker camera-motion compensation
+                (default: settings.TRACKER_GMC_METHOD)
         """
         self.camera_id = camera_id
         self.source = source
         self.source_type = source_type
+        self.max_fps = max_fps
+        self.detection_stride = max(1, detection_stride or 1)
+        self.preprocessor = FramePreprocessor(inference_width)
+        self.gmc_method = gmc_method
         self.cap: Optional[cv2.VideoCapture] = None
-        self.detector: Optional[BaseDetector] = None
+        self.session: Optional[DetectorSession] = None  # Private tracker, created when streaming starts
+        self.motion_gate: Optional[MotionGate] = None
+        self._crop_key: Optional[Tuple] = None
+        self._crop_cache: Optional[List[Region]] = None
         self.is_running = False
         self.frame_count = 0
         self.fps = settings.VIDEO_FPS
@@ -102,6 +132,10 @@ class VideoProcessor:
         # Current frame storage for snapshot access
         self._current_raw_frame: Optional[np.ndarray] = None
 
+        # Background capture stage (only active while streaming)
+        self._grabber: Optional[FrameGrabber] = None
+        self._timestamp = 0.0
+
     def open(self) -> bool:
         """
         Open video source or reuse existing session.
@@ -143,7 +177,7 @@ class VideoProcessor:
                     logger.warning(f"Could not read initial frame to determine video properties for {self.source}")
 
             # Ensure target_fps is set based on actual original_fps
-            self.target_fps = min(self.original_fps, settings.VIDEO_FPS)
+            self.target_fps = min(self.original_fps, self.max_fps or settings.VIDEO_FPS)
             
             logger.info(
                 f"Video opened: {self.width}x{self.height} @ {self.original_fps}fps, "
@@ -158,17 +192,70 @@ class VideoProcessor:
     def close(self):
         """Close video source."""
         self.is_running = False
-        if self.cap is not None:
+        if self._grabber is not None:
+            # The capture thread may still be inside cap.read(); the grabber
+            # releases the capture once it is no longer in use
+            self._grabber.stop(release_capture=True)
+            self._grabber = None
+        elif self.cap is not None:
             self.cap.release()
-            self.cap = None
+        self.cap = None
+
+    def start_capture(self) -> bool:
+        """
+        Start decoding on a background thread.
+
+        While the capture thread runs it owns ``self.cap``; frames are read
+        from its ring buffer and seeks are forwarded to it.
+
+        Returns:
+            True if the capture thread is running
+        """
+        if self.cap is None or not self.cap.isOpened():
+            return False
+        if self._grabber is None:
+            self._grabber = FrameGrabber(
+                self.cap,
+                source_type=self.source_type,
+                buffer_size=settings.CAPTURE_BUFFER_SIZE
+            )
+        self._grabber.start()
+        return True
+
+    def stop_capture(self):
+        """
+        Stop the background capture thread, if any. Blocking.
+
+        A thread still stuck in cap.read() keeps its grabber, so close() can
+        hand the capture release to it instead of releasing it under the read.
+        """
+        if self._grabber is not None and self._grabber.stop():
+            self._grabber = None
+
+    @property
+    def capture_eof(self) -> bool:
+        """Whether the background capture reached the end of the source."""
+        return self._grabber is not None and self._grabber.eof
 
     def read_frame(self) -> Optional[np.ndarray]:
         """
         Read a single frame.
 
+        When the background capture is running this never blocks: it returns
+        the next buffered frame, or None if none has been decoded yet.
+
         Returns:
             Frame as numpy array or None if failed
         """
+        if self._grabber is not None:
+            captured = self._grabber.read()
+            if captured is None:
+                return None
+            self.frame_count = captured.frame_number
+            self._timestamp = captured.timestamp
+            self._current_raw_frame = captured.frame
+            return captured.frame
+
         if self.cap is None or not self.cap.isOpened():
             return None
 
@@ -184,6 +271,7 @@ class VideoProcessor:
                 return None
 
         self.frame_count = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+        self._timestamp = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
         self._current_raw_frame = frame.copy()  # Store raw frame for snapshots
         return frame
 
@@ -191,7 +279,7 @@ class VideoProcessor:
         """Get current video timestamp in seconds."""
         if self.cap is None:
             return 0.0
-        return self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        return self._timestamp
 
     def get_current_frame(self) -> Optional[np.ndarray]:
         """Get the current raw frame for snapshot purposes."""
@@ -216,7 +304,11 @@ class VideoProcessor:
             target_frame = int((position_ms / 1000.0) * self.original_fps)
             target_frame = max(0, min(target_frame, self.total_frames - 1))
             
-            # 3. Apply seek
+            # 3. Apply seek (the capture thread owns the handle while running)
+            if self._grabber is not None:
+                self._grabber.request_seek(target_frame)
+                return
+
             # Prioritize POS_FRAMES as it's generally more accurate for indexed files
             self.cap.set(cv2.CAP_PROP_POS_FRAMES, float(target_frame))
             
@@ -232,7 +324,10 @@ class VideoProcessor:
             frame_number: Frame number to seek to
         """
         if self.cap is not None and self.source_type == "file":
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            if self._grabber is not None:
+                self._grabber.request_seek(frame_number)
+            else:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
 
     @staticmethod
     def encode_frame(frame: np.ndarray, quality: int = 80) -> str:
@@ -253,7 +348,7 @@ class VideoProcessor:
     @staticmethod
     def draw_detections(
         frame: np.ndarray,
-        detection: DetectionResult,
+        detection: FrameDetections,
         draw_labels: bool = True
     ) -> np.ndarray:
         """
@@ -299,7 +394,7 @@ class VideoProcessor:
             "fire_extinguisher": "소화기",
         }
 
-        for det in detection.detections:
+        for det in detection.boxes():
             x1, y1, x2, y2 = int(det.x1), int(det.y1), int(det.x2), int(det.y2)
             color = colors.get(det.class_name, (255, 255, 0))
 
@@ -404,11 +499,40 @@ class VideoProcessor:
 
         return frame_copy
 
+    @classmethod
+    def render_overlays(
+        cls,
+        frame: np.ndarray,
+        detection: Optional[FrameDetections],
+        rois: Optional[list] = None
+    ) -> np.ndarray:
+        """
+        Draw ROI overlays and detection boxes on a frame.
+
+        Args:
+            frame: BGR frame
+            detection: Optional detection result
+            rois: Optional list of ROI data
+
+        Returns:
+            Frame with overlays
+        """
+        # Draw ROI overlays first (semi-transparent background)
+        if rois:
+            frame = cls.draw_rois(frame, rois)
+
+        # Draw detection boxes on top of ROI overlays
+        if detection:
+            frame = cls.draw_detections(frame, detection)
+
+        return frame
+
     async def stream_frames(
         self,
         with_detection: bool = True,
         callback: Optional[Callable[[StreamFrame], None]] = None,
-        rois_provider: Optional[Callable[[], list]] = None
+        rois_provider: Optional[Callable[[], list]] = None,
+        render_provider: Optional[Callable[[], bool]] = None
     ) -> AsyncGenerator[StreamFrame, None]:
         """
         Async generator for streaming frames.
@@ -416,6 +540,10 @@ class VideoProcessor:
         Args:
             with_detection: Whether to run detection
             callback: Optional callback for each frame
+            rois_provider: Returns ROIs to draw on each frame
+            render_provider: Returns False to skip overlay drawing and JPEG
+                encoding (e.g. nobody is watching). frame_base64 is then empty
+                and raw_frame holds the undrawn frame.
 
         Yields:
             StreamFrame objects
@@ -424,68 +552,70 @@ class VideoProcessor:
             return
 
         if with_detection:
-            self.detector = get_detector()
-            if not self.detector.is_loaded:
-                self.detector.load_model()
+            if self.session is None:
+                # The tracker only sees detector frames, so it runs at the strided rate
+                self.session = DetectorSession(
+                    self.camera_id, frame_rate=self.target_fps / self.detection_stride, gmc_method=self.gmc_method
+                )
+            await self.session.load()
+            if settings.MOTION_GATE_ENABLED and self.motion_gate is None:
+                self.motion_gate = MotionGate()
 
         self.is_running = True
         frame_interval = 1.0 / self.target_fps
 
+        # Decode on a background thread so cap.read() never blocks the event loop
+        if settings.CAPTURE_THREADED:
+            self.start_capture()
+
+        # Two-stage pipeline: while frame N is being inferred, frame N-1 is
+        # rendered, encoded and yielded, and the grabber decodes frame N+1.
+        # Only one inference per camera is in flight, so tracker updates stay ordered.
+        pending: Optional[Tuple[np.ndarray, float, Optional[FrameDetections]]] = None
+        inference: Optional[asyncio.Task] = None
+        last_detection: Optional[FrameDetections] = None
+        frames_since_inference = 0
+
         try:
             while self.is_running:
                 loop_start = time.time()
 
-                frame = self.read_frame()
+                frame = await self._next_frame()
                 if frame is None:
                     break
-                
-                # Check current time vs video time to decide if we should skip detection
-                # to maintain real-time sync.
-                current_loop_time = time.time()
-                time_behind = (current_loop_time - loop_start)
-                
-                # If we're taking too long (e.g. more than 1.5x frame interval),
-                # we might want to skip detection and just show the frame,
-                # or skip frames entirely. For now, we ensure we don't fall behind.
-                
+
                 timestamp = self.get_timestamp()
                 detection = None
-
-                if with_detection and self.detector:
-                    # Run inference on raw frame (before any overlay)
-                    detection = self.detector.detect(
-                        frame,
-                        frame_number=self.frame_count,
-                        timestamp=timestamp
-                    )
-
-                # Draw ROI overlays first (semi-transparent background)
-                if rois_provider:
-                    current_rois = rois_provider()
-                    if current_rois:
-                        frame = self.draw_rois(frame, current_rois)
-
-                # Draw detection boxes on top of ROI overlays
-                if detection:
-                    frame = self.draw_detections(frame, detection)
-
-                # Encode frame
-                frame_base64 = self.encode_frame(frame, settings.VIDEO_QUALITY)
-
-                stream_frame = StreamFrame(
-                    camera_id=self.camera_id,
-                    frame_base64=frame_base64,
-                    current_ms=timestamp * 1000.0,
-                    total_ms=self.total_duration_ms,
-                    detection=detection,
-                    events=[],
-                    raw_frame=frame
-                )
-
-                if callback:
-                    callback(stream_frame)
-
-                yield stream_frame
+                if with_detection and self.session:
+                    frames_since_inference += 1
+                    if last_detection is not None and frames_since_inference < self.detection_stride:
+                        # Between detector runs: advance the tracks with the motion model
+                        detection = self._predict_detection(
+                            last_detection, frames_since_inference / self.detection_stride, timestamp
+                        )
+                    elif (
+                        self.motion_gate is None
+                        or last_detection is None
+                        or self.motion_gate.should_infer(frame, timestamp, rois_provider() if rois_provider else None)
+                    ):
+                        # Run inference on raw frame (before any overlay)
+                        regions = self._crop_regions(frame, rois_provider() if rois_provider else None)
+                        inference = asyncio.create_task(self._infer(frame, self.frame_count, timestamp, regions))
+                        frames_since_inference = 0
+                    else:
+                        # Static scene: carry the last result forward
+                        detection = last_detection.with_frame(self.frame_count, timestamp)
+                        frames_since_inference = 0
+
+                if pending is not None:
+                    stream_frame = await self._finish_frame(*pending, callback, rois_provider, render_provider)
+                    yield stream_frame
+
+                if inference is not None:
+                    detection = await inference
+                    inference = None
+                    last_detection = detection
+                pending = (frame, timestamp, detection)
 
                 # Maintain target FPS and implement frame skipping
                 elapsed = time.time() - loop_start
@@ -496,15 +626,160 @@ class VideoProcessor:
                 elif abs(sleep_time) > frame_interval:
                     # We are falling behind, skip frames to catch up
                     frames_to_skip = int(abs(sleep_time) / frame_interval)
-                    if self.cap is not None:
+                    if self._grabber is not None:
+                        # Live sources already drop stale frames in the ring buffer
+                        if self.source_type == "file":
+                            self._grabber.request_skip(min(frames_to_skip, 5))
+                    elif self.cap is not None:
                         for _ in range(min(frames_to_skip, 5)): # Cap skip to 5 frames
                             self.cap.grab()
                         logger.debug(f"Skipped {frames_to_skip} frames to maintain real-time sync")
 
+            # Flush the last inferred frame when the source ends
+            if pending is not None and self.is_running:
+                yield await self._finish_frame(*pending, callback, rois_provider, render_provider)
+
         finally:
             # Do NOT call self.close() here as it releases the video source
             # The owner of VideoProcessor is responsible for closing it when done
             self.is_running = False
+            if inference is not None and not inference.done():
+                inference.cancel()
+            # Joining the capture thread can take seconds - keep it off the event loop
+            await asyncio.to_thread(self.stop_capture)
+
+    def _crop_regions(self, frame: np.ndarray, rois: Optional[list]) -> Optional[List[Region]]:
+        """ROI crop regions for a frame (cached while the ROIs and frame size are unchanged)."""
+        if settings.ROI_CROP_MODE == "off" or not rois:
+            return None
+        h, w = frame.shape[:2]
+        key = (w, h, repr([roi.get("points") for roi in rois]))
+        if key != self._crop_key:
+            self._crop_key = key
+            self._crop_cache = compute_crop_regions(rois, w, h)
+        return self._crop_cache
+
+    async def _infer(
+        self,
+        frame: np.ndarray,
+        frame_number: int,
+        timestamp: float,
+        regions: Optional[List[Region]] = None
+    ) -> Optional[FrameDetections]:
+        """
+        Run detection for one frame without blocking the event loop.
+
+        Args:
+            frame: Raw BGR frame
+            frame_number: Frame number
+            timestamp: Frame timestamp in seconds
+            regions: Only run the model on these pixel regions (ROI crop)
+
+        Returns:
+            FrameDetections, or None if inference failed (the frame is then
+            streamed without detections rather than as an empty scene)
+        """
+        try:
+            return await self.session.detect_async(
+                frame, frame_number=frame_number, timestamp=timestamp,
+                regions=regions, preprocessor=self.preprocessor
+            )
+        except Exception as e:
+            logger.error(f"Detection failed for camera {self.camera_id}: {e}")
+            return None
+
+    def _predict_detection(self, last_detection: FrameDetections, progress: float, timestamp: float) -> FrameDetections:
+        """
+        Build FrameDetections for a frame between detector runs.
+
+        Args:
+            last_detection: Result of the last detector run
+            progress: Fraction of the stride elapsed since that run
+            timestamp: Frame timestamp in seconds
+
+        Returns:
+            FrameDetections with tracker-predicted boxes
+        """
+        predicted = self.session.predict(progress, self.frame_count, timestamp)
+        if predicted is None:
+            # Nothing tracked (e.g. tracking unavailable): hold the last boxes
+            return last_detection.with_frame(self.frame_count, timestamp)
+        return predicted
+
+    async def _finish_frame(
+        self,
+        frame: np.ndarray,
+        timestamp: float,
+        detection: Optional[FrameDetections],
+        callback: Optional[Callable[[StreamFrame], None]],
+        rois_provider: Optional[Callable[[], list]],
+        render_provider: Optional[Callable[[], bool]]
+    ) -> StreamFrame:
+        """
+        Draw overlays and encode a processed frame (off the event loop).
+
+        Args:
+            frame: Raw BGR frame
+            timestamp: Frame timestamp in seconds
+            detection: Detection result for the frame
+            callback: Optional callback for the finished frame
+            rois_provider: Returns ROIs to draw
+            render_provider: Returns False to skip drawing and encoding
+
+        Returns:
+            StreamFrame
+        """
+        frame_base64 = ""
+        if render_provider is None or render_provider():
+            rois = rois_provider() if rois_provider else None
+            frame, frame_base64 = await asyncio.to_thread(self._render_and_encode, frame, detection, rois)
+
+        stream_frame = StreamFrame(
+            camera_id=self.camera_id,
+            frame_base64=frame_base64,
+            current_ms=timestamp * 1000.0,
+            total_ms=self.total_duration_ms,
+            detection=detection,
+            events=[],
+            raw_frame=frame
+        )
+
+        if callback:
+            callback(stream_frame)
+        return stream_frame
+
+    @classmethod
+    def _render_and_encode(
+        cls,
+        frame: np.ndarray,
+        detection: Optional[FrameDetections],
+        rois: Optional[list]
+    ) -> Tuple[np.ndarray, str]:
+        """Draw overlays and JPEG-encode a frame. Runs on a worker thread."""
+        frame = cls.render_overlays(frame, detection, rois)
+        return frame, cls.encode_frame(frame, settings.VIDEO_QUALITY)
+
+    async def _next_frame(self) -> Optional[np.ndarray]:
+        """
+        Get the next frame without blocking the event loop.
+
+        Polls the capture ring buffer while the background thread decodes.
+        Falls back to a direct read when threaded capture is disabled.
+
+        Returns:
+            Frame or None when the source is exhausted or streaming stopped
+        """
+        if self._grabber is None:
+            return self.read_frame()
+
+        while self.is_running:
+            frame = self.read_frame()
+            if frame is not None:
+                return frame
+            if self._grabber.eof or not self._grabber.is_alive:
+                return None
+            await asyncio.sleep(0.005)
+        return None
 
     def get_snapshot(self, with_detection: bool = False, position_ms: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
@@ -537,10 +812,9 @@ class VideoProcessor:
         detection = None
 
         if with_detection:
-            detector = get_detector()
-            if not detector.is_loaded:
-                detector.load_model()
-            detection = detector.detect(frame, self.frame_count, timestamp)
+            with get_model_registry().use() as detector:
+                load_detector(detector)
+                detection = detector.detect(frame, self.frame_count, timestamp)
             frame = self.draw_detections(frame, detection)
 
         frame_base64 = self.encode_frame(frame, settings.VIDEO_QUALITY)
@@ -549,6 +823,6 @@ class VideoProcessor:
         return {
             "camera_id": self.camera_id,
             "frame_base64": frame_base64,
-            "detection": detection.model_dump() if detection else None,
+            "detection": detection.to_dict() if detection else None,
             "timestamp": timestamp
         }
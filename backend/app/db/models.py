@@ -18,6 +18,10 @@ class Camera(Base):
     source: Mapped[str] = mapped_column(String(500), nullable=False)  # File path or RTSP URL
     source_type: Mapped[str] = mapped_column(String(20), default="file")  # "file" or "rtsp"
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    processing_fps: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # None = settings.VIDEO_FPS
+    detection_stride: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # Run detector every Nth frame (None = 1)
+    inference_width: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # Detector input width (None = source)
+    gmc_method: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)  # Tracker motion compensation (None = settings)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
@@ -62,6 +66,7 @@ class Event(Base):
     snapshot_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     roi_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("rois.id", ondelete="SET NULL"), nullable=True)
     detection_data: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON detection details
+    source_file: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)  # Recorded file (offline analysis only)
     is_acknowledged: Mapped[bool] = mapped_column(Boolean, default=False)
     acknowledged_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -70,6 +75,45 @@ class Event(Base):
     camera: Mapped["Camera"] = relationship("Camera", back_populates="events")
 
 
+class AnalysisJob(Base):
+    """Offline analysis of recorded video files."""
+    __tablename__ = "analysis_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    camera_id: Mapped[int] = mapped_column(Integer, ForeignKey("cameras.id", ondelete="CASCADE"), nullable=False)  # ROIs and settings used
+    state: Mapped[str] = mapped_column(String(20), default="queued")  # queued, running, completed, failed, cancelled
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    files: Mapped[List["AnalysisFile"]] = relationship(
+        "AnalysisFile", back_populates="job", cascade="all, delete-orphan", order_by="AnalysisFile.id"
+    )
+
+
+class AnalysisFile(Base):
+    """One video file of an analysis job and its progress."""
+    __tablename__ = "analysis_files"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    job_id: Mapped[int] = mapped_column(Integer, ForeignKey("analysis_jobs.id", ondelete="CASCADE"), nullable=False)
+    source: Mapped[str] = mapped_column(String(500), nullable=False)
+    state: Mapped[str] = mapped_column(String(20), default="queued")  # queued, running, completed, failed, cancelled
+    analysis_fps: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    expected_frames: Mapped[int] = mapped_column(Integer, default=0)
+    frames_analyzed: Mapped[int] = mapped_column(Integer, default=0)
+    video_ms: Mapped[float] = mapped_column(Float, default=0.0)
+    duration_ms: Mapped[float] = mapped_column(Float, default=0.0)
+    events_found: Mapped[int] = mapped_column(Integer, default=0)
+    detections_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    job: Mapped["AnalysisJob"] = relationship("AnalysisJob", back_populates="files")
+
+
 class Checklist(Base):
     """Safety checklist for camera monitoring."""
     __tablename__ = "checklists"
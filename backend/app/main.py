@@ -2,10 +2,12 @@
 FastAPI application entry point.
 CCTV Safety Monitoring System
 """
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.config import settings
@@ -16,9 +18,17 @@ from app.api.routes import (
     events_router,
     checklists_router,
     stream_router,
-    regulations_router
+    regulations_router,
+    monitoring_router,
+    models_router,
+    analysis_router,
+    detect_router
 )
-from app.api.websocket import router as websocket_router
+from app.api.websocket import router as websocket_router, pipelines, supervisor
+from app.core.inference_scheduler import get_inference_scheduler
+from app.core.detection import get_detector_readiness, preload_detector, shutdown_detector
+from app.core.model_registry import get_model_registry
+from app.services.offline_analysis import get_analysis_manager
 
 # Configure logging
 logging.basicConfig(
@@ -35,11 +45,26 @@ async def lifespan(app: FastAPI):
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     await init_db()
     logger.info("Database initialized")
+    await get_analysis_manager().recover()
+
+    if settings.DETECTOR_PRELOAD:
+        # Load and warm the model off the event loop; /health is 503 until it is hot.
+        # Pipelines started meanwhile wait for this load rather than starting another.
+        app.state.preload_task = asyncio.create_task(asyncio.to_thread(preload_detector))
+
+    if settings.MONITORING_ENABLED:
+        await supervisor.start()
 
     yield
 
     # Shutdown
     logger.info("Shutting down...")
+    await supervisor.stop()
+    await pipelines.stop_all()
+    await get_analysis_manager().shutdown()
+    await get_inference_scheduler().stop()
+    get_model_registry().shutdown()
+    shutdown_detector()
     await close_db()
     logger.info("Database connections closed")
 
@@ -75,6 +100,10 @@ app.include_router(events_router, prefix="/api")
 app.include_router(checklists_router, prefix="/api")
 app.include_router(stream_router, prefix="/api")
 app.include_router(regulations_router, prefix="/api")
+app.include_router(monitoring_router, prefix="/api")
+app.include_router(models_router, prefix="/api")
+app.include_router(analysis_router, prefix="/api")
+app.include_router(detect_router, prefix="/api")
 app.include_router(websocket_router)
 
 
@@ -90,8 +119,14 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy"}
+    """Health check endpoint. 503 until the preloaded detector is warmed up, or once it failed."""
+    detector = get_detector_readiness()
+    if detector["state"] == "failed" or (settings.DETECTOR_PRELOAD and detector["state"] != "ready"):
+        return JSONResponse(
+            status_code=503,
+            content={"status": "starting" if detector["state"] != "failed" else "unhealthy", "detector": detector}
+        )
+    return {"status": "healthy", "detector": detector}
 
 
 @app.get("/api/config")
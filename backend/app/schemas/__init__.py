@@ -3,6 +3,8 @@ from app.schemas.roi import ROICreate, ROIUpdate, ROIResponse
 from app.schemas.event import EventCreate, EventResponse, EventAcknowledge
 from app.schemas.checklist import ChecklistCreate, ChecklistResponse, ChecklistItemUpdate
 from app.schemas.detection import DetectionResult, DetectionBox, StreamFrame
+from app.schemas.model import ModelSwapRequest
+from app.schemas.analysis import AnalysisJobCreate
 
 __all__ = [
     "CameraCreate",
@@ -20,4 +22,6 @@ __all__ = [
     "DetectionResult",
     "DetectionBox",
     "StreamFrame",
+    "ModelSwapRequest",
+    "AnalysisJobCreate",
 ]
@@ -0,0 +1,11 @@
+"""
+Offline analysis schemas for API request validation.
+"""
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class AnalysisJobCreate(BaseModel):
+    """Schema for analysing a set of recorded video files."""
+    camera_id: int = Field(..., description="Camera whose ROIs and settings apply; events are stored under it")
+    files: List[str] = Field(..., min_length=1, max_length=1000, description="Video file paths on the server")
@@ -11,6 +11,16 @@ class CameraBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100, description="Camera name")
     source: str = Field(..., min_length=1, max_length=500, description="File path or RTSP URL")
     source_type: Literal["file", "rtsp"] = Field(default="file", description="Source type")
+    processing_fps: Optional[float] = Field(None, gt=0, le=60, description="Processing FPS (default: VIDEO_FPS)")
+    detection_stride: Optional[int] = Field(
+        None, ge=1, le=30, description="Run the detector every Nth frame; tracker predicts the rest (default: 1)"
+    )
+    inference_width: Optional[int] = Field(
+        None, ge=160, le=3840, description="Downscale frames to this width before detection (default: source)"
+    )
+    gmc_method: Optional[Literal["none", "sparseOptFlow", "orb"]] = Field(
+        None, description="Tracker camera-motion compensation; none for fixed mounts (default: TRACKER_GMC_METHOD)"
+    )
 
 
 class CameraCreate(CameraBase):
@@ -24,6 +34,10 @@ class CameraUpdate(BaseModel):
     source: Optional[str] = Field(None, min_length=1, max_length=500)
     source_type: Optional[Literal["file", "rtsp"]] = None
     is_active: Optional[bool] = None
+    processing_fps: Optional[float] = Field(None, gt=0, le=60)
+    detection_stride: Optional[int] = Field(None, ge=1, le=30)
+    inference_width: Optional[int] = Field(None, ge=160, le=3840)
+    gmc_method: Optional[Literal["none", "sparseOptFlow", "orb"]] = None
 
 
 class CameraResponse(CameraBase):
@@ -36,7 +36,7 @@ class StreamFrame(BaseModel):
     frame_base64: str = Field(..., description="Base64 encoded JPEG frame")
     current_ms: float = 0.0
     total_ms: float = 0.0
-    detection: Optional[DetectionResult] = None
+    detection: Optional[Any] = Field(None, description="FrameDetections; serialized with to_dict()")
     events: List[dict] = Field(default_factory=list, description="New events for this frame")
     raw_frame: Optional[Any] = Field(None, exclude=True, description="Raw numpy frame for event processing")
 
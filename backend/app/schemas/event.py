@@ -28,6 +28,7 @@ class EventResponse(EventBase):
     roi_id: Optional[int]
     snapshot_path: Optional[str]
     detection_data: Optional[str]
+    source_file: Optional[str] = None
     is_acknowledged: bool
     acknowledged_at: Optional[datetime]
     created_at: datetime
@@ -0,0 +1,23 @@
+"""
+Model registry schemas for API request validation.
+"""
+from typing import Optional, Literal
+from pydantic import BaseModel, Field
+
+from app.config import settings
+
+
+class ModelSwapRequest(BaseModel):
+    """Schema for swapping the active detector model."""
+    detector_type: Optional[Literal["yolo", "rfdetr", "onnx"]] = Field(
+        None, description="Detector backend (default: DETECTOR_TYPE)"
+    )
+    quantization: Optional[Literal["none", "dynamic", "static"]] = Field(
+        None, description="ONNX quantization (default: DETECTOR_QUANTIZATION)"
+    )
+    model_path: Optional[str] = Field(
+        None, min_length=1, max_length=500, description="Model file relative to the backend directory"
+    )
+    warmup_runs: int = Field(
+        settings.DETECTOR_WARMUP_RUNS, ge=0, le=20, description="Warm-up inferences before the swap"
+    )
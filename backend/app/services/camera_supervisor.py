@@ -0,0 +1,162 @@
+"""
+Background monitoring supervisor.
+
+Keeps a processing pipeline running for every active camera so that rules
+and alarms are evaluated whether or not anyone has the camera open.
+Viewers simply attach to the supervised pipelines.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import Camera
+from app.core.detection import get_detector_readiness
+from app.core.inference_scheduler import get_inference_scheduler
+from app.services.stream_pipeline import PipelineRegistry
+
+logger = logging.getLogger(__name__)
+
+
+def _camera_config(camera: Camera) -> Tuple:
+    """Settings that require a pipeline restart when changed."""
+    return (
+        camera.source, camera.source_type, camera.processing_fps,
+        camera.detection_stride, camera.inference_width, camera.gmc_method
+    )
+
+
+class CameraSupervisor:
+    """
+    Holds a pipeline reference for each active camera and restarts
+    pipelines that stall or fail.
+    """
+
+    def __init__(
+        self,
+        registry: PipelineRegistry,
+        check_interval: float = settings.MONITORING_CHECK_INTERVAL,
+        stall_seconds: float = settings.MONITORING_STALL_SECONDS
+    ):
+        """
+        Initialize camera supervisor.
+
+        Args:
+            registry: Pipeline registry shared with the WebSocket viewers
+            check_interval: Seconds between health checks
+            stall_seconds: Restart a pipeline that produced no frame for this long
+        """
+        self.registry = registry
+        self.check_interval = check_interval
+        self.stall_seconds = stall_seconds
+
+        # camera_id -> config of cameras we hold a pipeline reference for
+        self._supervised: Dict[int, Tuple] = {}
+        # camera_id -> last error for cameras whose pipeline could not start
+        self._failed: Dict[int, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the supervisor loop is alive."""
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Start supervising active cameras."""
+        if self.is_running:
+            return
+        self._task = asyncio.create_task(self._run(), name="camera-supervisor")
+        logger.info("Camera supervisor started")
+
+    async def stop(self):
+        """Stop supervising and release all pipeline references."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for camera_id in list(self._supervised):
+            await self.registry.release(camera_id)
+        self._supervised.clear()
+        self._failed.clear()
+        logger.info("Camera supervisor stopped")
+
+    async def _run(self):
+        """Supervisor loop."""
+        while True:
+            try:
+                await self.sync_cameras()
+                await self.check_pipelines()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Camera supervisor error: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    async def sync_cameras(self):
+        """Start pipelines for newly active cameras and release removed ones."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Camera).where(Camera.is_active == True))
+            cameras = {camera.id: camera for camera in result.scalars().all()}
+
+        # Cameras deactivated or deleted
+        for camera_id in list(self._supervised):
+            if camera_id not in cameras:
+                del self._supervised[camera_id]
+                await self.registry.release(camera_id)
+                logger.info(f"Stopped monitoring camera {camera_id}")
+        for camera_id in list(self._failed):
+            if camera_id not in cameras:
+                del self._failed[camera_id]
+
+        for camera_id, camera in cameras.items():
+            config = _camera_config(camera)
+
+            if camera_id not in self._supervised:
+                pipeline = await self.registry.acquire(camera)
+                if pipeline is None:
+                    self._failed[camera_id] = f"Failed to open video source: {camera.source}"
+                    continue
+                self._supervised[camera_id] = config
+                self._failed.pop(camera_id, None)
+                logger.info(f"Monitoring camera {camera_id} ({camera.name})")
+
+            elif self._supervised[camera_id] != config:
+                logger.info(f"Camera {camera_id} settings changed, restarting pipeline")
+                self._supervised[camera_id] = config
+                await self.registry.restart(camera_id, camera)
+
+    async def check_pipelines(self):
+        """Restart supervised pipelines that died or stopped producing frames."""
+        for camera_id in list(self._supervised):
+            pipeline = self.registry.get(camera_id)
+            if pipeline is None:
+                continue
+
+            if pipeline.is_running and pipeline.seconds_since_last_frame < self.stall_seconds:
+                continue
+
+            reason = "stopped" if not pipeline.is_running else (
+                f"stalled for {pipeline.seconds_since_last_frame:.0f}s"
+            )
+            logger.warning(f"Pipeline for camera {camera_id} {reason}, restarting")
+            await self.registry.restart(camera_id)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get supervisor and pipeline state."""
+        pipelines = self.registry.get_status()
+        return {
+            "enabled": settings.MONITORING_ENABLED,
+            "running": self.is_running,
+            "supervised_cameras": sorted(self._supervised),
+            "failed_cameras": dict(self._failed),
+            "pipelines": pipelines,
+            "detector": get_detector_readiness(),
+            "inference": get_inference_scheduler().get_stats() if settings.INFERENCE_BATCHING else None
+        }
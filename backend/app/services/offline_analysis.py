@@ -0,0 +1,446 @@
+"""
+Offline analysis jobs for recorded video files.
+
+A job analyses a list of files with one camera's ROIs and settings. Files are
+sharded across a process pool (ANALYSIS_WORKERS); each worker owns a detector
+and analyses one file at a time without pacing (see core.file_analysis).
+Job and per-file progress are persisted in SQLite and pushed to subscribers
+(the /ws/analysis WebSocket). Events are stored like live ones, tagged with
+their source file, but raise no live alarms.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import queue
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import AnalysisFile, AnalysisJob, Camera, ROI
+from app.core.alarm_manager import get_alarm_manager
+from app.core.file_analysis import FileTask, analyze_file, init_worker
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = ("queued", "running")
+
+
+def _elapsed_seconds(start: Optional[datetime], end: Optional[datetime]) -> float:
+    """Seconds between two timestamps (SQLite returns them without a timezone)."""
+    if start is None:
+        return 0.0
+    end = end or datetime.now(timezone.utc)
+    return max(0.0, (end.replace(tzinfo=None) - start.replace(tzinfo=None)).total_seconds())
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def file_to_dict(file: AnalysisFile) -> Dict[str, Any]:
+    """Serialize a file's progress."""
+    elapsed = _elapsed_seconds(file.started_at, file.finished_at)
+    if file.state == "completed":
+        progress = 1.0
+    else:
+        progress = min(1.0, file.video_ms / file.duration_ms) if file.duration_ms else 0.0
+    return {
+        "id": file.id,
+        "job_id": file.job_id,
+        "source": file.source,
+        "state": file.state,
+        "progress": round(progress, 4),
+        "analysis_fps": file.analysis_fps,
+        "expected_frames": file.expected_frames,
+        "frames_analyzed": file.frames_analyzed,
+        "video_ms": file.video_ms,
+        "duration_ms": file.duration_ms,
+        "events_found": file.events_found,
+        "frames_per_second": file.frames_analyzed / elapsed if elapsed > 0 else 0.0,
+        "speedup": file.video_ms / 1000.0 / elapsed if elapsed > 0 else 0.0,
+        "detections_path": file.detections_path,
+        "error": file.error,
+        "started_at": _isoformat(file.started_at),
+        "finished_at": _isoformat(file.finished_at)
+    }
+
+
+def job_to_dict(job: AnalysisJob, with_files: bool = True) -> Dict[str, Any]:
+    """Serialize a job with progress summed over its files."""
+    files = [file_to_dict(f) for f in job.files]
+    duration_ms = sum(f["duration_ms"] for f in files)
+    done_ms = sum(f["duration_ms"] if f["state"] == "completed" else f["video_ms"] for f in files)
+    data = {
+        "id": job.id,
+        "camera_id": job.camera_id,
+        "state": job.state,
+        "progress": round(min(1.0, done_ms / duration_ms), 4) if duration_ms else 0.0,
+        "files_total": len(files),
+        "files_done": sum(1 for f in files if f["state"] not in ACTIVE_STATES),
+        "frames_analyzed": sum(f["frames_analyzed"] for f in files),
+        "events_found": sum(f["events_found"] for f in files),
+        "created_at": _isoformat(job.created_at),
+        "finished_at": _isoformat(job.finished_at)
+    }
+    if with_files:
+        data["files"] = files
+    return data
+
+
+async def _load_roi_dicts(camera_id: int) -> List[Dict[str, Any]]:
+    """Active ROIs of a camera as plain dicts for the workers."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(ROI).where(ROI.camera_id == camera_id, ROI.is_active == True)
+        )
+        return [
+            {
+                "id": roi.id,
+                "points": json.loads(roi.points),
+                "name": roi.name,
+                "color": roi.color,
+                "zone_type": getattr(roi, "zone_type", "warning")
+            }
+            for roi in result.scalars().all()
+        ]
+
+
+class AnalysisManager:
+    """Runs analysis jobs on a process pool and persists their progress."""
+
+    def __init__(
+        self,
+        workers: int = settings.ANALYSIS_WORKERS,
+        executor_factory: Optional[Callable[[int], Executor]] = None
+    ):
+        """
+        Initialize analysis manager.
+
+        Args:
+            workers: Files analysed at once (0 = one per two CPU cores)
+            executor_factory: Builds the executor for a number of workers
+                (default: a spawned process pool, one detector per process)
+        """
+        self.workers = workers if workers > 0 else max(1, (os.cpu_count() or 1) // 2)
+        self._executor_factory = executor_factory or self._create_process_pool
+        self._executor: Optional[Executor] = None
+        self._mp_manager = None
+        self._queue = None  # (kind, file_id, data) messages from the workers
+        self._cancelled = None  # job_id -> True, shared with the workers
+        self._futures: Dict[int, Future] = {}  # file_id -> future of files not finished yet
+        self._file_jobs: Dict[int, int] = {}  # file_id -> job_id of files not finished yet
+        self._pump_task: Optional[asyncio.Task] = None
+        self._subscribers: Dict[str, Callable] = {}
+
+    @staticmethod
+    def _create_process_pool(workers: int) -> Executor:
+        threads = settings.ANALYSIS_WORKER_THREADS or max(1, (os.cpu_count() or 1) // workers)
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(None, None, None, threads)
+        )
+
+    def _start_pool(self):
+        """Start the shared-state manager and the executor. Blocking."""
+        self._mp_manager = multiprocessing.get_context("spawn").Manager()
+        self._queue = self._mp_manager.Queue()
+        self._cancelled = self._mp_manager.dict()
+        self._executor = self._executor_factory(self.workers)
+        logger.info(f"Analysis pool started with {self.workers} workers")
+
+    async def _ensure_started(self):
+        if self._executor is None:
+            # Spawning the manager process takes a moment
+            await asyncio.to_thread(self._start_pool)
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump(), name="analysis-progress")
+
+    async def create_job(self, camera: Camera, sources: List[str]) -> Dict[str, Any]:
+        """
+        Queue an analysis of video files with a camera's ROIs and settings.
+
+        Args:
+            camera: Camera whose ROIs, processing_fps, inference_width and
+                gmc_method apply; events are stored under this camera
+            sources: Video file paths
+
+        Returns:
+            The queued job
+        """
+        rois = await _load_roi_dicts(camera.id)
+        async with AsyncSessionLocal() as db:
+            job = AnalysisJob(camera_id=camera.id, files=[AnalysisFile(source=source) for source in sources])
+            db.add(job)
+            await db.commit()
+            job = await self._get_job(db, job.id)
+
+        await self._ensure_started()
+        loop = asyncio.get_running_loop()
+        for file in job.files:
+            task = FileTask(
+                file_id=file.id,
+                job_id=job.id,
+                source=file.source,
+                camera_id=camera.id,
+                rois=rois,
+                target_fps=camera.processing_fps or settings.ANALYSIS_FPS,
+                inference_width=camera.inference_width,
+                gmc_method=camera.gmc_method
+            )
+            future = self._executor.submit(analyze_file, task, self._queue, self._cancelled)
+            self._futures[file.id] = future
+            self._file_jobs[file.id] = job.id
+            future.add_done_callback(partial(self._on_future_done, loop, file.id))
+
+        logger.info(f"Analysis job {job.id} queued with {len(sources)} files for camera {camera.id}")
+        data = job_to_dict(job)
+        await self._notify({"type": "analysis_job", "job": data})
+        return data
+
+    async def start(self, camera: Camera) -> Dict[str, Any]:
+        """
+        Queue an analysis of a file-type camera's own video.
+
+        Raises:
+            ValueError: If the camera is not a file source
+        """
+        if camera.source_type != "file":
+            raise ValueError(f"Camera {camera.id} is not a recorded file (source_type={camera.source_type})")
+        return await self.create_job(camera, [camera.source])
+
+    def _on_future_done(self, loop: asyncio.AbstractEventLoop, file_id: int, future: Future):
+        """Executor callback: files that never reported back (cancelled before start, crashed worker)."""
+        if future.cancelled():
+            state, error = "cancelled", None
+        elif future.exception() is not None:
+            state, error = "failed", f"Worker failed: {future.exception()}"
+        else:
+            return  # The worker sent "finished" or "failed" itself
+        loop.call_soon_threadsafe(
+            lambda: asyncio.ensure_future(self._finish_file(file_id, {"state": state, "error": error}))
+        )
+
+    async def _pump(self):
+        """Apply worker messages in order while files are outstanding."""
+        while self._file_jobs:
+            try:
+                kind, file_id, data = await asyncio.to_thread(self._queue.get, True, 0.5)
+            except queue.Empty:
+                continue
+            try:
+                await self._handle(kind, file_id, data)
+            except Exception as e:
+                logger.error(f"Failed to apply analysis update {kind} for file {file_id}: {e}")
+
+    async def _handle(self, kind: str, file_id: int, data: Any):
+        if kind == "started":
+            await self._update_file(file_id, state="running", started_at=datetime.now(timezone.utc), **data)
+        elif kind == "progress":
+            await self._update_file(file_id, frames_analyzed=data["frames_analyzed"], video_ms=data["video_ms"])
+        elif kind == "event":
+            await self._store_event(file_id, *data)
+        elif kind == "finished":
+            await self._finish_file(file_id, {
+                "state": data["state"],
+                "frames_analyzed": data["frames_analyzed"],
+                "video_ms": data["video_ms"],
+                "detections_path": data["detections_path"]
+            })
+        elif kind == "failed":
+            await self._finish_file(file_id, {"state": "failed", "error": data})
+
+    async def _store_event(self, file_id: int, event, frame):
+        async with AsyncSessionLocal() as db:
+            await get_alarm_manager().process_event(event, frame=frame, db_session=db, notify=False)
+            file = await db.get(AnalysisFile, file_id)
+            if file is not None:
+                file.events_found += 1
+                await db.commit()
+
+    async def _update_file(self, file_id: int, **changes) -> Optional[Dict[str, Any]]:
+        """Persist file changes (and start its job) and notify subscribers."""
+        async with AsyncSessionLocal() as db:
+            file = await db.get(AnalysisFile, file_id)
+            if file is None:
+                return None
+            for key, value in changes.items():
+                setattr(file, key, value)
+            job = await self._get_job(db, file.job_id)
+            if job.state == "queued" and file.state == "running":
+                job.state = "running"
+            await db.commit()
+            job = await self._get_job(db, file.job_id)
+            update = {
+                "type": "analysis_file",
+                "job": job_to_dict(job, with_files=False),
+                "file": file_to_dict(file)
+            }
+        await self._notify(update)
+        return update
+
+    async def _finish_file(self, file_id: int, changes: Dict[str, Any]):
+        """Record a file's final state and complete its job after the last file."""
+        job_id = self._file_jobs.pop(file_id, None)
+        self._futures.pop(file_id, None)
+        if job_id is None:
+            return  # Already finished
+        await self._update_file(file_id, finished_at=datetime.now(timezone.utc), **changes)
+        if job_id in self._file_jobs.values():
+            return
+
+        async with AsyncSessionLocal() as db:
+            job = await self._get_job(db, job_id)
+            states = {f.state for f in job.files}
+            if states == {"failed"}:
+                job.state = "failed"
+            elif self._cancelled is not None and job_id in self._cancelled:
+                job.state = "cancelled"
+            else:
+                job.state = "completed"
+            job.finished_at = datetime.now(timezone.utc)
+            await db.commit()
+            job = await self._get_job(db, job_id)
+            data = job_to_dict(job)
+        logger.info(f"Analysis job {job_id} {job.state}: {data['frames_analyzed']} frames, {data['events_found']} events")
+        await self._notify({"type": "analysis_job", "job": data})
+
+    @staticmethod
+    async def _get_job(db, job_id: int) -> Optional[AnalysisJob]:
+        result = await db.execute(
+            select(AnalysisJob)
+            .where(AnalysisJob.id == job_id)
+            .options(selectinload(AnalysisJob.files))
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Get a job with per-file progress."""
+        async with AsyncSessionLocal() as db:
+            job = await self._get_job(db, job_id)
+            return job_to_dict(job) if job else None
+
+    async def list_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get recent jobs, newest first."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(AnalysisJob)
+                .options(selectinload(AnalysisJob.files))
+                .order_by(AnalysisJob.id.desc())
+                .limit(limit)
+            )
+            return [job_to_dict(job) for job in result.scalars().all()]
+
+    async def cancel(self, job_id: int) -> bool:
+        """
+        Cancel a job: queued files are dropped, running files stop after their current batch.
+
+        Returns:
+            True if the job was still active
+        """
+        async with AsyncSessionLocal() as db:
+            job = await db.get(AnalysisJob, job_id)
+            if job is None or job.state not in ACTIVE_STATES:
+                return False
+
+        if self._cancelled is not None:
+            self._cancelled[job_id] = True
+        for file_id, file_job_id in list(self._file_jobs.items()):
+            if file_job_id == job_id and file_id in self._futures:
+                self._futures[file_id].cancel()
+        return True
+
+    async def recover(self):
+        """Fail jobs left active by a previous run of the server."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(AnalysisJob)
+                .where(AnalysisJob.state.in_(ACTIVE_STATES))
+                .options(selectinload(AnalysisJob.files))
+            )
+            jobs = result.scalars().all()
+            now = datetime.now(timezone.utc)
+            for job in jobs:
+                job.state = "failed"
+                job.finished_at = now
+                for file in job.files:
+                    if file.state in ACTIVE_STATES:
+                        file.state = "failed"
+                        file.error = "Interrupted by a server restart"
+                        file.finished_at = now
+            await db.commit()
+        if jobs:
+            logger.warning(f"Marked {len(jobs)} interrupted analysis jobs as failed")
+
+    async def shutdown(self):
+        """Stop the workers; active jobs are marked failed by recover() on the next start."""
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+            try:
+                await self._pump_task
+            except asyncio.CancelledError:
+                pass
+            self._pump_task = None
+        if self._executor is None:
+            return
+        # Running files stop after their current batch
+        for job_id in set(self._file_jobs.values()):
+            self._cancelled[job_id] = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._mp_manager.shutdown()
+        self._executor = None
+
+    def subscribe(self, subscriber_id: str, callback: Callable):
+        """
+        Subscribe to job and file progress updates.
+
+        Args:
+            subscriber_id: Unique subscriber identifier
+            callback: Function called with each update
+        """
+        self._subscribers[subscriber_id] = callback
+
+    def unsubscribe(self, subscriber_id: str):
+        """Unsubscribe from progress updates."""
+        self._subscribers.pop(subscriber_id, None)
+
+    async def _notify(self, update: Dict[str, Any]):
+        for subscriber_id, callback in list(self._subscribers.items()):
+            try:
+                if asyncio.iscoroutinefunction(callback):
+                    await callback(update)
+                else:
+                    callback(update)
+            except Exception as e:
+                logger.error(f"Error notifying analysis subscriber {subscriber_id}: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get pool state for monitoring."""
+        return {
+            "workers": self.workers,
+            "running": self._executor is not None,
+            "files_outstanding": len(self._file_jobs),
+            "jobs_outstanding": len(set(self._file_jobs.values()))
+        }
+
+
+# Global manager instance
+_analysis_manager_instance: Optional[AnalysisManager] = None
+
+
+def get_analysis_manager() -> AnalysisManager:
+    """Get or create the global analysis manager."""
+    global _analysis_manager_instance
+    if _analysis_manager_instance is None:
+        _analysis_manager_instance = AnalysisManager()
+    return _analysis_manager_instance
@@ -0,0 +1,453 @@
+"""
+Shared per-camera processing pipelines.
+
+Each camera runs exactly one decode -> detect -> rules pipeline no matter how
+many clients are watching it. Encoded frames are fanned out to every viewer
+through a frame sink (``ConnectionManager.send_frame``).
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import Camera, ROI
+from app.core.video_processor import VideoProcessor
+from app.core.preprocess import FramePreprocessor
+from app.core.roi_manager import ROIManager
+from app.core.rule_engine import RuleEngine, create_rule_engine, Severity
+from app.core.scene_index import SceneIndex
+from app.core.alarm_manager import get_alarm_manager
+from app.schemas.roi import Point
+
+logger = logging.getLogger(__name__)
+
+FrameSink = Callable[[int, dict], Awaitable[None]]
+EventSink = Callable[[dict], Awaitable[None]]
+ViewerCounter = Callable[[int], int]
+
+
+async def load_camera_rois(camera_id: int, roi_manager: ROIManager) -> List[int]:
+    """Load ROIs for a camera from database."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(ROI).where(ROI.camera_id == camera_id, ROI.is_active == True)
+        )
+        rois = result.scalars().all()
+
+        for roi in rois:
+            points_data = json.loads(roi.points)
+            points = [Point(x=p["x"], y=p["y"]) for p in points_data]
+            roi_manager.add_roi(
+                roi.id,
+                points,
+                roi.name,
+                roi.color,
+                zone_type=getattr(roi, "zone_type", "warning")
+            )
+
+        return [roi.id for roi in rois]
+
+
+class CameraPipeline:
+    """Runs decode, detection and rule evaluation once for a single camera."""
+
+    def __init__(
+        self,
+        camera_id: int,
+        source: str,
+        source_type: str,
+        frame_sink: FrameSink,
+        event_sink: Optional[EventSink] = None,
+        viewer_count: Optional[ViewerCounter] = None,
+        processing_fps: Optional[float] = None,
+        detection_stride: Optional[int] = None,
+        inference_width: Optional[int] = None,
+        gmc_method: Optional[str] = None
+    ):
+        """
+        Initialize camera pipeline.
+
+        Args:
+            camera_id: Camera ID from database
+            source: Video file path or RTSP URL
+            source_type: "file" or "rtsp"
+            frame_sink: Coroutine called with (camera_id, frame_data) per frame
+            event_sink: Coroutine called with event_data for each new event
+            viewer_count: Returns the number of viewers of a camera. Frames
+                are only drawn and encoded while someone is watching.
+            processing_fps: Processing FPS cap (default: settings.VIDEO_FPS)
+            detection_stride: Run the detector every Nth frame (default: every frame)
+            inference_width: Detector input width (default: source resolution)
+            gmc_method: Tracker motion compensation (default: settings.TRACKER_GMC_METHOD)
+        """
+        self.camera_id = camera_id
+        self.processor = VideoProcessor(
+            camera_id=camera_id,
+            source=source,
+            source_type=source_type,
+            max_fps=processing_fps,
+            detection_stride=detection_stride,
+            inference_width=inference_width,
+            gmc_method=gmc_method
+        )
+        self.roi_manager = ROIManager()  # Each camera needs its own ROI manager
+        self.rule_engine: RuleEngine = create_rule_engine(self.roi_manager)
+        self.active_roi_ids: List[int] = []
+
+        self._frame_sink = frame_sink
+        self._event_sink = event_sink
+        self._viewer_count = viewer_count
+        self._task: Optional[asyncio.Task] = None
+
+        # Statistics
+        self.frames_processed = 0
+        self.events_raised = 0
+        self.started_at = 0.0
+        self.last_frame_time = 0.0
+        self.last_error: Optional[str] = None
+        self.restarts = 0
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the processing task is alive."""
+        return self._task is not None and not self._task.done()
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Stream metadata sent to viewers when they attach."""
+        return {
+            "type": "metadata",
+            "camera_id": self.camera_id,
+            "width": self.processor.width,
+            "height": self.processor.height,
+            "fps": self.processor.original_fps,
+            "total_frames": self.processor.total_frames,
+            "total_duration_ms": self.processor.total_duration_ms
+        }
+
+    async def reload_rois(self):
+        """Reload ROIs from the database."""
+        self.roi_manager.clear_rois()
+        self.active_roi_ids = await load_camera_rois(self.camera_id, self.roi_manager)
+        logger.info(f"Loaded {len(self.active_roi_ids)} ROIs for camera {self.camera_id}")
+
+    async def start(self) -> bool:
+        """
+        Open the source and start processing.
+
+        Returns:
+            True if the pipeline is running
+        """
+        if self.is_running:
+            return True
+
+        # Opening an RTSP source can take seconds - keep it off the event loop
+        if not await asyncio.to_thread(self.processor.open):
+            self.last_error = f"Failed to open video source for camera {self.camera_id}"
+            logger.error(self.last_error)
+            return False
+
+        await self.reload_rois()
+        self.last_error = None
+        self.started_at = time.time()
+        self._task = asyncio.create_task(self._run(), name=f"pipeline-{self.camera_id}")
+        logger.info(f"Pipeline started for camera {self.camera_id}")
+        return True
+
+    async def stop(self):
+        """Stop processing and release the video source."""
+        self.processor.is_running = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        # Waits for the capture thread to exit - keep it off the event loop
+        await asyncio.to_thread(self.processor.close)
+        logger.info(f"Pipeline stopped for camera {self.camera_id}")
+
+    def seek(self, position_ms: int):
+        """Seek the shared stream. Affects every viewer of this camera."""
+        self.processor.seek(position_ms)
+
+    def configure(
+        self,
+        source: str,
+        source_type: str,
+        processing_fps: Optional[float] = None,
+        detection_stride: Optional[int] = None,
+        inference_width: Optional[int] = None,
+        gmc_method: Optional[str] = None
+    ):
+        """Update source settings. Takes effect on the next start()."""
+        self.processor.source = source
+        self.processor.source_type = source_type
+        self.processor.max_fps = processing_fps
+        self.processor.detection_stride = max(1, detection_stride or 1)
+        self.processor.preprocessor = FramePreprocessor(inference_width)
+        self.processor.gmc_method = gmc_method
+        # Recreated on start with the new frame rate and GMC method
+        self.processor.session = None
+
+    async def restart(self) -> bool:
+        """Stop and start the pipeline, e.g. after a stall."""
+        await self.stop()
+        self.restarts += 1
+        return await self.start()
+
+    @property
+    def seconds_since_last_frame(self) -> float:
+        """Seconds since the last processed frame (or since start)."""
+        return time.time() - max(self.started_at, self.last_frame_time)
+
+    def has_viewers(self) -> bool:
+        """Whether anyone is watching this camera."""
+        if self._viewer_count is None:
+            return True
+        return self._viewer_count(self.camera_id) > 0
+
+    async def _run(self):
+        """Processing loop: one inference pass per frame for all viewers."""
+        alarm_manager = get_alarm_manager()
+        processor = self.processor
+
+        try:
+            async for stream_frame in processor.stream_frames(
+                with_detection=True,
+                rois_provider=self.roi_manager.get_all_rois,
+                render_provider=self.has_viewers
+            ):
+                self.frames_processed += 1
+                self.last_frame_time = time.time()
+                rendered = bool(stream_frame.frame_base64)
+
+                # One index per frame, shared by the rules, the metrics and the overlays
+                scene = SceneIndex(
+                    stream_frame.detection, self.roi_manager, self.active_roi_ids,
+                    canvas_width=processor.width, canvas_height=processor.height
+                )
+
+                # Evaluate safety rules
+                if stream_frame.detection:
+                    events = self.rule_engine.evaluate(
+                        stream_frame.detection,
+                        self.camera_id,
+                        self.active_roi_ids,
+                        canvas_width=processor.width,
+                        canvas_height=processor.height,
+                        scene=scene
+                    )
+
+                    # Process events with frame for snapshots
+                    if events:
+                        snapshot_frame = stream_frame.raw_frame
+                        if not rendered:
+                            # Nobody is watching: draw overlays only for the snapshot
+                            snapshot_frame = processor.render_overlays(
+                                snapshot_frame, stream_frame.detection, scene.rois
+                            )
+                        async with AsyncSessionLocal() as db_session:
+                            for event in events:
+                                event.camera_id = self.camera_id
+                                # Always save to DB to ensure timeline visibility
+                                event_data = await alarm_manager.process_event(
+                                    event,
+                                    frame=snapshot_frame if event.severity != Severity.INFO else None,
+                                    db_session=db_session
+                                )
+                                stream_frame.events.append(event_data)
+                                self.events_raised += 1
+
+                                # Broadcast to event subscribers
+                                if self._event_sink is not None:
+                                    await self._event_sink(event_data)
+
+                if not rendered:
+                    continue
+
+                # Add real-time metrics (counts and stay times)
+                roi_metrics = self.rule_engine.get_roi_metrics(self.active_roi_ids, scene=scene)
+
+                frame_data = {
+                    "type": "frame",
+                    "camera_id": self.camera_id,
+                    "frame": stream_frame.frame_base64,
+                    "current_ms": stream_frame.current_ms,
+                    "total_ms": stream_frame.total_ms,
+                    "detection": stream_frame.detection.to_dict() if stream_frame.detection else None,
+                    "events": stream_frame.events,
+                    "rois": scene.rois,
+                    "roi_metrics": roi_metrics
+                }
+
+                await self._frame_sink(self.camera_id, frame_data)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Pipeline error for camera {self.camera_id}: {e}")
+        finally:
+            processor.is_running = False
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get pipeline state for monitoring."""
+        return {
+            "camera_id": self.camera_id,
+            "running": self.is_running,
+            "source": self.processor.source,
+            "processing_fps": self.processor.target_fps,
+            "detection_stride": self.processor.detection_stride,
+            "preprocess": self.processor.preprocessor.get_stats(),
+            "session": self.processor.session.get_stats() if self.processor.session else None,
+            "viewers": self._viewer_count(self.camera_id) if self._viewer_count else None,
+            "frames_processed": self.frames_processed,
+            "events_raised": self.events_raised,
+            "started_at": self.started_at,
+            "last_frame_time": self.last_frame_time,
+            "restarts": self.restarts,
+            "last_error": self.last_error,
+            "active_roi_ids": self.active_roi_ids,
+            "motion_gate": self.processor.motion_gate.get_stats() if self.processor.motion_gate else None
+        }
+
+
+class PipelineRegistry:
+    """
+    Reference-counted registry of camera pipelines.
+
+    The first holder of a camera (a viewer or the monitoring supervisor)
+    starts its pipeline; the pipeline stops when the last holder releases it.
+    The registry lock only guards the bookkeeping; opening, stopping and
+    restarting a source happen under a per-camera lock, so a slow RTSP
+    reconnect never blocks the other cameras.
+    """
+
+    def __init__(
+        self,
+        frame_sink: FrameSink,
+        event_sink: Optional[EventSink] = None,
+        viewer_count: Optional[ViewerCounter] = None
+    ):
+        """
+        Initialize pipeline registry.
+
+        Args:
+            frame_sink: Coroutine fanning a frame out to a camera's viewers
+            event_sink: Coroutine broadcasting events to event subscribers
+            viewer_count: Returns the number of viewers of a camera
+        """
+        self._frame_sink = frame_sink
+        self._event_sink = event_sink
+        self._viewer_count = viewer_count
+        self._pipelines: Dict[int, CameraPipeline] = {}
+        self._refs: Dict[int, int] = {}
+        self._camera_locks: Dict[int, asyncio.Lock] = {}
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, camera: Camera) -> Optional[CameraPipeline]:
+        """
+        Get the running pipeline for a camera, starting it if needed.
+
+        Args:
+            camera: Camera row
+
+        Returns:
+            Running pipeline, or None if the source could not be opened
+        """
+        async with self._lock:
+            pipeline = self._pipelines.get(camera.id)
+            if pipeline is None:
+                pipeline = CameraPipeline(
+                    camera_id=camera.id,
+                    source=camera.source,
+                    source_type=camera.source_type,
+                    frame_sink=self._frame_sink,
+                    event_sink=self._event_sink,
+                    viewer_count=self._viewer_count,
+                    processing_fps=camera.processing_fps,
+                    detection_stride=camera.detection_stride,
+                    inference_width=camera.inference_width,
+                    gmc_method=camera.gmc_method
+                )
+                self._pipelines[camera.id] = pipeline
+                self._refs[camera.id] = 0
+                self._camera_locks[camera.id] = asyncio.Lock()
+            # Hold the reference while starting so a concurrent release cannot drop the pipeline
+            self._refs[camera.id] += 1
+            camera_lock = self._camera_locks[camera.id]
+
+        async with camera_lock:
+            started = pipeline.is_running or await pipeline.start()
+        if not started:
+            await self.release(camera.id)
+            return None
+        return pipeline
+
+    async def release(self, camera_id: int):
+        """Release a pipeline reference, stopping it when unused."""
+        async with self._lock:
+            if camera_id not in self._refs:
+                return
+            self._refs[camera_id] -= 1
+            if self._refs[camera_id] > 0:
+                return
+            pipeline = self._pipelines.pop(camera_id)
+            del self._refs[camera_id]
+            camera_lock = self._camera_locks.pop(camera_id)
+        async with camera_lock:
+            await pipeline.stop()
+
+    def get(self, camera_id: int) -> Optional[CameraPipeline]:
+        """Get the pipeline for a camera if one exists."""
+        return self._pipelines.get(camera_id)
+
+    async def restart(self, camera_id: int, camera: Optional[Camera] = None) -> bool:
+        """
+        Restart a camera's pipeline, optionally applying new camera settings.
+
+        Only this camera waits for the source to reopen; other cameras can be
+        acquired and released meanwhile.
+
+        Returns:
+            True if the pipeline is running afterwards
+        """
+        async with self._lock:
+            pipeline = self._pipelines.get(camera_id)
+            if pipeline is None:
+                return False
+            camera_lock = self._camera_locks[camera_id]
+
+        async with camera_lock:
+            if self._pipelines.get(camera_id) is not pipeline:
+                return False  # Released while waiting for the lock
+            if camera is not None:
+                pipeline.configure(
+                    camera.source, camera.source_type, camera.processing_fps,
+                    camera.detection_stride, camera.inference_width, camera.gmc_method
+                )
+            return await pipeline.restart()
+
+    async def stop_all(self):
+        """Stop every pipeline."""
+        async with self._lock:
+            pipelines = [(p, self._camera_locks[camera_id]) for camera_id, p in self._pipelines.items()]
+            self._pipelines.clear()
+            self._refs.clear()
+            self._camera_locks.clear()
+        for pipeline, camera_lock in pipelines:
+            async with camera_lock:
+                await pipeline.stop()
+
+    def get_status(self) -> Dict[int, Dict[str, Any]]:
+        """Get state of all pipelines."""
+        return {
+            camera_id: {**pipeline.get_status(), "refs": self._refs.get(camera_id, 0)}
+            for camera_id, pipeline in self._pipelines.items()
+        }
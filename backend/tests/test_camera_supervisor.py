@@ -0,0 +1,84 @@
+import sys
+import os
+import asyncio
+import time
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+import app.services.stream_pipeline as stream_pipeline
+from app.services.camera_supervisor import CameraSupervisor
+from app.services.stream_pipeline import PipelineRegistry
+
+
+class FakePipeline:
+    """CameraPipeline stand-in that stops producing frames on demand."""
+
+    def __init__(self, camera_id, **kwargs):
+        self.camera_id = camera_id
+        self.running = False
+        self.last_frame_time = 0.0
+        self.restarts = 0
+
+    @property
+    def is_running(self):
+        return self.running
+
+    @property
+    def seconds_since_last_frame(self):
+        return time.time() - self.last_frame_time
+
+    async def start(self):
+        self.running = True
+        self.last_frame_time = time.time()
+        return True
+
+    async def stop(self):
+        self.running = False
+
+    async def restart(self):
+        await self.stop()
+        self.restarts += 1
+        return await self.start()
+
+    def get_status(self):
+        return {"running": self.running, "restarts": self.restarts}
+
+
+def make_camera(camera_id):
+    return SimpleNamespace(
+        id=camera_id, source=f"rtsp://camera/{camera_id}", source_type="rtsp", processing_fps=None,
+        detection_stride=None, inference_width=None, gmc_method=None
+    )
+
+
+def test_stalled_and_stopped_pipelines_are_restarted(monkeypatch):
+    monkeypatch.setattr(stream_pipeline, "CameraPipeline", FakePipeline)
+
+    async def frame_sink(camera_id, frame_data):
+        pass
+
+    async def run():
+        registry = PipelineRegistry(frame_sink)
+        supervisor = CameraSupervisor(registry, check_interval=0.01, stall_seconds=5.0)
+        pipelines = {}
+        for camera_id in (1, 2, 3):
+            pipelines[camera_id] = await registry.acquire(make_camera(camera_id))
+            supervisor._supervised[camera_id] = ()
+
+        pipelines[2].last_frame_time = time.time() - 30  # Stalled
+        pipelines[3].running = False  # Died
+
+        await supervisor.check_pipelines()
+
+        assert {i: p.restarts for i, p in pipelines.items()} == {1: 0, 2: 1, 3: 1}
+        assert all(p.is_running for p in pipelines.values())
+        # Restarted pipelines are healthy again
+        await supervisor.check_pipelines()
+        assert {i: p.restarts for i, p in pipelines.items()} == {1: 0, 2: 1, 3: 1}
+
+        await supervisor.stop()
+        assert registry.get_status() == {}
+
+    asyncio.run(run())
@@ -0,0 +1,40 @@
+import sys
+import os
+
+from sqlalchemy import create_engine, inspect, text
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+import app.db.models  # noqa: F401 - registers the tables
+from app.db.database import Base, _add_missing_columns
+
+
+def test_missing_nullable_columns_are_added_to_old_tables():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        # cameras as created before the per-camera processing settings existed
+        connection.execute(text(
+            "CREATE TABLE cameras ("
+            "id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, source VARCHAR(500) NOT NULL, "
+            "source_type VARCHAR(20), is_active BOOLEAN, created_at DATETIME, updated_at DATETIME)"
+        ))
+        connection.execute(text(
+            "INSERT INTO cameras (id, name, source, source_type, is_active) "
+            "VALUES (1, 'Gate', 'rtsp://gate', 'rtsp', 1)"
+        ))
+
+    with engine.begin() as connection:
+        Base.metadata.create_all(connection)
+        _add_missing_columns(connection)
+
+    columns = {c["name"] for c in inspect(engine).get_columns("cameras")}
+    assert {"processing_fps", "detection_stride", "inference_width", "gmc_method"} <= columns
+    with engine.connect() as connection:
+        row = connection.execute(text("SELECT name, processing_fps, gmc_method FROM cameras")).one()
+    assert tuple(row) == ("Gate", None, None)
+
+    # Running it again on an up-to-date database changes nothing
+    with engine.begin() as connection:
+        _add_missing_columns(connection)
+    assert {c["name"] for c in inspect(engine).get_columns("cameras")} == columns
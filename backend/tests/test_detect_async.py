@@ -0,0 +1,78 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.core.detection import BaseDetector
+
+
+class SlowDetector(BaseDetector):
+    """Blocks for a while per frame and records peak concurrency."""
+
+    def __init__(self, delay=0.05, max_concurrency=1):
+        self.delay = delay
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def load_model(self) -> bool:
+        return True
+
+    @property
+    def is_loaded(self) -> bool:
+        return True
+
+    def predict(self, frame):
+        return np.empty((0, 6))
+
+    def detect(self, frame, frame_number=0, timestamp=0.0, tracker=None):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return self.build_result(self.predict(frame), frame, frame_number, timestamp, tracker)
+
+
+def test_detect_async_does_not_block_event_loop():
+    detector = SlowDetector(delay=0.1)
+    frame = np.zeros((8, 8, 3), dtype=np.uint8)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        result = await detector.detect_async(frame, frame_number=7)
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(run())
+    assert result.frame_number == 7
+    # The loop kept running while inference was in progress
+    assert ticks >= 5
+
+
+def test_detect_async_respects_per_model_concurrency():
+    detector = SlowDetector(delay=0.02, max_concurrency=1)
+    frame = np.zeros((8, 8, 3), dtype=np.uint8)
+
+    async def run():
+        return await asyncio.gather(*(detector.detect_async(frame, frame_number=i) for i in range(4)))
+
+    results = asyncio.run(run())
+    assert [r.frame_number for r in results] == [0, 1, 2, 3]
+    assert detector.peak == 1
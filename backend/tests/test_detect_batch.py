@@ -0,0 +1,112 @@
+import sys
+import os
+
+import cv2
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+import app.core.detection as detection
+from app.api.routes.detect import router
+from app.config import settings
+from app.core.detection import BaseDetector
+
+
+class SizeDetector(BaseDetector):
+    """One person box covering the whole input image."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def load_model(self) -> bool:
+        return True
+
+    @property
+    def is_loaded(self) -> bool:
+        return True
+
+    def predict(self, frame):
+        h, w = frame.shape[:2]
+        return np.array([[0.0, 0.0, float(w), float(h), 0.9, 6.0]])
+
+    def predict_batch(self, frames):
+        if self.fail:
+            raise RuntimeError("worker died")
+        self.batches.append(len(frames))
+        return [self.predict(f) for f in frames]
+
+    def detect(self, frame, frame_number=0, timestamp=0.0, tracker=None):
+        return self.build_result(self.predict(frame), frame, frame_number, timestamp, tracker)
+
+
+def encode(width, height, ext=".png"):
+    _, data = cv2.imencode(ext, np.zeros((height, width, 3), dtype=np.uint8))
+    return data.tobytes()
+
+
+def make_client(monkeypatch, fail=False):
+    detector = SizeDetector(fail)
+    monkeypatch.setattr(detection, "_detector_instance", detector)
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    return TestClient(app), detector
+
+
+def test_batch_runs_one_inference_in_upload_order(monkeypatch):
+    client, detector = make_client(monkeypatch)
+    files = [
+        ("files", ("a.png", encode(320, 200), "image/png")),
+        ("files", ("b.jpg", encode(640, 480, ".jpg"), "image/jpeg")),
+        ("files", ("c.png", encode(100, 50), "image/png")),
+    ]
+
+    response = client.post("/api/detect/batch", files=files, params={"inference_width": 320})
+
+    assert response.status_code == 200
+    results = response.json()
+    assert detector.batches == [3]
+    assert [r["frame_number"] for r in results] == [0, 1, 2]
+    # Boxes are mapped back to source pixels after downscaling
+    assert [(r["detections"][0]["x2"], r["detections"][0]["y2"]) for r in results] == [
+        (320.0, 200.0), (640.0, 480.0), (100.0, 50.0)
+    ]
+    assert all(r["persons_count"] == 1 for r in results)
+
+
+def test_batch_rejects_undecodable_images(monkeypatch):
+    client, detector = make_client(monkeypatch)
+    files = [
+        ("files", ("ok.png", encode(32, 32), "image/png")),
+        ("files", ("broken.jpg", b"not an image", "image/jpeg")),
+    ]
+
+    response = client.post("/api/detect/batch", files=files)
+
+    assert response.status_code == 400
+    assert "broken.jpg" in response.json()["detail"]
+    assert detector.batches == []
+
+
+def test_large_uploads_run_in_chunks_of_max_batch(monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_MAX_BATCH", 2)
+    client, detector = make_client(monkeypatch)
+    files = [("files", (f"{i}.png", encode(40 + i, 30), "image/png")) for i in range(5)]
+
+    response = client.post("/api/detect/batch", files=files)
+
+    assert response.status_code == 200
+    assert detector.batches == [2, 2, 1]
+    assert [r["detections"][0]["x2"] for r in response.json()] == [40.0, 41.0, 42.0, 43.0, 44.0]
+
+
+def test_inference_failure_is_a_server_error(monkeypatch):
+    client, _ = make_client(monkeypatch, fail=True)
+
+    response = client.post("/api/detect/batch", files=[("files", ("a.png", encode(32, 32), "image/png"))])
+
+    assert response.status_code == 500
+    assert "worker died" in response.json()["detail"]
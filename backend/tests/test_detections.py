@@ -0,0 +1,64 @@
+import sys
+import os
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+import numpy as np
+
+from app.core.detections import FrameDetections
+from app.schemas.detection import DetectionBox, DetectionResult
+
+
+def make_detections():
+    rows = np.array([
+        [10, 20, 30, 60, 7, 0.9, 0],
+        [12, 18, 28, 30, np.nan, 0.8, 1],
+        [100, 100, 140, 180, 3, 0.7, 0],
+    ])
+    return FrameDetections.from_rows(rows, ["person", "helmet", "person"], frame_number=5, timestamp=1.5)
+
+
+def test_of_class_and_counts():
+    detections = make_detections()
+    persons = detections.of_class("person")
+
+    assert len(persons) == 2
+    assert detections.persons_count == 2
+    assert detections.helmets_count == 1
+    assert [b.track_id for b in persons.boxes()] == [7, 3]
+    assert detections.of_class("helmet").boxes()[0].track_id is None
+    assert persons.boxes()[0].center_x == 20.0
+
+
+def test_to_dict_matches_pydantic_dump():
+    detections = make_detections()
+    expected = DetectionResult(
+        frame_number=5,
+        timestamp=1.5,
+        detections=[
+            DetectionBox(class_id=b.class_id, class_name=b.class_name, confidence=b.confidence,
+                         x1=b.x1, y1=b.y1, x2=b.x2, y2=b.y2,
+                         center_x=b.center_x, center_y=b.center_y, track_id=b.track_id)
+            for b in detections.boxes()
+        ],
+        persons_count=2,
+        helmets_count=1
+    ).model_dump()
+
+    assert detections.to_dict() == expected
+    assert detections.to_schema().model_dump() == expected
+
+
+def test_from_result_round_trip():
+    detections = make_detections()
+    restored = FrameDetections.from_result(detections.to_schema())
+
+    assert restored.to_dict() == detections.to_dict()
+    assert len(FrameDetections.empty(1, 0.0).to_dict()["detections"]) == 0
+
+
+def test_with_frame_shares_columns():
+    detections = make_detections()
+    moved = detections.with_frame(9, 3.0)
+
+    assert moved.frame_number == 9 and moved.timestamp == 3.0
+    assert moved.xyxy is detections.xyxy
@@ -0,0 +1,68 @@
+import sys
+import os
+import asyncio
+import json
+import threading
+import time
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+import app.core.detection as detection
+from app.core.detection import BaseDetector, load_detector, preload_detector, get_detector_readiness
+
+
+class CountingDetector(BaseDetector):
+    def __init__(self, load_delay=0.0):
+        self.load_delay = load_delay
+        self.loads = 0
+        self.frames = []
+        self._is_loaded = False
+
+    def load_model(self) -> bool:
+        time.sleep(self.load_delay)
+        self.loads += 1
+        self._is_loaded = True
+        return True
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._is_loaded
+
+    def predict(self, frame):
+        return np.empty((0, 6))
+
+    def detect(self, frame, frame_number=0, timestamp=0.0, tracker=None):
+        self.frames.append(frame.shape)
+        return self.build_result(self.predict(frame), frame, frame_number, timestamp, tracker)
+
+
+def test_preload_loads_once_and_warms_up(monkeypatch):
+    detector = CountingDetector(load_delay=0.05)
+    monkeypatch.setattr(detection, "_detector_instance", detector)
+
+    # A camera starting during preload must wait for it, not load again
+    camera = threading.Thread(target=load_detector, args=(detector,))
+    camera.start()
+    assert preload_detector(warmup_runs=2, frame_size=(64, 48))
+    camera.join()
+
+    assert detector.loads == 1
+    assert detector.frames == [(48, 64, 3), (48, 64, 3)]
+    assert get_detector_readiness()["state"] == "ready"
+
+
+def test_health_is_503_until_ready(monkeypatch):
+    from app.main import health_check
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "DETECTOR_PRELOAD", True)
+    monkeypatch.setitem(detection._readiness, "state", "warming")
+    response = asyncio.run(health_check())
+    assert response.status_code == 503
+    assert json.loads(response.body)["detector"]["state"] == "warming"
+
+    monkeypatch.setitem(detection._readiness, "state", "ready")
+    assert asyncio.run(health_check())["status"] == "healthy"
@@ -0,0 +1,69 @@
+import sys
+import os
+import asyncio
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.core.detection import BaseDetector
+from app.core.detector_session import DetectorSession
+
+
+class OneBoxDetector(BaseDetector):
+    """Returns one person box per frame."""
+
+    def load_model(self) -> bool:
+        return True
+
+    @property
+    def is_loaded(self) -> bool:
+        return True
+
+    def predict(self, frame):
+        return np.array([[10.0, 10.0, 50.0, 90.0, 0.9, 0.0]])
+
+    def detect(self, frame, frame_number=0, timestamp=0.0, tracker=None):
+        return self.build_result(self.predict(frame), frame, frame_number, timestamp, tracker)
+
+
+class RecordingTracker:
+    def __init__(self):
+        self.frames = []
+
+    def update(self, detections, frame):
+        self.frames.append(frame)
+        return np.column_stack([detections[:, :4], np.full(len(detections), len(self.frames)), detections[:, 4:6]])
+
+    def predict(self, progress=1.0):
+        return np.empty((0, 7))
+
+
+def test_sessions_share_detector_but_not_tracker():
+    detector = OneBoxDetector()
+    first = DetectorSession(1, detector, frame_rate=10)
+    second = DetectorSession(2, detector, frame_rate=5)
+    first.tracker, second.tracker = RecordingTracker(), RecordingTracker()
+    frame = np.zeros((100, 100, 3), dtype=np.uint8)
+
+    async def run():
+        for i in range(3):
+            await first.detect_async(frame, frame_number=i)
+        return await second.detect_async(frame, frame_number=0)
+
+    result = asyncio.run(run())
+
+    assert first.detector is second.detector
+    assert len(first.tracker.frames) == 3
+    assert len(second.tracker.frames) == 1
+    assert result.boxes()[0].track_id == 1
+    assert first.get_stats()["frames"] == 3
+    assert second.get_stats()["tracker_fps"] == 5
+
+
+def test_predict_returns_none_without_tracks():
+    session = DetectorSession(1, OneBoxDetector())
+    session.tracker = RecordingTracker()
+
+    assert session.predict(0.5, frame_number=1, timestamp=0.1) is None
@@ -0,0 +1,163 @@
+import sys
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.core.frame_grabber import FrameGrabber
+from app.core.video_processor import VideoProcessor
+
+
+class FakeCapture:
+    """Minimal stand-in for cv2.VideoCapture producing numbered frames."""
+
+    def __init__(self, total_frames=1000, fps=30.0):
+        self.total_frames = total_frames
+        self.fps = fps
+        self.pos = 0
+
+    def read(self):
+        if self.pos >= self.total_frames:
+            return False, None
+        frame = np.full((4, 4, 3), self.pos % 256, dtype=np.uint8)
+        self.pos += 1
+        return True, frame
+
+    def grab(self):
+        ok, _ = self.read()
+        return ok
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.pos)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.pos / self.fps * 1000.0
+        return 0.0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.pos = int(value)
+        return True
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def test_live_source_keeps_latest_frames():
+    grabber = FrameGrabber(FakeCapture(total_frames=200), source_type="rtsp", buffer_size=2)
+    grabber.start()
+    try:
+        assert _wait_for(lambda: grabber.eof)
+        first = grabber.read()
+        second = grabber.read()
+        # Only the newest frames survive once the source has been drained
+        assert (first.frame_number, second.frame_number) == (199, 200)
+        assert grabber.read() is None
+        assert grabber.frames_dropped == 198
+    finally:
+        grabber.stop()
+
+
+def test_file_source_applies_backpressure_and_seek():
+    grabber = FrameGrabber(FakeCapture(total_frames=1000), source_type="file", buffer_size=2)
+    grabber.start()
+    try:
+        numbers = [grabber.read(timeout=1.0).frame_number for _ in range(5)]
+        assert numbers == [1, 2, 3, 4, 5]
+        assert grabber.frames_dropped == 0
+
+        grabber.request_seek(500)
+        captured = grabber.read(timeout=1.0)
+        assert captured.frame_number == 501
+        assert abs(captured.timestamp - 501 / 30.0) < 1e-6
+    finally:
+        grabber.stop()
+    assert not grabber.is_alive
+
+
+class BlockingCapture(FakeCapture):
+    """Capture whose read() hangs like a dead RTSP stream until unblocked."""
+
+    def __init__(self):
+        super().__init__()
+        self.unblock = threading.Event()
+        self.reading = threading.Event()
+        self.releases = 0
+
+    def isOpened(self):
+        return self.releases == 0
+
+    def read(self):
+        self.reading.set()
+        self.unblock.wait()
+        assert self.releases == 0, "read() on a released capture"
+        return super().read()
+
+    def release(self):
+        self.releases += 1
+
+
+def test_capture_is_released_only_after_the_thread_exits():
+    cap = BlockingCapture()
+    grabber = FrameGrabber(cap, source_type="rtsp")
+    grabber.start()
+    assert cap.reading.wait(1.0)
+
+    assert grabber.stop(timeout=0.05, release_capture=True) is False
+    assert cap.releases == 0 and grabber.is_alive
+
+    cap.unblock.set()
+    assert _wait_for(lambda: not grabber.is_alive)
+    assert cap.releases == 1
+
+
+def test_video_processor_close_hands_release_to_the_capture_thread():
+    cap = BlockingCapture()
+    processor = VideoProcessor(camera_id=1, source="rtsp://camera", source_type="rtsp")
+    processor.cap = cap
+    assert processor.start_capture()
+    assert cap.reading.wait(1.0)
+    grabber = processor._grabber
+
+    processor.close()
+
+    assert processor.cap is None and cap.releases == 0
+    cap.unblock.set()
+    assert _wait_for(lambda: cap.releases == 1 and not grabber.is_alive)
+
+    # A grabber that stops in time releases right away
+    cap = BlockingCapture()
+    cap.unblock.set()
+    processor.cap = cap
+    processor.start_capture()
+    processor.close()
+    assert cap.releases == 1
+
+
+def test_stop_capture_keeps_a_stuck_grabber_for_close():
+    cap = BlockingCapture()
+    processor = VideoProcessor(camera_id=1, source="rtsp://camera", source_type="rtsp")
+    processor.cap = cap
+    processor.start_capture()
+    assert cap.reading.wait(1.0)
+    grabber = processor._grabber
+
+    # As at the end of stream_frames(), then CameraPipeline.stop()
+    processor.stop_capture()
+    assert processor._grabber is grabber
+    processor.close()
+
+    assert cap.releases == 0
+    cap.unblock.set()
+    assert _wait_for(lambda: cap.releases == 1 and not grabber.is_alive)
@@ -0,0 +1,32 @@
+import sys
+import os
+import json
+import subprocess
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only the components that run a model or evaluate ROIs may import these
+HEAVY_MODULES = ["torch", "ultralytics", "rfdetr", "shapely", "scipy", "onnxruntime"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % HEAVY_MODULES
+
+
+def test_api_import_is_lightweight():
+    # Fresh interpreter, so modules imported by other tests do not count
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    print(f"import app.main: {result['seconds'] * 1000:.0f} ms")
+
+    assert result["loaded"] == []
+    assert result["seconds"] < 5.0
@@ -0,0 +1,158 @@
+import sys
+import os
+import asyncio
+import threading
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.core.detection import BaseDetector
+from app.core.inference_scheduler import InferenceScheduler
+from app.core.roi_crop import compute_crop_regions
+
+
+class FakeDetector(BaseDetector):
+    """Returns one person box per frame, positioned by the frame's fill value."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def load_model(self) -> bool:
+        return True
+
+    @property
+    def is_loaded(self) -> bool:
+        return True
+
+    def predict(self, frame):
+        x = float(frame[0, 0, 0])
+        return np.array([[x, 0.0, x + 10.0, 20.0, 0.9, 6]])
+
+    def predict_batch(self, frames):
+        self.batch_sizes.append(len(frames))
+        return [self.predict(frame) for frame in frames]
+
+    def detect(self, frame, frame_number=0, timestamp=0.0, tracker=None):
+        return self.build_result(self.predict(frame), frame, frame_number, timestamp, tracker)
+
+
+class RecordingTracker:
+    """Tracker stub that tags every detection with a fixed ID."""
+
+    def __init__(self, track_id):
+        self.track_id = track_id
+        self.updates = 0
+
+    def update(self, detections, frame):
+        self.updates += 1
+        return np.array([[*d[:4], self.track_id, d[4], d[5]] for d in detections])
+
+
+def test_frames_from_many_cameras_share_one_batch():
+    detector = FakeDetector()
+    scheduler = InferenceScheduler(detector_provider=lambda: detector, max_batch=4, max_wait_ms=50)
+    trackers = [RecordingTracker(100 + i) for i in range(4)]
+
+    async def run():
+        frames = [np.full((8, 8, 3), 10 * i, dtype=np.uint8) for i in range(4)]
+        results = await asyncio.gather(*(
+            scheduler.submit(frame, frame_number=i, timestamp=float(i), tracker=trackers[i])
+            for i, frame in enumerate(frames)
+        ))
+        await scheduler.stop()
+        return results
+
+    results = asyncio.run(run())
+
+    assert detector.batch_sizes == [4]
+    for i, result in enumerate(results):
+        # Each result is routed back to the camera that submitted it
+        assert result.frame_number == i
+        assert result.detections[0].x1 == 10.0 * i
+        assert result.detections[0].track_id == 100 + i
+        assert result.persons_count == 1
+    assert [t.updates for t in trackers] == [1, 1, 1, 1]
+
+
+def test_partial_batch_dispatched_after_deadline():
+    detector = FakeDetector()
+    scheduler = InferenceScheduler(detector_provider=lambda: detector, max_batch=8, max_wait_ms=5)
+
+    async def run():
+        result = await scheduler.submit(np.zeros((8, 8, 3), dtype=np.uint8))
+        await scheduler.stop()
+        return result
+
+    result = asyncio.run(run())
+    assert detector.batch_sizes == [1]
+    assert len(result.detections) == 1
+
+
+def test_tiles_count_against_the_batch_size():
+    detector = FakeDetector()
+    scheduler = InferenceScheduler(detector_provider=lambda: detector, max_batch=4, max_wait_ms=50)
+    # Two separate zones per camera -> two tiles per frame
+    rois = [
+        {"points": [{"x": 0.0, "y": 0.0}, {"x": 0.2, "y": 0.0}, {"x": 0.2, "y": 0.2}]},
+        {"points": [{"x": 0.8, "y": 0.8}, {"x": 1.0, "y": 0.8}, {"x": 1.0, "y": 1.0}]}
+    ]
+    regions = compute_crop_regions(rois, 100, 100, mode="tiles", padding=0.0)
+    assert len(regions) == 2
+
+    async def run():
+        frames = [np.full((100, 100, 3), 10 * i, dtype=np.uint8) for i in range(5)]
+        results = await asyncio.gather(*(
+            scheduler.submit(frame, frame_number=i, regions=regions)
+            for i, frame in enumerate(frames)
+        ))
+        await scheduler.stop()
+        return results
+
+    results = asyncio.run(run())
+
+    # 5 cameras x 2 tiles: never more than 4 detector inputs per call
+    assert detector.batch_sizes == [4, 4, 2]
+    assert scheduler.frames_run == 5
+    for i, result in enumerate(results):
+        assert result.frame_number == i
+        # One box per tile, mapped back to full-frame pixels
+        assert sorted(d.x1 for d in result.detections) == [10.0 * i, 80 + 10.0 * i]
+
+
+class BlockingDetector(FakeDetector):
+    """Holds every batch until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def predict_batch(self, frames):
+        self.started.set()
+        self.release.wait(5)
+        return super().predict_batch(frames)
+
+
+def test_stop_cancels_callers_of_a_running_batch():
+    detector = BlockingDetector()
+    scheduler = InferenceScheduler(detector_provider=lambda: detector, max_batch=2, max_wait_ms=50)
+
+    async def run():
+        submits = [
+            asyncio.create_task(scheduler.submit(np.zeros((8, 8, 3), dtype=np.uint8), frame_number=i))
+            for i in range(3)
+        ]
+        while not detector.started.is_set():
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+        try:
+            return await asyncio.wait_for(asyncio.gather(*submits, return_exceptions=True), timeout=1.0)
+        finally:
+            detector.release.set()
+
+    results = asyncio.run(run())
+
+    # Two frames in the running batch, one still being collected or queued
+    assert all(isinstance(r, asyncio.CancelledError) for r in results)
@@ -0,0 +1,207 @@
+import sys
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+import app.core.detection as detection
+import app.core.inference_server as inference_server
+from app.config import settings
+from app.core.inference_server import ProcessPoolDetector
+
+
+class ThreadProcess(threading.Thread):
+    """threading.Thread with the bits of multiprocessing.Process the pool uses."""
+    exitcode = None
+
+    def run(self):
+        try:
+            super().run()
+        except SystemExit:
+            pass  # A "killed" worker
+
+
+class ThreadContext:
+    """Runs the pool's "worker processes" as threads of this process."""
+    Queue = queue.Queue
+
+    def Process(self, target, args, name, daemon):
+        return ThreadProcess(target=target, args=args, name=name, daemon=daemon)
+
+
+class FakeBackend:
+    """Detector built inside a worker: one box per frame, sized like the frame."""
+
+    def __init__(self, loads=True):
+        self.loads = loads
+
+    def load_model(self):
+        return self.loads
+
+    def _class_name(self, cls_id):
+        return settings.CLASS_NAMES[cls_id]
+
+    def _map_category(self, class_name, counts):
+        return class_name, counts
+
+    def predict_batch(self, frames):
+        return [np.array([[0.0, 0.0, f.shape[1], f.shape[0], 0.9, 6.0]]) for f in frames]
+
+
+def make_detector(monkeypatch, max_batch=2, workers=1, loads=True, slot_bytes=64 * 64 * 3):
+    monkeypatch.setattr(settings, "INFERENCE_MAX_BATCH", max_batch)
+    monkeypatch.setattr(settings, "INFERENCE_WORKER_STARTUP_TIMEOUT", 5.0)
+    monkeypatch.setattr(inference_server, "create_detector", lambda *args: FakeBackend(loads))
+    detector = ProcessPoolDetector("fake", num_workers=workers, slot_bytes=slot_bytes)
+    detector._ctx = ThreadContext()
+    detector.request_timeout = 5.0
+    return detector
+
+
+def frames(count, size=32):
+    return [np.full((size, size + i, 3), i, dtype=np.uint8) for i in range(count)]
+
+
+def test_batches_larger_than_the_slot_pool_are_chunked(monkeypatch):
+    detector = make_detector(monkeypatch, max_batch=1)  # 2 slots
+    try:
+        outputs = detector.predict_batch(frames(5))
+
+        assert [o[0][2] for o in outputs] == [32, 33, 34, 35, 36]
+        assert detector.get_stats()["free_slots"] == 2
+    finally:
+        detector.shutdown()
+
+
+def test_concurrent_callers_share_the_pool(monkeypatch):
+    detector = make_detector(monkeypatch, max_batch=2)  # 4 slots
+    try:
+        detector.load_model()
+        results = {}
+
+        def call(i):
+            results[i] = detector.predict_batch(frames(3 + i))
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=10)
+
+        assert {i: len(r) for i, r in results.items()} == {0: 3, 1: 4, 2: 5, 3: 6}
+        assert detector.get_stats()["free_slots"] == 4
+    finally:
+        detector.shutdown()
+
+
+def test_failures_raise_instead_of_returning_empty_results(monkeypatch):
+    detector = make_detector(monkeypatch, loads=False)
+    monkeypatch.setattr(settings, "INFERENCE_WORKER_STARTUP_TIMEOUT", 0.5)
+    try:
+        with pytest.raises(RuntimeError):
+            detector.predict_batch(frames(1))
+    finally:
+        detector.shutdown()
+
+
+def test_crashing_workers_back_off_and_are_given_up(monkeypatch):
+    detector = make_detector(monkeypatch, loads=False)
+    monkeypatch.setattr(settings, "INFERENCE_WORKER_STARTUP_TIMEOUT", 0.1)
+    monkeypatch.setattr(settings, "INFERENCE_WORKER_MAX_RESTARTS", 2)
+    monkeypatch.setattr(settings, "INFERENCE_WORKER_RESTART_BACKOFF", 0.01)
+    monkeypatch.setattr(detection, "_detector_instance", detector)
+    try:
+        assert not detector.load_model()
+        deadline = time.time() + 10
+        while detector.failure is None and time.time() < deadline:
+            time.sleep(0.1)
+
+        stats = detector.get_stats()["workers"][0]
+        assert stats["failed"] and stats["restarts"] == 2
+        assert "Failed to load fake model" in detector.failure
+        assert detection.get_detector_readiness()["state"] == "failed"
+        # No restarts once given up
+        time.sleep(1.2)
+        assert detector.get_stats()["workers"][0]["restarts"] == 2
+    finally:
+        detector.shutdown()
+
+
+def test_dead_worker_is_restarted_under_steady_load(monkeypatch):
+    detector = make_detector(monkeypatch, max_batch=1, workers=2)
+    monkeypatch.setattr(settings, "INFERENCE_WORKER_RESTART_BACKOFF", 0.01)
+    stop = threading.Event()
+
+    def load():
+        while not stop.is_set():
+            detector.predict_batch(frames(1))
+
+    try:
+        assert detector.load_model()
+        busy = threading.Thread(target=load)
+        busy.start()
+        detector._workers[0].task_queue.put(None)  # Worker 0 exits
+
+        deadline = time.time() + 5
+        while detector.get_stats()["workers"][0]["restarts"] == 0 and time.time() < deadline:
+            time.sleep(0.05)
+        stop.set()
+        busy.join(timeout=5)
+
+        assert detector.get_stats()["workers"][0]["restarts"] == 1
+    finally:
+        stop.set()
+        detector.shutdown()
+
+
+class HangingBackend(FakeBackend):
+    """Blocks in predict_batch until its worker is "terminated", then dies."""
+    hang = True
+    killed = threading.Event()
+
+    def predict_batch(self, frames):
+        if HangingBackend.hang:
+            HangingBackend.hang = False
+            HangingBackend.killed.wait(10)
+            raise SystemExit  # Ends the worker thread without an answer
+        return super().predict_batch(frames)
+
+
+def test_slots_of_a_hung_worker_are_quarantined_until_it_exits(monkeypatch):
+    detector = make_detector(monkeypatch, max_batch=1)  # 2 slots
+    monkeypatch.setattr(settings, "INFERENCE_WORKER_RESTART_BACKOFF", 0.01)
+    monkeypatch.setattr(inference_server, "create_detector", lambda *args: HangingBackend())
+    terminated = threading.Event()
+    monkeypatch.setattr(ThreadProcess, "terminate", lambda self: terminated.set(), raising=False)
+    HangingBackend.hang = True
+    HangingBackend.killed.clear()
+    detector.request_timeout = 0.3
+    try:
+        assert detector.load_model()
+        with pytest.raises(RuntimeError, match="timed out"):
+            detector.predict_batch(frames(1))
+
+        # The hung worker is told to stop, but still holds its slot
+        assert terminated.is_set()
+        time.sleep(0.6)
+        stats = detector.get_stats()
+        assert stats["free_slots"] == 1 and stats["workers"][0]["quarantined_slots"] == 1
+
+        # Freed once it has exited (and is restarted)
+        HangingBackend.killed.set()
+        deadline = time.time() + 5
+        while detector.get_stats()["workers"][0]["restarts"] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        stats = detector.get_stats()
+        assert stats["free_slots"] == 2 and stats["workers"][0]["quarantined_slots"] == 0
+
+        detector.request_timeout = 5.0
+        assert [o[0][2] for o in detector.predict_batch(frames(2))] == [32, 33]
+    finally:
+        detector.shutdown()
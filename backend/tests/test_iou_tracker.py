@@ -0,0 +1,102 @@
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.core.tracker import BoTSORTTracker, IoUTracker, get_tracker
+
+
+def moving_boxes(step, count=50):
+    """count non-overlapping person boxes drifting right by 2 px per frame."""
+    x = np.arange(count) % 10 * 60.0 + 2 * step
+    y = np.arange(count) // 10 * 100.0
+    return np.column_stack([x, y, x + 40, y + 80, np.full(count, 0.9), np.zeros(count)])
+
+
+def ids_by_x(tracks):
+    return dict(zip(np.round(tracks[:, 0]).astype(int).tolist(), tracks[:, 4].astype(int).tolist()))
+
+
+def test_ids_stable_while_objects_move():
+    tracker = get_tracker("iou", frame_rate=15)
+    first = tracker.update(moving_boxes(0))
+    ids = set(first[:, 4].tolist())
+
+    for step in range(1, 20):
+        tracks = tracker.update(moving_boxes(step))
+        assert set(tracks[:, 4].tolist()) == ids
+
+
+def test_track_survives_short_occlusion():
+    tracker = IoUTracker(track_buffer=30, frame_rate=30)
+    box = np.array([[100, 100, 140, 180, 0.9, 0]], dtype=float)
+    track_id = tracker.update(box)[0, 4]
+
+    for _ in range(5):
+        assert len(tracker.update(np.empty((0, 6)))) == 0
+
+    assert tracker.update(box)[0, 4] == track_id
+
+
+def test_classes_do_not_swap_ids():
+    tracker = IoUTracker()
+    person = [100, 100, 140, 180, 0.9, 0]
+    helmet = [105, 100, 135, 120, 0.9, 1]
+    first = tracker.update(np.array([person, helmet], dtype=float))
+    second = tracker.update(np.array([helmet, person], dtype=float))
+
+    assert {tuple(r[[4, 6]]) for r in first} == {tuple(r[[4, 6]]) for r in second}
+
+
+def test_botsort_fallback_keeps_ids():
+    tracker = BoTSORTTracker()
+    tracker.tracker = None
+    first = tracker.update(moving_boxes(0, 5), None)
+    second = tracker.update(moving_boxes(1, 5)[::-1], None)
+
+    assert sorted(ids_by_x(first).values()) == sorted(ids_by_x(second).values())
+    assert ids_by_x(second)[2] == ids_by_x(first)[0]
+
+
+def test_update_is_fast_for_50_boxes():
+    tracker = IoUTracker()
+    tracker.update(moving_boxes(0))
+    start = time.perf_counter()
+    for step in range(1, 101):
+        tracker.update(moving_boxes(step))
+    per_frame_ms = (time.perf_counter() - start) * 10.0
+
+    assert per_frame_ms < 2.0
+
+
+class FlakyBotsort:
+    """BOTSORT stand-in that numbers tracks from 1 and fails every other update."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def update(self, detections, frame):
+        self.calls += 1
+        if self.calls % 2 == 0:
+            raise AttributeError("'numpy.ndarray' object has no attribute 'conf'")
+        ids = np.arange(1, len(detections) + 1)
+        return np.column_stack([detections[:, :4], ids, detections[:, 4:6]])
+
+
+def test_botsort_failure_switches_to_fallback_without_reusing_ids():
+    tracker = BoTSORTTracker()
+    flaky = FlakyBotsort()
+    tracker.tracker = flaky
+    first = ids_by_x(tracker.update(moving_boxes(0, 3), None))
+
+    # Other people appear once BOTSORT has failed
+    later = [ids_by_x(tracker.update(moving_boxes(step, 3) + [300, 0, 300, 0, 0, 0], None)) for step in range(1, 6)]
+
+    assert first == {0: 1, 60: 2, 120: 3}
+    assert flaky.calls == 2 and tracker.get_stats()["backend"] == "iou"
+    # Stable IDs from the fallback, none of them naming a BOTSORT track
+    assert all(sorted(ids.values()) == [4, 5, 6] for ids in later)
@@ -0,0 +1,128 @@
+import sys
+import os
+import asyncio
+
+import numpy as np
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+import app.core.detection as detection
+import app.core.model_registry as model_registry
+from app.core.detection import BaseDetector
+from app.core.model_registry import ModelRegistry
+
+
+class FakeDetector(BaseDetector):
+    def __init__(self, name, loads=True):
+        self.name = name
+        self.loads = loads
+        self.warmups = 0
+        self.closed = False
+        self._is_loaded = False
+
+    def load_model(self) -> bool:
+        self._is_loaded = self.loads
+        return self.loads
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._is_loaded
+
+    def predict(self, frame):
+        return np.empty((0, 6))
+
+    def detect(self, frame, frame_number=0, timestamp=0.0, tracker=None):
+        self.warmups += 1
+        return self.build_result(self.predict(frame), frame, frame_number, timestamp, tracker)
+
+    def shutdown(self):
+        self.closed = True
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    old = FakeDetector("old")
+    new = FakeDetector("new")
+    monkeypatch.setattr(detection, "_detector_instance", old)
+    monkeypatch.setattr(model_registry, "build_detector", lambda *args: new)
+    return ModelRegistry(), old, new
+
+
+def test_swap_waits_for_in_flight_inference(registry):
+    registry, old, new = registry
+
+    with registry.use() as detector:
+        assert detector is old
+        entry = asyncio.run(registry.swap(model_path="models/new.pt", warmup_runs=2))
+
+        # New frames go to the new model while the old one drains
+        assert detection.get_detector() is new
+        assert entry.state == "active" and new.warmups == 2
+        status = registry.get_status()
+        assert status["active"]["model_path"] == "models/new.pt"
+        assert [d["version"] for d in status["draining"]] == [1]
+        assert not old.closed
+
+    assert old.closed
+    status = registry.get_status()
+    assert status["draining"] == []
+    assert status["retired"][0]["version"] == 1
+    assert status["retired"][0]["inferences"] == 1
+
+
+def test_swap_releases_idle_model_immediately(registry):
+    registry, old, new = registry
+    with registry.use():
+        pass
+
+    asyncio.run(registry.swap(warmup_runs=0))
+    with registry.use() as detector:
+        assert detector is new
+
+    assert old.closed
+    assert registry.get_status()["active"]["inferences"] == 1
+
+
+def test_failed_load_keeps_current_model(registry, monkeypatch):
+    registry, old, _ = registry
+    broken = FakeDetector("broken", loads=False)
+    monkeypatch.setattr(model_registry, "build_detector", lambda *args: broken)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(registry.swap(warmup_runs=0))
+
+    assert detection.get_detector() is old
+    assert broken.closed
+    status = registry.get_status()
+    assert status["pending"] is None
+    assert status["retired"][0]["state"] == "failed"
+
+
+def test_only_one_swap_at_a_time(registry):
+    registry, _, _ = registry
+
+    async def run():
+        entry = registry.start_swap(warmup_runs=0)
+        with pytest.raises(RuntimeError):
+            registry.start_swap(warmup_runs=0)
+        await registry._swap_task
+        return entry
+
+    entry = asyncio.run(run())
+    assert entry.state == "active"
+    assert not registry.swapping
+
+
+@pytest.mark.parametrize("model_path", ["../app/config.py", "models/../../etc/passwd", "/etc/passwd", "models"])
+def test_swap_rejects_models_outside_models_dir(registry, model_path):
+    registry, old, new = registry
+
+    with pytest.raises(ValueError):
+        asyncio.run(registry.swap(model_path=model_path))
+
+    assert registry.get_status()["active"]["version"] == 1
+    assert not registry.swapping
+    with pytest.raises(ValueError):
+        detection.create_detector("rfdetr", "none", model_path)
@@ -0,0 +1,39 @@
+import sys
+import os
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.core.motion_gate import MotionGate
+
+
+def _frame():
+    return np.full((360, 640, 3), 80, dtype=np.uint8)
+
+
+def test_static_scene_skips_until_refresh():
+    gate = MotionGate(refresh_seconds=2.0)
+
+    assert gate.should_infer(_frame(), 0.0)  # first frame always runs
+    assert not gate.should_infer(_frame(), 0.5)
+    assert not gate.should_infer(_frame(), 1.5)
+    assert gate.should_infer(_frame(), 2.1)  # forced refresh
+    assert gate.frames_skipped == 2
+
+
+def test_small_motion_near_roi_triggers_inference():
+    roi = {"points": [{"x": 0.6, "y": 0.6}, {"x": 0.9, "y": 0.6}, {"x": 0.9, "y": 0.9}, {"x": 0.6, "y": 0.9}]}
+    gate = MotionGate(area_threshold=0.01, roi_area_threshold=0.001, refresh_seconds=60.0)
+    gate.should_infer(_frame(), 0.0, [roi])
+
+    # Small object far from the ROI: below the whole-frame threshold
+    far = _frame()
+    far[20:40, 20:40] = 255
+    assert not gate.should_infer(far, 0.1, [roi])
+
+    # Same-sized object stepping into the ROI edge
+    near = _frame()
+    near[200:220, 370:390] = 255
+    assert gate.should_infer(near, 0.2, [roi])
@@ -0,0 +1,185 @@
+import sys
+import os
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+import app.core.file_analysis as file_analysis
+import app.services.offline_analysis as offline_analysis
+from app.config import settings
+from app.core.alarm_manager import get_alarm_manager
+from app.core.detection import BaseDetector
+from app.core.detector_session import DetectorSession
+from app.core.file_analysis import FileAnalyzer, FileTask, FrameSampler
+from app.core.preprocess import FramePreprocessor
+from app.db.database import Base
+from app.db.models import Camera, Event
+from app.services.offline_analysis import AnalysisManager
+
+
+class BrightnessDetector(BaseDetector):
+    """One person box whose confidence encodes the frame's brightness."""
+
+    def __init__(self):
+        self.batches = []
+
+    def load_model(self) -> bool:
+        return True
+
+    @property
+    def is_loaded(self) -> bool:
+        return True
+
+    def predict(self, frame):
+        return np.array([[10.0, 10.0, 50.0, 40.0, 0.5 + frame.mean() / 510.0, 6.0]])
+
+    def predict_batch(self, frames):
+        self.batches.append([f.shape for f in frames])
+        return [self.predict(f) for f in frames]
+
+    def detect(self, frame, frame_number=0, timestamp=0.0, tracker=None):
+        return self.build_result(self.predict(frame), frame, frame_number, timestamp, tracker)
+
+
+def write_video(path, frames=60, fps=30.0):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (64, 48))
+    for i in range(frames):
+        writer.write(np.full((48, 64, 3), i * 4, dtype=np.uint8))
+    writer.release()
+
+
+WHOLE_FRAME_ROI = {
+    "id": 7, "name": "zone", "color": "#FF0000", "zone_type": "warning",
+    "points": [{"x": 0, "y": 0}, {"x": 1, "y": 0}, {"x": 1, "y": 1}, {"x": 0, "y": 1}]
+}
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "clip.avi"
+    write_video(path)
+    return path
+
+
+def test_sampler_reads_every_nth_frame(video):
+    sampler = FrameSampler(str(video), target_fps=10)
+    batches = []
+    while True:
+        batch = sampler.read_batch(8)
+        if not batch:
+            break
+        batches.append(batch)
+    sampler.close()
+
+    numbers = [n for batch in batches for _, n, _ in batch]
+    assert sampler.step == 3 and sampler.fps == 10
+    assert numbers == list(range(0, 60, 3))
+    assert len(numbers) == sampler.expected_frames
+    assert batches[0][1][2] == pytest.approx(0.1)
+
+
+def test_detect_batch_keeps_frames_apart():
+    session = DetectorSession(1, BrightnessDetector(), tracker_method="iou")
+    frames = [np.full((40, 80, 3), v, dtype=np.uint8) for v in (0, 255)]
+
+    results = session.detect_batch(frames, [0, 1], [0.0, 0.1], FramePreprocessor(inference_width=40))
+
+    # Both frames were downscaled into their own buffers before one predict call
+    assert session.detector.batches == [[(20, 40, 3), (20, 40, 3)]]
+    assert [r.boxes()[0].confidence for r in results] == [0.5, 1.0]
+    assert results[1].boxes()[0].x2 == 100.0
+    assert session.get_stats()["frames"] == 2
+
+
+def test_file_analyzer_reports_events_with_source(video, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ANALYSIS_DIR", tmp_path)
+    monkeypatch.setattr(settings, "ANALYSIS_BATCH_SIZE", 4)
+    detector = BrightnessDetector()
+    reports = []
+    task = FileTask(file_id=5, job_id=2, source=str(video), camera_id=3, rois=[WHOLE_FRAME_ROI], target_fps=15)
+
+    result = FileAnalyzer(task, detector, lambda *message: reports.append(message)).run()
+
+    assert result["state"] == "completed"
+    assert result["frames_analyzed"] == 30
+    assert result["video_ms"] == pytest.approx(58 / 30 * 1000)
+    assert max(len(batch) for batch in detector.batches) == 4
+    assert reports[0][:2] == ("started", 5) and reports[0][2]["expected_frames"] == 30
+
+    events = [data[0] for kind, _, data in reports if kind == "event"]
+    assert events and all(e.source_file == str(video) and e.camera_id == 3 for e in events)
+    assert events[0].detection_data["analysis_job_id"] == 2
+    assert result["events_found"] == len(events)
+
+    with open(result["detections_path"]) as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["frame_number"] for line in lines] == list(range(0, 60, 2))
+
+
+def test_file_analyzer_stops_when_cancelled(video, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ANALYSIS_SAVE_DETECTIONS", False)
+    monkeypatch.setattr(settings, "ANALYSIS_BATCH_SIZE", 4)
+    task = FileTask(file_id=1, job_id=1, source=str(video), camera_id=1, target_fps=30)
+
+    result = FileAnalyzer(task, BrightnessDetector(), lambda *m: None, lambda: True).run()
+
+    assert result["state"] == "cancelled"
+    assert result["frames_analyzed"] == 0
+
+
+def test_manager_runs_files_in_parallel_and_persists(video, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ANALYSIS_DIR", tmp_path)
+    monkeypatch.setattr(file_analysis, "_worker", {"detector": BrightnessDetector()})
+    monkeypatch.setattr(get_alarm_manager(), "_snapshot_dir", tmp_path)
+    second = tmp_path / "second.avi"
+    write_video(second, frames=30)
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(offline_analysis, "AsyncSessionLocal", async_sessionmaker(engine, expire_on_commit=False))
+
+    async def no_rois(camera_id):
+        return [WHOLE_FRAME_ROI]
+
+    monkeypatch.setattr(offline_analysis, "_load_roi_dicts", no_rois)
+    camera = SimpleNamespace(id=1, processing_fps=10.0, inference_width=None, gmc_method=None)
+    updates = []
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with offline_analysis.AsyncSessionLocal() as db:
+            db.add(Camera(id=1, name="cam", source=str(video)))
+            await db.commit()
+
+        manager = AnalysisManager(workers=2, executor_factory=lambda n: ThreadPoolExecutor(n))
+        manager.subscribe("test", updates.append)
+        job = await manager.create_job(camera, [str(video), str(second)])
+        while (await manager.get_job(job["id"]))["state"] in ("queued", "running"):
+            await asyncio.sleep(0.05)
+        final = await manager.get_job(job["id"])
+
+        async with offline_analysis.AsyncSessionLocal() as db:
+            from sqlalchemy import select
+            events = (await db.execute(select(Event))).scalars().all()
+        await manager.shutdown()
+        await engine.dispose()
+        return final, events
+
+    final, events = asyncio.run(run())
+
+    assert final["state"] == "completed"
+    assert [f["state"] for f in final["files"]] == ["completed", "completed"]
+    assert [f["frames_analyzed"] for f in final["files"]] == [20, 10]
+    assert final["progress"] == 1.0
+    assert final["events_found"] == len(events) > 0
+    assert {e.source_file for e in events} == {str(video), str(second)}
+    assert updates[-1]["type"] == "analysis_job" and updates[-1]["job"]["state"] == "completed"
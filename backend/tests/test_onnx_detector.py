@@ -0,0 +1,163 @@
+import sys
+import os
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.config import settings
+from app.core.onnx_detector import ONNXDetector, postprocess_outputs
+
+PARITY_FRAME = os.path.join(os.path.dirname(__file__), "data", "parity_frame.jpg")
+
+def test_postprocess_decodes_boxes_and_classes():
+    boxes = np.array([
+        [0.5, 0.5, 0.2, 0.4],   # confident person
+        [0.1, 0.1, 0.1, 0.1],   # below threshold
+    ], dtype=np.float32)
+    logits = np.full((2, 12), -10.0, dtype=np.float32)
+    logits[0, 6] = 4.0   # person
+    logits[1, 0] = -2.0  # helmet, sigmoid ~0.12
+
+    out = postprocess_outputs(boxes, logits, image_width=200, image_height=100, threshold=0.35)
+
+    assert out.shape == (1, 6)
+    x1, y1, x2, y2, conf, cls = out[0]
+    assert (x1, y1, x2, y2) == pytest.approx((80.0, 30.0, 120.0, 70.0))
+    assert conf == pytest.approx(1.0 / (1.0 + np.exp(-4.0)))
+    assert int(cls) == 6
+
+
+def test_postprocess_empty_when_nothing_passes_threshold():
+    out = postprocess_outputs(
+        np.zeros((3, 4), dtype=np.float32), np.full((3, 12), -10.0, dtype=np.float32), 640, 480, 0.35
+    )
+    assert out.shape == (0, 6)
+
+
+def test_input_buffers_are_per_thread():
+    detector = ONNXDetector()
+    detector.input_size = (32, 32)
+    assert detector.max_concurrency == 1
+
+    frames = {name: np.full((48, 64, 3), value, dtype=np.uint8) for name, value in (("a", 10), ("b", 200))}
+    batches = {}
+    start = threading.Barrier(2)
+
+    def prepare(name):
+        start.wait()
+        batches[name] = detector._prepare_inputs([frames[name]])
+
+    threads = [threading.Thread(target=prepare, args=(name,)) for name in frames]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not np.shares_memory(batches["a"], batches["b"])
+    assert batches["a"][0, 0, 0, 0] != batches["b"][0, 0, 0, 0]
+    # Reused within a thread
+    again = detector._prepare_inputs([frames["a"]])
+    assert np.shares_memory(again, detector._prepare_inputs([frames["b"]]))
+
+
+@pytest.fixture
+def parity_frames():
+    """Synthetic scenes: a textured floor with person-like figures."""
+    rng = np.random.default_rng(7)
+    frames = []
+    for i in range(3):
+        frame = np.zeros((360, 640, 3), dtype=np.uint8)
+        frame[:] = (90 + 20 * i, 110, 100)
+        frame[180:] = (60, 80 + 15 * i, 140)
+        frame = cv2.add(frame, rng.integers(0, 30, frame.shape, dtype=np.uint8))
+        for _ in range(2 + i):
+            x, y = int(rng.integers(60, 580)), int(rng.integers(120, 260))
+            color = tuple(int(c) for c in rng.integers(0, 255, 3))
+            cv2.rectangle(frame, (x - 14, y - 40), (x + 14, y + 30), color, -1)  # body
+            cv2.circle(frame, (x, y - 52), 12, (150, 180, 220), -1)  # head
+            cv2.line(frame, (x - 8, y + 30), (x - 10, y + 70), color, 8)  # legs
+            cv2.line(frame, (x + 8, y + 30), (x + 10, y + 70), color, 8)
+        frames.append(frame)
+    return frames
+
+
+def _match(reference: np.ndarray, candidate: np.ndarray) -> int:
+    """Count reference boxes with a same-class candidate at IoU >= 0.9."""
+    matched = 0
+    for ref in reference:
+        for cand in candidate:
+            if int(ref[5]) != int(cand[5]):
+                continue
+            ix = max(0.0, min(ref[2], cand[2]) - max(ref[0], cand[0]))
+            iy = max(0.0, min(ref[3], cand[3]) - max(ref[1], cand[1]))
+            inter = ix * iy
+            union = (ref[2] - ref[0]) * (ref[3] - ref[1]) + (cand[2] - cand[0]) * (cand[3] - cand[1]) - inter
+            if union > 0 and inter / union >= 0.9 and abs(ref[4] - cand[4]) < 0.05:
+                matched += 1
+                break
+    return matched
+
+
+def _parity_detectors():
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("rfdetr")
+    from app.core.detection import RFDETRDetector
+
+    if not (settings.BASE_DIR / settings.RFDETR_MODEL_PATH).exists():
+        pytest.skip("RF-DETR checkpoint not available")
+    torch_detector = RFDETRDetector()
+    onnx_detector = ONNXDetector()
+    assert torch_detector.load_model()
+    assert onnx_detector.load_model()
+    return torch_detector, onnx_detector
+
+
+def _unmatched(reference: np.ndarray, candidate: np.ndarray, pixels: float, score: float) -> list:
+    """Reference boxes without a same-class candidate within ``pixels`` per corner and ``score``."""
+    missing = []
+    for ref in reference:
+        close = (
+            (candidate[:, 5].astype(int) == int(ref[5]))
+            & (np.abs(candidate[:, :4] - ref[:4]).max(axis=1) <= pixels)
+            & (np.abs(candidate[:, 4] - ref[4]) <= score)
+        )
+        if not close.any():
+            missing.append(ref.tolist())
+    return missing
+
+
+def test_parity_on_stored_camera_frame():
+    torch_detector, onnx_detector = _parity_detectors()
+    # Frame from a site camera (with the dashboard's overlays drawn on it)
+    frame = cv2.imread(PARITY_FRAME)
+    assert frame is not None
+
+    reference = torch_detector.predict(frame)
+    candidate = onnx_detector.predict(frame)
+
+    # Boxes right at the threshold may flip; everything clearly above it must agree
+    margin = settings.RFDETR_CONFIDENCE_THRESHOLD + 0.05
+    assert len(reference) > 0
+    assert _unmatched(reference[reference[:, 4] >= margin], candidate, pixels=2.0, score=0.02) == []
+    assert _unmatched(candidate[candidate[:, 4] >= margin], reference, pixels=2.0, score=0.02) == []
+
+
+def test_parity_with_torch_backend(parity_frames, monkeypatch):
+    # Low threshold so synthetic scenes still produce boxes to compare
+    monkeypatch.setattr(settings, "RFDETR_CONFIDENCE_THRESHOLD", 0.05)
+    torch_detector, onnx_detector = _parity_detectors()
+
+    total = matched = 0
+    for frame in parity_frames:
+        reference = torch_detector.predict(frame)
+        candidate = onnx_detector.predict(frame)
+        total += len(reference)
+        matched += _match(reference, candidate)
+
+    assert total > 0
+    assert matched / total >= 0.95
@@ -0,0 +1,61 @@
+import sys
+import os
+import threading
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.core.preprocess import FramePreprocessor
+
+
+def test_downscale_reuses_buffers_and_restores_source_coordinates():
+    preprocessor = FramePreprocessor(inference_width=960)
+    frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+
+    images, regions, scales = preprocessor.prepare(frame)
+    assert images[0].shape == (540, 960, 3)
+    assert scales == [(2.0, 2.0)]
+
+    again, _, _ = preprocessor.prepare(frame)
+    # Same preallocated buffer on the next frame
+    assert again[0] is images[0]
+
+    restored = preprocessor.restore([np.array([[100.0, 50.0, 200.0, 150.0, 0.9, 6]])], regions, scales)
+    assert list(restored[0][:4]) == [200.0, 100.0, 400.0, 300.0]
+    assert preprocessor.get_stats()["frames"] == 2
+
+
+def test_crops_narrower_than_inference_width_are_not_resized():
+    preprocessor = FramePreprocessor(inference_width=640)
+    frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+
+    images, regions, scales = preprocessor.prepare(frame, regions=[(100, 200, 500, 600), (0, 0, 1280, 720)])
+    assert images[0].shape == (400, 400, 3)
+    assert images[1].shape == (360, 640, 3)
+    assert scales == [(1.0, 1.0), (2.0, 2.0)]
+
+    restored = preprocessor.restore(
+        [np.array([[10.0, 10.0, 20.0, 20.0, 0.9, 0]]), np.array([[10.0, 10.0, 20.0, 20.0, 0.9, 0]])],
+        regions, scales
+    )
+    assert sorted(tuple(row[:4]) for row in restored) == [(20.0, 20.0, 40.0, 40.0), (110.0, 210.0, 120.0, 220.0)]
+
+
+def test_buffers_are_per_thread():
+    preprocessor = FramePreprocessor(inference_width=320)
+    frame = np.zeros((360, 640, 3), dtype=np.uint8)
+    images = {}
+
+    def prepare(name):
+        images[name] = preprocessor.prepare(frame)[0][0]
+
+    for name in ("a", "b"):
+        t = threading.Thread(target=prepare, args=(name,))
+        t.start()
+        t.join()
+    prepare("main")
+
+    assert images["a"] is not images["b"] and images["a"] is not images["main"]
+    assert preprocessor.prepare(frame)[0][0] is images["main"]
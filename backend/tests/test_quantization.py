@@ -0,0 +1,72 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.core.detection import BaseDetector
+from app.core.quantization import evaluate_drift
+
+
+class FixedDetector(BaseDetector):
+    """Returns the same detections for every frame."""
+
+    def __init__(self, detections):
+        self.detections = np.array(detections, dtype=np.float32).reshape(-1, 6)
+
+    def load_model(self) -> bool:
+        return True
+
+    @property
+    def is_loaded(self) -> bool:
+        return True
+
+    def predict(self, frame):
+        return self.detections
+
+    def detect(self, frame, frame_number=0, timestamp=0.0, tracker=None):
+        return self.build_result(self.predict(frame), frame, frame_number, timestamp, tracker)
+
+
+def test_drift_report_against_fp32_and_labels():
+    fp32 = FixedDetector([
+        [0, 0, 100, 100, 0.9, 6],
+        [200, 200, 250, 250, 0.8, 0],
+    ])
+    # Keeps the person (slightly shifted), misses the helmet
+    int8 = FixedDetector([[2, 2, 100, 100, 0.85, 6]])
+    frames = [np.zeros((10, 10, 3), dtype=np.uint8)] * 3
+    labels = [np.array([[0, 0, 100, 100, 1.0, 6], [200, 200, 250, 250, 1.0, 0]])] * 3
+
+    report = evaluate_drift(fp32, int8, frames, labels)
+
+    assert report["frames"] == 3
+    assert report["agreement"]["recall"] == pytest.approx(0.5)
+    assert report["agreement"]["precision"] == pytest.approx(1.0)
+    assert report["agreement"]["mean_score_diff"] == pytest.approx(0.05, abs=1e-6)
+    assert report["accuracy"]["fp32"]["f1"] == pytest.approx(1.0)
+    assert report["accuracy"]["int8"]["recall"] == pytest.approx(0.5)
+    assert report["accuracy"]["f1_drift"] < 0
+
+
+def test_yolo_calibration_letterboxes_like_inference():
+    pytest.importorskip("ultralytics")
+    from app.core.quantization import _calibration_preprocess
+
+    # Wide BGR frame: blue left half, red right half
+    frame = np.zeros((320, 640, 3), dtype=np.uint8)
+    frame[:, :320, 0] = 255
+    frame[:, 320:, 2] = 255
+
+    tensor = _calibration_preprocess("yolo", (640, 640))(frame)
+
+    assert tensor.shape == (1, 3, 640, 640) and tensor.dtype == np.float32
+    # Aspect kept: 160 px of gray padding above and below, not a stretched image
+    assert np.allclose(tensor[0, :, :150], 114 / 255.0)
+    assert np.allclose(tensor[0, :, -150:], 114 / 255.0)
+    # RGB channel order, scaled to [0, 1]
+    assert np.allclose(tensor[0, :, 320, 100], [0.0, 0.0, 1.0])
+    assert np.allclose(tensor[0, :, 320, 540], [1.0, 0.0, 0.0])
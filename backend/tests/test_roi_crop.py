@@ -0,0 +1,88 @@
+import sys
+import os
+import asyncio
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.core.roi_crop import compute_crop_regions, merge_region_outputs
+from app.core.detection import BaseDetector
+from app.core.inference_scheduler import InferenceScheduler
+
+
+class FakeDetector(BaseDetector):
+    """Returns one person box per image at x = fill value."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def load_model(self) -> bool:
+        return True
+
+    @property
+    def is_loaded(self) -> bool:
+        return True
+
+    def predict(self, frame):
+        x = float(frame[0, 0, 0])
+        return np.array([[x, 0.0, x + 10.0, 20.0, 0.9, 6]])
+
+    def predict_batch(self, frames):
+        self.batch_sizes.append(len(frames))
+        return [self.predict(frame) for frame in frames]
+
+    def detect(self, frame, frame_number=0, timestamp=0.0, tracker=None):
+        return self.build_result(self.predict(frame), frame, frame_number, timestamp, tracker)
+
+
+def _roi(x1, y1, x2, y2):
+    return {"points": [{"x": x1, "y": y1}, {"x": x2, "y": y1}, {"x": x2, "y": y2}, {"x": x1, "y": y2}]}
+
+
+def test_union_and_tiles_regions():
+    rois = [_roi(0.1, 0.1, 0.2, 0.2), _roi(0.7, 0.7, 0.8, 0.8)]
+
+    union = compute_crop_regions(rois, 1000, 1000, mode="union", padding=0.01, max_coverage=0.8)
+    assert union == [(90, 90, 810, 810)]
+
+    tiles = compute_crop_regions(rois, 1000, 1000, mode="tiles", padding=0.01, max_tiles=4)
+    assert sorted(tiles) == [(90, 90, 210, 210), (690, 690, 810, 810)]
+
+    # Zones covering most of the frame fall back to full-frame inference
+    assert compute_crop_regions([_roi(0.0, 0.0, 1.0, 0.9)], 1000, 1000, mode="union", padding=0.0) is None
+    assert compute_crop_regions(rois, 1000, 1000, mode="off") is None
+
+
+def test_region_outputs_mapped_to_full_frame_and_deduplicated():
+    regions = [(100, 50, 300, 250), (200, 50, 400, 250)]
+    # The same person seen by both overlapping tiles
+    outputs = [
+        np.array([[120.0, 10.0, 180.0, 150.0, 0.9, 6]]),
+        np.array([[20.0, 10.0, 80.0, 150.0, 0.8, 6]]),
+    ]
+    merged = merge_region_outputs(outputs, regions)
+
+    assert merged.shape == (1, 6)
+    assert list(merged[0][:5]) == [220.0, 60.0, 280.0, 200.0, 0.9]
+
+
+def test_scheduler_runs_crops_in_the_shared_batch():
+    detector = FakeDetector()
+    scheduler = InferenceScheduler(detector_provider=lambda: detector, max_batch=4, max_wait_ms=20)
+    frame = np.full((100, 200, 3), 5, dtype=np.uint8)
+
+    async def run():
+        results = await asyncio.gather(
+            scheduler.submit(frame, regions=[(0, 0, 50, 50), (100, 0, 150, 50)]),
+            scheduler.submit(frame)
+        )
+        await scheduler.stop()
+        return results
+
+    cropped, full = asyncio.run(run())
+    assert detector.batch_sizes == [3]
+    # FakeDetector puts its box at x=5 in image coordinates; crops shift it
+    assert sorted(d.x1 for d in cropped.detections) == [5.0, 105.0]
+    assert [d.x1 for d in full.detections] == [5.0]
@@ -0,0 +1,107 @@
+import sys
+import os
+
+import numpy as np
+from shapely.geometry import Point as ShapelyPoint
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.core.roi_manager import ROIManager
+from app.schemas.detection import DetectionBox
+from app.schemas.roi import Point
+
+
+def make_manager():
+    manager = ROIManager()
+    # Concave "U" shape (normalized coordinates)
+    manager.add_roi(1, [Point(x=x, y=y) for x, y in [
+        (0.1, 0.1), (0.4, 0.1), (0.4, 0.8), (0.6, 0.8), (0.6, 0.1),
+        (0.9, 0.1), (0.9, 0.9), (0.1, 0.9)
+    ]], "U")
+    # Self-intersecting "bow tie", repaired by buffer(0)
+    manager.add_roi(2, [Point(x=x, y=y) for x, y in [
+        (0.0, 0.0), (0.5, 0.5), (0.0, 0.5), (0.5, 0.0)
+    ]], "bow tie")
+    # Pixel coordinates (normalized as 1280x720)
+    manager.add_roi(3, [Point(x=x, y=y) for x, y in [
+        (640, 100), (1200, 360), (640, 700), (80, 360)
+    ]], "diamond")
+    return manager
+
+
+def test_membership_matrix_matches_shapely():
+    manager = make_manager()
+    rng = np.random.default_rng(0)
+    points = rng.uniform(0, [640, 360], size=(2000, 2))
+
+    inside = manager.points_in_rois(points, [1, 2, 3])
+
+    assert inside.shape == (2000, 3)
+    for column, roi_id in enumerate([1, 2, 3]):
+        polygon = manager._rois[roi_id]["polygon"]
+        expected = [polygon.contains(ShapelyPoint(x / 640.0, y / 360.0)) for x, y in points]
+        assert inside[:, column].tolist() == expected
+    # Every ROI actually has points inside and outside
+    assert inside.any(axis=0).all() and (~inside).any(axis=0).all()
+
+
+def test_canvas_size_and_unknown_rois():
+    manager = make_manager()
+    points = np.array([[640.0, 360.0], [1280.0, 300.0]])
+
+    inside = manager.points_in_rois(points, [3, 99], canvas_width=1280, canvas_height=720)
+
+    assert inside.tolist() == [[True, False], [False, False]]
+    assert manager.points_in_rois(np.empty((0, 2)), [1]).shape == (0, 1)
+    assert manager.points_in_rois(points, []).shape == (2, 0)
+
+
+def test_single_point_wrappers_and_cache_invalidation():
+    manager = make_manager()
+    person = DetectionBox(
+        class_id=0, class_name="person", confidence=0.9,
+        x1=300, y1=100, x2=340, y2=200, center_x=320, center_y=150
+    )
+
+    assert manager.is_detection_in_roi(1, person) is False  # feet in the gap of the "U"
+    assert manager.is_detection_in_roi(3, person) is True
+    assert manager.get_rois_containing_point(0.25, 0.05) == [2]
+    assert manager.check_detections_in_rois([person]) == {1: [], 2: [], 3: [person]}
+
+    manager.remove_roi(3)
+    assert manager.is_detection_in_roi(3, person) is False
+    assert manager.check_detections_in_rois([person]) == {1: [], 2: []}
+
+
+def test_label_raster_matches_exact_tests():
+    exact = make_manager()
+    exact.raster_grid = 0
+    coarse = make_manager()
+    coarse.raster_grid = 16
+    rng = np.random.default_rng(1)
+    points = rng.uniform(-20, [660, 380], size=(5000, 2))
+
+    expected = exact.points_in_rois(points, [1, 2, 3, 99])
+
+    assert coarse.points_in_rois(points, [1, 2, 3, 99]).tolist() == expected.tolist()
+    assert make_manager().points_in_rois(points, [3, 1]).tolist() == expected[:, [2, 0]].tolist()
+    # At the default resolution most points are classified by the raster alone
+    fine = make_manager()
+    on_grid = rng.uniform(0, 1, size=(5000, 2))
+    _, uncertain = fine._get_raster().lookup(on_grid, [1, 2, 3])
+    assert uncertain.mean() < 0.1
+
+
+def test_raster_and_masks_rebuild_on_roi_change():
+    manager = make_manager()
+    point = np.array([[0.95 * 640, 0.95 * 360]])
+    assert not manager.points_in_rois(point, [4])[0, 0]
+    mask = manager.zone_mask(64, 36, roi_id=1)
+    assert mask.shape == (36, 64) and mask[30, 10] and not mask[20, 32]
+
+    manager.add_roi(4, [Point(x=x, y=y) for x, y in [(0.9, 0.9), (1.0, 0.9), (1.0, 1.0), (0.9, 1.0)]])
+
+    assert manager.points_in_rois(point, [4])[0, 0]
+    assert manager.zone_mask(64, 36)[35, 63]
+    assert not manager.zone_mask(64, 36, roi_id=1)[35, 63]
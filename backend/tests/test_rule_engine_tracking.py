@@ -8,7 +8,8 @@ sys.path.append(os.path.join(os.getcwd(), 'backend'))
 
 from app.core.rule_engine import RuleEngine, EventType
 from app.schemas.detection import DetectionBox, DetectionResult
-from app.core.roi_manager import ROIManager, Point as ROIPoint
+from app.core.roi_manager import ROIManager
+from app.schemas.roi import Point as ROIPoint
 
 def test_stay_time_calculation():
     # Setup
@@ -0,0 +1,77 @@
+import sys
+import os
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.core.detections import FrameDetections
+from app.core.roi_manager import ROIManager
+from app.core.rule_engine import RuleEngine
+from app.core.scene_index import SceneIndex
+from app.schemas.roi import Point
+
+
+class CountingROIManager(ROIManager):
+    """Counts membership passes."""
+
+    def __init__(self):
+        super().__init__()
+        self.passes = 0
+
+    def detections_in_rois(self, *args, **kwargs):
+        self.passes += 1
+        return super().detections_in_rois(*args, **kwargs)
+
+
+def make_frame():
+    rows = np.array([
+        # x1, y1, x2, y2, track_id, conf, cls
+        [10, 10, 50, 100, 1, 0.9, 6],     # person in the left zone
+        [20, 5, 40, 20, np.nan, 0.8, 0],  # helmet
+        [400, 10, 440, 100, 2, 0.9, 6],   # person in the right zone
+        [300, 300, 320, 340, 3, 0.9, 6],  # person in no zone
+        [15, 60, 25, 80, np.nan, 0.7, 3], # fire extinguisher in the left zone
+    ], dtype=np.float64)
+    names = ["person", "helmet", "person", "person", "fire_extinguisher"]
+    return FrameDetections.from_rows(rows, names, frame_number=1, timestamp=100.0)
+
+
+def make_manager():
+    manager = CountingROIManager()
+    manager.add_roi(1, [Point(x=x, y=y) for x, y in [(0.0, 0.0), (0.25, 0.0), (0.25, 0.5), (0.0, 0.5)]], "left")
+    manager.add_roi(2, [Point(x=x, y=y) for x, y in [(0.5, 0.0), (1.0, 0.0), (1.0, 0.5), (0.5, 0.5)]], "right")
+    return manager
+
+
+def test_buckets_and_membership():
+    frame = make_frame()
+    scene = SceneIndex(frame, make_manager(), [1, 2, 3], canvas_width=640, canvas_height=360)
+
+    assert [p.track_id for p in scene.persons] == [1, 2, 3]
+    assert len(scene.helmets) == 1 and scene.masks == []
+    # Rows are shared with the detection's own row view (used by overlays and to_dict)
+    assert scene.helmets[0] is frame.boxes()[1]
+    assert [p.track_id for p in scene.persons_in(1)] == [1]
+    assert [p.track_id for p in scene.persons_in(2)] == [2]
+    assert scene.person_count(3) == 0 and scene.persons_in(99) == []
+    assert scene.has_extinguisher(1) and not scene.has_extinguisher(2)
+    assert [r["id"] for r in scene.rois] == [1, 2]
+
+
+def test_rules_and_metrics_share_one_index():
+    manager = make_manager()
+    engine = RuleEngine(manager)
+    frame = make_frame()
+    scene = SceneIndex(frame, manager, [1, 2], canvas_width=640, canvas_height=360)
+    assert manager.passes == 2  # persons and extinguishers
+
+    engine.evaluate(frame, camera_id=1, active_roi_ids=[1, 2], canvas_width=640, canvas_height=360, scene=scene)
+    metrics = engine.get_roi_metrics([1, 2], scene=scene)
+
+    assert manager.passes == 2
+    assert {roi_id: m["count"] for roi_id, m in metrics.items()} == {1: 1, 2: 1}
+    assert [p["track_id"] for p in metrics[2]["people"]] == [2]
+    # Same result as letting each call compute membership itself
+    assert engine.get_roi_metrics([1, 2], persons=scene.persons, canvas_width=640, canvas_height=360) == metrics
@@ -0,0 +1,126 @@
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+import app.services.stream_pipeline as stream_pipeline
+from app.services.stream_pipeline import PipelineRegistry
+
+
+class FakePipeline:
+    """CameraPipeline stand-in whose source opens when the test allows it."""
+
+    def __init__(self, camera_id, source, **kwargs):
+        self.camera_id = camera_id
+        self.source = source
+        self.running = False
+        self.starts = 0
+        self.stops = 0
+        self.restarts = 0
+        self.opens = asyncio.Event()
+        self.opens.set()
+
+    @property
+    def is_running(self):
+        return self.running
+
+    async def start(self):
+        await self.opens.wait()
+        self.starts += 1
+        self.running = self.source != "broken"
+        return self.running
+
+    async def stop(self):
+        self.stops += 1
+        self.running = False
+
+    def configure(self, source, *args):
+        self.source = source
+
+    async def restart(self):
+        await self.stop()
+        self.restarts += 1
+        return await self.start()
+
+    def get_status(self):
+        return {"running": self.running}
+
+
+def make_camera(camera_id, source="rtsp://camera"):
+    return SimpleNamespace(
+        id=camera_id, source=source, source_type="rtsp", processing_fps=None,
+        detection_stride=None, inference_width=None, gmc_method=None
+    )
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(stream_pipeline, "CameraPipeline", FakePipeline)
+
+    async def frame_sink(camera_id, frame_data):
+        pass
+
+    return PipelineRegistry(frame_sink)
+
+
+def test_restart_does_not_block_other_cameras(registry):
+    async def run():
+        slow = await registry.acquire(make_camera(1))
+        slow.opens.clear()  # Reopening camera 1 hangs until allowed
+
+        restart = asyncio.create_task(registry.restart(1, make_camera(1, "rtsp://moved")))
+        await asyncio.sleep(0)
+        other = await asyncio.wait_for(registry.acquire(make_camera(2)), timeout=1.0)
+        await asyncio.wait_for(registry.release(2), timeout=1.0)
+        assert not restart.done()
+
+        slow.opens.set()
+        assert await restart
+        assert slow.source == "rtsp://moved" and slow.restarts == 1
+        return other
+
+    other = asyncio.run(run())
+    assert other.stops == 1
+
+
+def test_pipelines_are_shared_and_stopped_on_last_release(registry):
+    async def run():
+        first = await registry.acquire(make_camera(1))
+        second = await registry.acquire(make_camera(1))
+        assert first is second and first.starts == 1
+        assert registry.get_status()[1]["refs"] == 2
+
+        await registry.release(1)
+        assert first.stops == 0 and registry.get(1) is first
+
+        await registry.release(1)
+        assert first.stops == 1 and registry.get(1) is None
+        await registry.release(1)  # Unknown cameras are ignored
+
+        # The next holder gets a fresh pipeline
+        third = await registry.acquire(make_camera(1))
+        assert third is not first and third.starts == 1
+        await registry.stop_all()
+        assert third.stops == 1 and registry.get_status() == {}
+
+    asyncio.run(run())
+
+
+def test_failed_start_drops_the_reference(registry):
+    async def run():
+        assert await registry.acquire(make_camera(1, "broken")) is None
+        assert registry.get(1) is None
+
+        # A failure does not tear down a pipeline other holders still use
+        running = await registry.acquire(make_camera(2))
+        running.running = False
+        running.source = "broken"
+        assert await registry.acquire(make_camera(2)) is None
+        assert registry.get(2) is running and registry.get_status()[2]["refs"] == 1
+
+    asyncio.run(run())
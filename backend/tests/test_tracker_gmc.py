@@ -0,0 +1,55 @@
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.core.tracker import BoTSORTTracker, get_tracker
+
+
+class FakeGMC:
+    def __init__(self):
+        self.downscale = 2
+        self.calls = 0
+
+    def apply(self, raw_frame, detections=None):
+        self.calls += 1
+        time.sleep(0.01)
+        return np.eye(2, 3)
+
+
+class FakeBOTSORT:
+    """Calls GMC the way ultralytics' BOTSORT.update does."""
+
+    def __init__(self):
+        self.gmc = FakeGMC()
+
+    def update(self, detections, frame):
+        self.gmc.apply(frame, detections)
+        return np.column_stack([detections[:, :4], np.arange(1, len(detections) + 1), detections[:, 4:6]])
+
+
+def test_gmc_is_downscaled_and_timed_separately():
+    tracker = BoTSORTTracker(gmc_method="sparseOptFlow", gmc_downscale=4)
+    tracker.tracker = FakeBOTSORT()
+    tracker._instrument_gmc()
+
+    tracker.update(np.array([[0, 0, 10, 10, 0.9, 0]], dtype=float), np.zeros((40, 40, 3), dtype=np.uint8))
+    stats = tracker.get_stats()
+
+    assert tracker.tracker.gmc.downscale == 4
+    assert tracker.tracker.gmc.calls == 1
+    assert stats["gmc_method"] == "sparseOptFlow"
+    assert stats["last_gmc_ms"] >= 10.0
+    assert 0.0 <= stats["last_association_ms"] < stats["last_gmc_ms"]
+
+
+def test_iou_tracker_ignores_gmc_options():
+    tracker = get_tracker("iou", frame_rate=15, gmc_method="orb")
+    tracker.update(np.array([[0, 0, 10, 10, 0.9, 0]], dtype=float))
+
+    assert tracker.get_stats()["gmc_method"] == "none"
+    assert tracker.get_stats()["updates"] == 1
@@ -0,0 +1,65 @@
+import sys
+import os
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.core.tracker import BoTSORTTracker
+
+
+class ConstantVelocityKalman:
+    """State is [cx, cy, w, h, vx, vy, vw, vh]."""
+
+    def predict(self, mean, covariance):
+        mean = mean.copy()
+        mean[:4] += mean[4:]
+        return mean, covariance
+
+
+class FakeTrack:
+    shared_kalman = ConstantVelocityKalman()
+
+    def __init__(self, track_id, mean):
+        self.track_id = track_id
+        self.mean = np.array(mean, dtype=np.float64)
+        self.covariance = np.eye(8)
+        self.kalman_filter = None
+        self.is_activated = True
+        self.score = 0.9
+        self.cls = 6
+
+    @property
+    def xyxy(self):
+        cx, cy, w, h = self.mean[:4]
+        return np.array([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2])
+
+
+class FakeBOTSORT:
+    def __init__(self, tracks):
+        self.tracked_stracks = tracks
+
+
+def test_predict_interpolates_without_touching_state():
+    tracker = BoTSORTTracker()
+    track = FakeTrack(7, [100, 100, 20, 40, 30, 0, 0, 0])
+    tracker.tracker = FakeBOTSORT([track])
+
+    third = tracker.predict(1 / 3)
+    assert third.shape == (1, 7)
+    assert np.allclose(third[0][:4], [100.0, 80.0, 120.0, 120.0])
+    assert third[0][4] == 7
+
+    full = tracker.predict(1.0)
+    assert np.allclose(full[0][:4], [120.0, 80.0, 140.0, 120.0])
+    # The real tracker state is unchanged for the next update()
+    assert track.mean[0] == 100
+
+
+def test_predict_without_motion_model_holds_last_boxes():
+    tracker = BoTSORTTracker()
+    tracker.tracker = None
+    tracked = tracker.update(np.array([[0, 0, 10, 10, 0.9, 6]]), np.zeros((20, 20, 3), dtype=np.uint8))
+
+    assert np.array_equal(tracker.predict(0.5), tracked)